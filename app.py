@@ -1,9 +1,13 @@
+import logging
 import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import streamlit as st
-import yaml
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
-from utils.helper import read_config, get_file_config_by_path, convert_to_int, format_top_contributors, names_to_index
+from utils.helper import format_top_contributors, names_to_index
 from utils.ppt_export import generate_ppt
 from database.get_summary_table import *
 from database.database_process import create_oracle_engine
@@ -11,7 +15,13 @@ from database.get_top_contributors import get_top_attributes_by_difference
 from llm.reson_code import get_reason_code
 from llm.commentary import get_commentary, modify_commentary
 from llm.chatbot import process_chatbot_query
+from src.tracing import span
+from src.config_store import get_config_store
+from src.utils import get_table_data_version
+from src.paging import INDEX_KEY, filter_frame, sort_frame
+from src.summary import format_summary_table
 
+logger = logging.getLogger(__name__)
 
 # page Configuration
 st.set_page_config(layout="wide")
@@ -26,7 +36,9 @@ def load_custom_css():
 EXCEL_DATA_PATH = "data"
 config_file = "config/config.yaml"
 excel_data_dir = "data"
-config = read_config(config_file)
+# shared across reruns and sessions; reloads when the YAML changes on disk
+config_store = get_config_store(config_file)
+config = config_store.config
 
 # caching the resources to avoid loading multiple times
 @st.cache_resource
@@ -36,6 +48,172 @@ def load_engine(config):
     engine = create_oracle_engine(db_config)
     return engine
 
+# st.rerun() and st.stop() end a script run by raising these; spans treat them as normal exits
+STREAMLIT_EXITS = ('RerunException', 'StopException')
+
+# Slide stages are cached process-wide, shared by every session. Keys include the
+# table's data version, so reloaded data misses the cache; entries are capped and
+# expire after SLIDE_CACHE_TTL seconds
+SLIDE_CACHE_ENTRIES = int(os.getenv("SLIDE_CACHE_ENTRIES", "32"))
+SLIDE_CACHE_TTL = int(os.getenv("SLIDE_CACHE_TTL", "3600"))
+DATA_VERSION_TTL = int(os.getenv("DATA_VERSION_TTL", "30"))
+
+@st.cache_data(ttl=DATA_VERSION_TTL, show_spinner=False)
+def table_data_version(_engine, table_name):
+    return get_table_data_version(_engine, table_name)
+
+@st.cache_data(max_entries=SLIDE_CACHE_ENTRIES, ttl=SLIDE_CACHE_TTL, show_spinner=False)
+def load_summary_table(_engine, summary_func_name, data_version):
+    summary_func = globals()[summary_func_name]
+    return format_summary_table(summary_func(_engine))
+
+@st.cache_data(max_entries=SLIDE_CACHE_ENTRIES, ttl=SLIDE_CACHE_TTL, show_spinner=False)
+def load_reason_code(_df, file_name, summary_func_name, data_version):
+    return get_reason_code(_df, file_name)
+
+@st.cache_data(max_entries=SLIDE_CACHE_ENTRIES * 4, ttl=SLIDE_CACHE_TTL, show_spinner=False)
+def load_top_contributors(_engine, table_name, selected_cells, contributing_columns, top_n, data_version):
+    top_contributors = get_top_attributes_by_difference(_engine,
+                                                        selected_cells,
+                                                        table_name,
+                                                        contributing_columns,
+                                                        top_n)
+    return format_top_contributors(top_contributors)
+
+@st.cache_data(max_entries=SLIDE_CACHE_ENTRIES, ttl=SLIDE_CACHE_TTL, show_spinner=False)
+def load_commentary(file_name, top_contributors_formatted):
+    return get_commentary(top_contributors_formatted, file_name)
+
+# Background warm-up: reason code, contributors and commentary run off the script
+# thread, and the next slides in the sidebar are prefetched
+WARMUP_WORKERS = int(os.getenv("WARMUP_WORKERS", "4"))
+PREFETCH_SLIDES = int(os.getenv("PREFETCH_SLIDES", "2"))
+
+@st.cache_resource
+def get_warmup_pool():
+    return ThreadPoolExecutor(max_workers=WARMUP_WORKERS, thread_name_prefix="warmup")
+
+def submit_warmup(func, *args):
+    """Run func on the warm-up pool under the submitting script's run context
+
+    The st.cache_data loaders look up the ScriptRunContext of the calling thread, which
+    pool threads do not have, so it is attached for the duration of the task.
+    """
+    ctx = get_script_run_ctx()
+
+    def run():
+        thread = threading.current_thread()
+        add_script_run_ctx(thread, ctx)
+        try:
+            return func(*args)
+        finally:
+            # Pool threads are shared between sessions; don't leave this one's context behind
+            add_script_run_ctx(thread, None)
+
+    return get_warmup_pool().submit(run)
+
+@st.cache_resource
+def get_slide_analyses():
+    """(file, data version, columns, top_n) -> Future, shared so concurrent opens run the analysis once"""
+    return OrderedDict(), threading.Lock()
+
+def analyse_slide(engine, file_name, file_config, df, data_version, contributing_columns, top_n):
+    """Reason code -> top contributors -> commentary for a slide's initial view"""
+    with span("warmup_slide", file_name=file_name):
+        with span("reason_code"):
+            initial_selected_cells = load_reason_code(df, file_name, file_config['summary_table_function'],
+                                                      data_version)
+        with span("top_contributors", cells=len(initial_selected_cells)):
+            top_contributors_formatted = load_top_contributors(engine, file_config['table_name'],
+                                                               list(initial_selected_cells),
+                                                               list(contributing_columns), top_n, data_version)
+        with span("commentary_llm"):
+            commentary = load_commentary(file_name, top_contributors_formatted)
+    return {'selected_cells': list(initial_selected_cells), 'commentary': commentary}
+
+def start_slide_analysis(engine, file_name, file_config, df, data_version):
+    """Start (or join) the background analysis of a slide and return its Future"""
+    contributing_columns = tuple(file_config['contributing_columns'])
+    top_n = file_config['top_n']
+    key = (file_name, data_version, contributing_columns, top_n)
+    analyses, lock = get_slide_analyses()
+    with lock:
+        future = analyses.get(key)
+        if future is not None and not (future.done() and future.exception() is not None):
+            analyses.move_to_end(key)
+            return future
+        future = submit_warmup(analyse_slide, engine, file_name, file_config, df, data_version,
+                               contributing_columns, top_n)
+        analyses[key] = future
+        while len(analyses) > SLIDE_CACHE_ENTRIES:
+            analyses.popitem(last=False)
+        return future
+
+def prefetch_slide(engine, file_name):
+    """Warm the shared caches for a slide the user is likely to open next"""
+    try:
+        with span("prefetch_slide", file_name=file_name):
+            file_config = config_store.get_file_config(file_name)
+            if file_config is None:
+                return
+            data_version = table_data_version(engine, file_config['table_name'])
+            df = load_summary_table(engine, file_config['summary_table_function'], data_version)
+        start_slide_analysis(engine, file_name, file_config, df, data_version)
+    except Exception as e:
+        # Prefetching is best effort; the slide loads normally when opened
+        logger.warning("Prefetch of %s failed: %s", file_name, e)
+
+def prefetch_next_slides(file_list, current_file):
+    """Speculatively prefetch the slides after the current one in the sidebar list"""
+    if current_file not in file_list:
+        return
+    position = file_list.index(current_file)
+    for file_name in file_list[position + 1:position + 1 + PREFETCH_SLIDES]:
+        submit_warmup(prefetch_slide, st.session_state.engine, file_name)
+
+def get_cached_summary_table(file_config):
+    """Summary table for the slide from the shared cache"""
+    data_version = table_data_version(st.session_state.engine, file_config['table_name'])
+    return load_summary_table(st.session_state.engine, file_config['summary_table_function'], data_version)
+
+def get_top_contributors(file_config, selected_cells, contributing_columns, top_n):
+    """Formatted top contributors for a selection from the shared cache"""
+    data_version = table_data_version(st.session_state.engine, file_config['table_name'])
+    return load_top_contributors(st.session_state.engine, file_config['table_name'], list(selected_cells),
+                                 list(contributing_columns), top_n, data_version)
+
+# Tables longer than PAGED_TABLE_ROWS are filtered, sorted and paged in Python so the
+# browser only ever receives one page
+PAGED_TABLE_ROWS = int(os.getenv("PAGED_TABLE_ROWS", "200"))
+TABLE_PAGE_SIZE = int(os.getenv("TABLE_PAGE_SIZE", "50"))
+
+def render_summary_table(df, file_name):
+    """Summary table editor; returns the edited rows that are on screen"""
+    if len(df) <= PAGED_TABLE_ROWS:
+        return st.data_editor(df, key=f"data_editor_{file_name}", hide_index=False)
+    
+    search_col, sort_col, order_col, page_col = st.columns([3, 2, 1, 1])
+    with search_col:
+        search = st.text_input("Search rows", key=f"table_search_{file_name}")
+    with sort_col:
+        sort_by = st.selectbox("Sort by", [None, INDEX_KEY] + df.columns.tolist(), key=f"table_sort_{file_name}",
+                               format_func=lambda c: "—" if c is None else (df.index.name or "Row") if c == INDEX_KEY else c)
+    with order_col:
+        descending = st.toggle("Desc", key=f"table_desc_{file_name}")
+    
+    view = sort_frame(filter_frame(df, search), sort_by, not descending)
+    pages = max(1, -(-len(view) // TABLE_PAGE_SIZE))
+    with page_col:
+        # No key: a new filter changes max_value, which resets the widget to page 1
+        page = st.number_input("Page", min_value=1, max_value=pages, value=1, step=1)
+    start = (page - 1) * TABLE_PAGE_SIZE
+    page_df = view.iloc[start:start + TABLE_PAGE_SIZE]
+    
+    st.caption(f"Rows {start + 1 if len(page_df) else 0}–{start + len(page_df)} of {len(view)}"
+               + (f" (filtered from {len(df)})" if len(view) != len(df) else ""))
+    return st.data_editor(page_df, key=f"data_editor_{file_name}_{search}_{sort_by}_{descending}_{page}",
+                          hide_index=False)
+
 # initialize Session State
 def init_session_state():
     if 'selected_file' not in st.session_state:
@@ -51,67 +229,112 @@ def init_session_state():
 
 def initialize_file_data(file_name):
     """Initialize data for a file if it doesn't exist"""
+    st.session_state.file_config = config_store.get_file_config(file_name)
+    st.session_state.file_name = file_name
+    st.session_state.contributing_columns = st.session_state.file_config['contributing_columns']
+    st.session_state.top_n = st.session_state.file_config['top_n']
+    
+    # Only this user's selections and commentary live in session state; frames are shared
     if file_name not in st.session_state.file_data:
-        with st.spinner("Loading file data..."):
-            st.session_state.file_config = get_file_config_by_path(config, file_name)
-            st.session_state.file_name = file_name
-            # summary table (one time)
-            summary_func_name = st.session_state.file_config.get('summary_table_function')
-            summary_func = globals()[summary_func_name]
-            df = summary_func(st.session_state.engine)
-            df = df.map(convert_to_int)
-            df = df.drop(columns=['Y/Y %', 'Q/Q %'])
-            
-            st.session_state.contributing_columns = st.session_state.file_config['contributing_columns']
-            st.session_state.top_n = st.session_state.file_config['top_n']
-            
-            # reason code (one time)
-            initial_selected_cells = get_reason_code(df, file_name)
-            
-            # getting the contributing factors
-            top_contributors = get_top_attributes_by_difference(st.session_state.engine,
-                                                             initial_selected_cells,
-                                                             st.session_state.file_config['table_name'],
-                                                             st.session_state.contributing_columns,
-                                                             st.session_state.top_n)
-            top_contributors_formatted = format_top_contributors(top_contributors)
-            
-            commentary = get_commentary(top_contributors_formatted, file_name)
-            
-            st.session_state.file_data[file_name] = {
-                'name': file_name,
-                'df': df,
-                'selected_cells': initial_selected_cells.copy(),
-                'initial_selected_cells': initial_selected_cells, # Store initial selection
-                'commentary': commentary
-            }
+        file_config = st.session_state.file_config
+        with st.spinner("Loading summary table..."), span("open_slide", file_name=file_name):
+            data_version = table_data_version(st.session_state.engine, file_config['table_name'])
+            with span("summary_table"):
+                df = get_cached_summary_table(file_config)
+        
+        # The summary renders now; the rest streams in when the background analysis finishes
+        st.session_state.file_data[file_name] = {
+            'name': file_name,
+            'selected_cells': [],
+            'initial_selected_cells': [],
+            'commentary': "",
+            'analysis': start_slide_analysis(st.session_state.engine, file_name, file_config, df, data_version)
+        }
     return st.session_state.file_data[file_name]
 
+def apply_slide_analysis(file_data):
+    """Move a finished background analysis into the user's slide state"""
+    future = file_data.get('analysis')
+    if future is None or not future.done():
+        return
+    del file_data['analysis']
+    try:
+        result = future.result()
+    except Exception as e:
+        st.error(f"Could not analyse {file_data['name']}: {e}")
+        return
+    file_data['selected_cells'] = list(result['selected_cells'])
+    file_data['initial_selected_cells'] = list(result['selected_cells']) # Store initial selection
+    file_data['commentary'] = result['commentary']
+    file_data['selection_version'] = file_data.get('selection_version', 0) + 1
+
+@st.fragment(run_every=1.0)
+def await_slide_analysis(file_data):
+    """Poll the background analysis and re-run the page once it is ready"""
+    future = file_data.get('analysis')
+    if future is None or future.done():
+        st.rerun()
+    st.info("Finding reason codes and generating commentary...")
+
 def modify_config():
     """Updates the config file"""
     with st.spinner("Updating configuration..."):
-        with open(config_file, "w") as file:
-            config['excel_files'][st.session_state.file_name]['contributing_columns'] = list(st.session_state.contributing_columns)
-            config['excel_files'][st.session_state.file_name]['top_n'] = st.session_state.top_n
-            yaml.dump(config, file)
+        config_store.update_file_config(
+            st.session_state.file_name,
+            contributing_columns=list(st.session_state.contributing_columns),
+            top_n=st.session_state.top_n
+        )
+
+def add_selection(df, edited_df, file_data):
+    """Callback: add the cell picked in the selection controls
 
-def render_selection_controls(edited_df, file_data):
+    Rows on the current page take the (possibly edited) value from the editor; the rest
+    come from the full summary table.
+    """
+    row_index = st.session_state.get(f"select_row_{file_data['name']}")
+    column = st.session_state.get(f"select_column_{file_data['name']}")
+    if row_index is None or column is None:
+        return
+    source = edited_df if row_index in edited_df.index else df
+    value = source.loc[row_index, column]
+    new_selection = (row_index, column, value)
+    if new_selection in file_data['selected_cells']:
+        st.session_state.selection_warning = f"Cell ({row_index}, {column}, {value}) is already selected!"
+    else:
+        file_data['selected_cells'].append(new_selection)
+        file_data['selection_version'] = file_data.get('selection_version', 0) + 1
+
+def sync_selected_cells(file_data, widget_key):
+    """Callback: keep only the cells still ticked in the multiselect"""
+    selected_indices = st.session_state[widget_key]
+    file_data['selected_cells'] = [file_data['selected_cells'][i] for i in selected_indices]
+    file_data['selection_version'] = file_data.get('selection_version', 0) + 1
+
+@st.fragment
+def render_selection_panel(df, edited_df, file_data):
+    """
+    Selection controls and selected cells. Runs as a fragment: changing the
+    selection re-runs only this panel, not the whole script.
+    """
+    with span("selection_fragment", normal_exits=STREAMLIT_EXITS, file_name=file_data['name']):
+        left_col, right_col = st.columns(2)
+        with left_col:
+            render_selection_controls(df, edited_df, file_data)
+        with right_col:
+            render_selected_cells(file_data)
+
+def render_selection_controls(df, edited_df, file_data):
     """Render the selection controls section"""
     st.text("")
     st.markdown("<h5 style='text-align: center;'>Selection Controls</h5>", unsafe_allow_html=True)
-    row_index = st.selectbox("Select Row", edited_df.index.tolist())
-    column = st.selectbox("Select Column", ["Y/Y $", "Q/Q $"])
+    # Offer every row, not just the page the editor is showing
+    st.selectbox("Select Row", df.index.tolist(), key=f"select_row_{file_data['name']}")
+    st.selectbox("Select Column", ["Y/Y $", "Q/Q $"], key=f"select_column_{file_data['name']}")
     
-    if st.button("+ Add Selection"):
-        if row_index is not None and column is not None:
-            value = edited_df.loc[row_index, column]
-            new_selection = (row_index, column, value)
-            if new_selection in file_data['selected_cells']:
-                st.warning(f"Cell ({row_index}, {column}, {value}) is already selected!")
-            else:
-                with st.spinner("Adding selection..."):
-                    file_data['selected_cells'].append(new_selection)
-                    st.rerun()
+    st.button("+ Add Selection", on_click=add_selection, args=(df, edited_df, file_data))
+    warning = st.session_state.pop('selection_warning', None)
+    if warning:
+        st.warning(warning)
     
     with st.expander("Additional Settings", expanded=False):
         contributing_cols = st.multiselect(
@@ -147,23 +370,21 @@ def render_selected_cells(file_data):
             cell_display = [f"{row}, {col}, {val}" 
                           for row, col, val in file_data['selected_cells']]
             
-            # Create indices for multiselect
-            selected_indices = st.multiselect(
+            # A new key whenever the list changes, so the widget starts with every cell ticked
+            widget_key = f"selected_cells_{file_data['name']}_{file_data.get('selection_version', 0)}"
+            st.multiselect(
                 "Selected cells",
                 options=range(len(cell_display)),
                 default=range(len(cell_display)),
                 format_func=lambda i: cell_display[i],
-                label_visibility="visible"
+                label_visibility="visible",
+                key=widget_key,
+                on_change=sync_selected_cells,
+                args=(file_data, widget_key)
             )
-            
-            # Update selected cells if selections change
-            if len(selected_indices) != len(file_data['selected_cells']):
-                with st.spinner("Updating selections..."):
-                    file_data['selected_cells'] = [file_data['selected_cells'][i] for i in selected_indices]
-                    st.rerun()
     
     # reset button
-    st.button("Reset", key="reset", on_click=lambda: reset_selections(file_data), use_container_width=True)
+    st.button("Reset", key="reset", on_click=reset_selections, args=(file_data,), use_container_width=True)
 
 def process_chat_input():
     """Process the chat input and update chat history"""
@@ -207,7 +428,8 @@ def render_chatbot():
                                      if msg.startswith("You: ")), None)
             if last_user_message:
                 query = last_user_message[4:]
-                response = process_chatbot_query(st.session_state.engine, query, st.session_state.config['table_name'])
+                with span("chatbot_query"):
+                    response = process_chatbot_query(st.session_state.engine, query, st.session_state.config['table_name'])
                 st.session_state.chatbot_messages.append(f"Bot: {response}")
             
             st.session_state.processing_query = False
@@ -223,30 +445,27 @@ def render_chatbot():
     )
 
 def clear_selections(file_data):
-    """Clear all selected cells"""
-    with st.spinner("Clearing selections..."):
-        file_data['selected_cells'] = []
-        st.rerun()
+    """Callback: clear all selected cells"""
+    file_data['selected_cells'] = []
+    file_data['selection_version'] = file_data.get('selection_version', 0) + 1
 
 def reset_selections(file_data):
-    """Reset to initial selected cells"""
-    with st.spinner("Resetting selections..."):
-        file_data['selected_cells'] = file_data['initial_selected_cells'].copy()
-        st.rerun()
+    """Callback: reset to initial selected cells"""
+    file_data['selected_cells'] = file_data['initial_selected_cells'].copy()
+    file_data['selection_version'] = file_data.get('selection_version', 0) + 1
 
 def update_commentary(file_data):
     """Update commentary based on current selections"""
-    with st.spinner("Updating commentary..."):
+    with st.spinner("Updating commentary..."), span("update_commentary", file_name=st.session_state.file_name):
         # getting the contributing factors
-        top_contributors = get_top_attributes_by_difference(st.session_state.engine,
-                                                         file_data['selected_cells'],
-                                                         st.session_state.file_config['table_name'],
-                                                         st.session_state.contributing_columns,
-                                                         st.session_state.top_n)
-        
-        top_contributors_formatted = format_top_contributors(top_contributors)
+        with span("top_contributors", cells=len(file_data['selected_cells'])):
+            top_contributors_formatted = get_top_contributors(st.session_state.file_config,
+                                                              file_data['selected_cells'],
+                                                              st.session_state.contributing_columns,
+                                                              st.session_state.top_n)
         # getting the commentary
-        file_data['commentary'] = get_commentary(top_contributors_formatted, st.session_state.file_name)
+        with span("commentary_llm"):
+            file_data['commentary'] = get_commentary(top_contributors_formatted, st.session_state.file_name)
 
 # Main Application
 def main():
@@ -268,26 +487,29 @@ def main():
         if st.button("Ok"):
             st.session_state.selected_file = selected_file
             initialize_file_data(selected_file)
+            prefetch_next_slides(file_list, selected_file)
     
     # Main Content
     if st.session_state.selected_file:
         file_data = st.session_state.file_data[st.session_state.selected_file]
+        apply_slide_analysis(file_data)
+        analysis_pending = 'analysis' in file_data
+        df = get_cached_summary_table(st.session_state.file_config)
         col_a, col_b = st.columns([2, 2])  # Changed to two columns
         
         # Column A - Data Overview and Cell Selection
         with col_a:
             # Data Overview
             st.markdown("<center><div style='background-color:skyblue;border-radius:5px; padding:1px'><p class='section-header'>Summary Table 📊</p></div></center>", unsafe_allow_html=True)
-            edited_df = st.data_editor(file_data['df'], key=f"data_editor_{st.session_state.selected_file}", hide_index=False)
+            edited_df = render_summary_table(df, st.session_state.selected_file)
             
             # Cell Selection
             st.markdown("<center><div style='background-color:skyblue;border-radius:5px; padding:1px'><p class='section-header'>Manual Selection 👇</p></div></center>", unsafe_allow_html=True)
             
-            left_col, right_col = st.columns(2)
-            with left_col:
-                render_selection_controls(edited_df, file_data)
-            with right_col:
-                render_selected_cells(file_data)
+            if analysis_pending:
+                st.info("Selections will appear once the reason codes are ready.")
+            else:
+                render_selection_panel(df, edited_df, file_data)
             
             if st.button("Modify Commentary", use_container_width=True):
                 update_commentary(file_data)
@@ -297,7 +519,9 @@ def main():
         with col_b:
             st.markdown("<center><div style='background-color:lightpink;border-radius:5px; padding:1px'><p class='section-header'>Commentary 📝</p></div></center>", unsafe_allow_html=True)
             
-            if file_data['commentary']:
+            if analysis_pending:
+                await_slide_analysis(file_data)
+            elif file_data['commentary']:
                 st.text_area(
                     "Commentary",
                     value=file_data['commentary'],
@@ -311,7 +535,7 @@ def main():
             user_comment = st.text_input("Type to modify analysis", key=f"user_comment_input_{st.session_state.selected_file}")
             if st.button("Update Commentary", key=f"update_commentary_btn_{st.session_state.selected_file}"):
                 if user_comment:
-                    with st.spinner("Modifying commentary..."):
+                    with st.spinner("Modifying commentary..."), span("modify_commentary_llm"):
                         file_data['commentary'] = modify_commentary(
                             user_comment,
                             file_data['commentary'],
@@ -320,7 +544,7 @@ def main():
                             st.session_state.contributing_columns,
                             st.session_state.top_n
                         )
-                        st.rerun()
+                    st.rerun()
                 else:
                     st.error("Please provide comments to update the commentary")
         
@@ -331,4 +555,6 @@ def main():
         st.info("Please select a file from the sidebar and click 'Ok' to begin analysis.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # Full-script rerun latency; fragment reruns are timed by the selection_fragment span
+    with span("app_rerun", normal_exits=STREAMLIT_EXITS):
+        main()
\ No newline at end of file
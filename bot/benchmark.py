@@ -0,0 +1,223 @@
+"""Benchmark SQLChain against recorded LLM responses and a local SQLite copy.
+
+Example:
+    python benchmark.py --corpus benchmark_corpus.json --rows 50000 --output report.json
+    python benchmark.py --baseline report.json --max-regression 0.25
+"""
+import argparse
+import json
+import logging
+import math
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+from functools import wraps
+from typing import Dict, List, Optional
+
+from sqlalchemy import create_engine, text
+
+from logger_config import logger
+from fake_llm import RecordedLLM
+from sql_chain import SQLChain
+
+STAGES = ["generate_sql", "execute_sql_with_retry", "format_response"]
+
+SYNTHETIC_COLUMNS = {
+    "Date": ["Q1 2023", "Q2 2023", "Q3 2023", "Q4 2023", "Q1 2024"],
+    "Attribute": ["Hardware", "Software", "Services", "Licensing", "Support", "Cloud"],
+    "Region": ["AMER", "EMEA", "APAC", "LATAM"],
+    "Transaction Type": ["Revenue", "Cost"],
+    "Reason Code": ["Volume", "Price", "FX", "Mix", "One-off", "Tax"],
+}
+
+
+def build_synthetic_table(engine, table_name: str, rows: int, seed: int = 7) -> None:
+    """Create a deterministic CMDM_Product-like table in the local database."""
+    rng = random.Random(seed)
+    with engine.begin() as conn:
+        conn.execute(text(f'DROP TABLE IF EXISTS "{table_name}"'))
+        conn.execute(text(
+            f'CREATE TABLE "{table_name}" ("Date" VARCHAR(10), "Attribute" VARCHAR(50), "Region" VARCHAR(10), '
+            f'"Transaction Type" VARCHAR(20), "Reason Code" VARCHAR(20), "End User" VARCHAR(50), "Amount" FLOAT)'
+        ))
+        insert = text(
+            f'INSERT INTO "{table_name}" VALUES (:date, :attribute, :region, :transaction_type, '
+            f':reason_code, :end_user, :amount)'
+        )
+        batch = []
+        for _ in range(rows):
+            batch.append({
+                "date": rng.choice(SYNTHETIC_COLUMNS["Date"]),
+                "attribute": rng.choice(SYNTHETIC_COLUMNS["Attribute"]),
+                "region": rng.choice(SYNTHETIC_COLUMNS["Region"]),
+                "transaction_type": rng.choice(SYNTHETIC_COLUMNS["Transaction Type"]),
+                "reason_code": rng.choice(SYNTHETIC_COLUMNS["Reason Code"]),
+                "end_user": f"Customer {rng.randint(1, 500):03d}",
+                "amount": round(rng.uniform(-50000, 250000), 2),
+            })
+            if len(batch) == 5000:
+                conn.execute(insert, batch)
+                batch = []
+        if batch:
+            conn.execute(insert, batch)
+    logger.info(f"Built synthetic {table_name} with {rows} rows")
+
+
+def load_csv_table(engine, table_name: str, csv_path: str) -> None:
+    """Load an export of the real table (e.g. CMDM_Product) into the local database."""
+    import pandas as pd
+
+    df = pd.read_csv(csv_path)
+    df.to_sql(table_name, engine, if_exists="replace", index=False, chunksize=5000)
+    logger.info(f"Loaded {len(df)} rows from {csv_path} into {table_name}")
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def _summarise(values: List[float]) -> dict:
+    return {
+        "count": len(values),
+        "p50_ms": round(percentile(values, 50) * 1000, 3) if values else None,
+        "p95_ms": round(percentile(values, 95) * 1000, 3) if values else None,
+        "mean_ms": round(sum(values) / len(values) * 1000, 3) if values else None,
+    }
+
+
+def instrument(chain: SQLChain, timings: Dict[str, List[float]]) -> None:
+    """Wrap the chain's stage methods on the instance to record their durations."""
+    for stage in STAGES:
+        method = getattr(chain, stage)
+
+        def timed(*args, __method=method, __stage=stage, **kwargs):
+            start = time.perf_counter()
+            try:
+                return __method(*args, **kwargs)
+            finally:
+                timings[__stage].append(time.perf_counter() - start)
+
+        setattr(chain, stage, wraps(method)(timed))
+
+
+def run_benchmark(chain: SQLChain, llm: RecordedLLM, questions: List[str], iterations: int = 1) -> dict:
+    """Replay every question `iterations` times and collect latency, retry and token stats."""
+    timings: Dict[str, List[float]] = defaultdict(list)
+    instrument(chain, timings)
+    totals, retries, failures = [], Counter(), []
+    calls_per_question, tokens_per_question = [], []
+
+    for _ in range(iterations):
+        for question in questions:
+            llm.reset()
+            calls, input_tokens, output_tokens = llm.calls, llm.input_tokens, llm.output_tokens
+            start = time.perf_counter()
+            try:
+                result = chain.run(question)
+                retries[result["retry_count"]] += 1
+            except Exception as e:
+                failures.append({"question": question, "error": str(e)})
+                retries["failed"] += 1
+            totals.append(time.perf_counter() - start)
+            calls_per_question.append(llm.calls - calls)
+            tokens_per_question.append((llm.input_tokens - input_tokens) + (llm.output_tokens - output_tokens))
+
+    return {
+        "questions": len(questions),
+        "iterations": iterations,
+        "stages": {stage: _summarise(timings[stage]) for stage in STAGES},
+        "total": _summarise(totals),
+        "retry_distribution": {str(k): v for k, v in sorted(retries.items(), key=lambda item: str(item[0]))},
+        "failures": failures,
+        "llm_calls": {"total": llm.calls, "mean_per_question": round(sum(calls_per_question) / len(totals), 3)},
+        "tokens": {
+            "input": llm.input_tokens,
+            "output": llm.output_tokens,
+            "mean_per_question": round(sum(tokens_per_question) / len(totals), 1),
+        },
+    }
+
+
+def compare_to_baseline(report: dict, baseline: dict, max_regression: float) -> List[str]:
+    """List the metrics that got worse than the baseline by more than `max_regression`."""
+    regressions = []
+
+    def check(name: str, current, previous, tolerance: float = max_regression):
+        if current is None or not previous:
+            return
+        if current > previous * (1 + tolerance):
+            regressions.append(f"{name}: {previous} -> {current}")
+
+    for stage in STAGES + ["total"]:
+        current = report["total"] if stage == "total" else report["stages"][stage]
+        previous = baseline["total"] if stage == "total" else baseline["stages"].get(stage, {})
+        check(f"{stage} p95_ms", current.get("p95_ms"), previous.get("p95_ms"))
+    # Call and token counts are deterministic with recorded responses, so any increase counts
+    check("llm_calls per question", report["llm_calls"]["mean_per_question"],
+          baseline["llm_calls"]["mean_per_question"], tolerance=0)
+    check("tokens per question", report["tokens"]["mean_per_question"],
+          baseline["tokens"]["mean_per_question"], tolerance=0)
+    if len(report["failures"]) > len(baseline["failures"]):
+        regressions.append(f"failures: {len(baseline['failures'])} -> {len(report['failures'])}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SQLChain with recorded LLM responses")
+    parser.add_argument("--corpus", default="benchmark_corpus.json", help="Recorded questions and responses")
+    parser.add_argument("--database", default="sqlite:///benchmark.db", help="SQLAlchemy URL of the local copy")
+    parser.add_argument("--table-name", default="CMDM_Product")
+    parser.add_argument("--csv", help="Load the table from this CSV export instead of synthesising it")
+    parser.add_argument("--rows", type=int, default=20000, help="Rows in the synthetic table")
+    parser.add_argument("--skip-load", action="store_true", help="Reuse the table already in --database")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Simulated seconds per LLM call")
+    parser.add_argument("--cache", action="store_true", help="Enable SQLChain's question cache")
+    parser.add_argument("--output", help="Write the JSON report here")
+    parser.add_argument("--baseline", help="Fail if the run regresses against this report")
+    parser.add_argument("--max-regression", type=float, default=0.25)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logger.setLevel(logging.WARNING)
+
+    engine = create_engine(args.database)
+    if not args.skip_load:
+        if args.csv:
+            load_csv_table(engine, args.table_name, args.csv)
+        else:
+            build_synthetic_table(engine, args.table_name, args.rows)
+
+    llm = RecordedLLM.from_file(args.corpus, latency=args.llm_latency)
+    with open(args.corpus, "r") as f:
+        questions = [item["question"] for item in json.load(f)]
+
+    chain = SQLChain(llm=llm, db=None, engine=engine, table_name=args.table_name,
+                     cache_max_entries=256 if args.cache else 0)
+    report = run_benchmark(chain, llm, questions, args.iterations)
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(report, baseline, args.max_regression)
+        if regressions:
+            print("Regressions against baseline:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
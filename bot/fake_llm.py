@@ -0,0 +1,145 @@
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from query_cache import normalize_question
+
+# The repo root, for the shared src package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The same estimate as the production llm_completion_tokens_estimated metric
+from src.metrics import estimate_tokens
+
+_QUESTION_RE = re.compile(r"User Question: (.*?)\n", re.DOTALL)
+
+
+def prompt_kind(prompt: str) -> str:
+    """Tell which SQLChain prompt this is: sql, fix, decompose or response."""
+    if "Rejected SQL Query:" in prompt:
+        return "fix"
+    if "Sub-questions:" in prompt:
+        return "decompose"
+    if "SQL Result:" in prompt:
+        return "response"
+    return "sql"
+
+
+def prompt_question(prompt: str) -> str:
+    match = _QUESTION_RE.search(prompt)
+    return normalize_question(match.group(1)) if match else ""
+
+
+class FakeMessage:
+    """Stand-in for a LangChain AIMessage."""
+
+    def __init__(self, content: str, input_tokens: int, output_tokens: int):
+        self.content = content
+        self.usage_metadata = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+
+
+class RecordedLLM:
+    """Deterministic LLM that replays recorded responses for SQLChain prompts.
+
+    Recordings map each question to its responses per prompt kind::
+
+        {"question": "...", "responses": {"sql": ["SELECT ...", "SELECT ..."],
+                                          "decompose": "[...]", "response": "..."}}
+
+    SQL generation and fix prompts share the "sql" list and consume it in
+    order, so a recording of a failing first draft followed by a fix replays
+    the same retry path every time. `latency` adds a fixed delay per call.
+    """
+
+    def __init__(self, recordings: List[dict], latency: float = 0.0):
+        self.latency = latency
+        self._responses: Dict[str, dict] = {
+            normalize_question(item["question"]): item["responses"] for item in recordings
+        }
+        self._sql_calls = defaultdict(int)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+    @classmethod
+    def from_file(cls, path: str, latency: float = 0.0) -> "RecordedLLM":
+        with open(path, "r") as f:
+            return cls(json.load(f), latency=latency)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._sql_calls.clear()
+
+    def _lookup(self, prompt: str) -> str:
+        kind = prompt_kind(prompt)
+        question = prompt_question(prompt)
+        responses = self._responses.get(question)
+        if responses is None:
+            raise KeyError(f"No recording for question: {question}")
+
+        if kind in ("sql", "fix"):
+            with self._lock:
+                index = self._sql_calls[question]
+                self._sql_calls[question] += 1
+            sql_responses = responses["sql"]
+            return sql_responses[min(index, len(sql_responses) - 1)]
+        if kind == "decompose":
+            return responses.get("decompose", json.dumps([question]))
+        return responses.get("response", "")
+
+    def invoke(self, messages) -> FakeMessage:
+        prompt = "\n".join(message.content for message in messages)
+        content = self._lookup(prompt)
+        if self.latency:
+            time.sleep(self.latency)
+        input_tokens, output_tokens = estimate_tokens(prompt), estimate_tokens(content)
+        with self._lock:
+            self.calls += 1
+            self.input_tokens += input_tokens
+            self.output_tokens += output_tokens
+        return FakeMessage(content, input_tokens, output_tokens)
+
+    async def ainvoke(self, messages) -> FakeMessage:
+        return self.invoke(messages)
+
+
+class RecordingLLM:
+    """Wraps a real LLM and records its responses in RecordedLLM's format."""
+
+    def __init__(self, llm):
+        self.llm = llm
+        self._recordings: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def _record(self, prompt: str, content: str) -> None:
+        kind = prompt_kind(prompt)
+        question = prompt_question(prompt)
+        with self._lock:
+            responses = self._recordings.setdefault(question, {"question": question, "responses": {}})["responses"]
+            if kind in ("sql", "fix"):
+                responses.setdefault("sql", []).append(content)
+            else:
+                responses[kind] = content
+
+    def invoke(self, messages):
+        response = self.llm.invoke(messages)
+        self._record("\n".join(message.content for message in messages), response.content)
+        return response
+
+    async def ainvoke(self, messages):
+        response = await self.llm.ainvoke(messages)
+        self._record("\n".join(message.content for message in messages), response.content)
+        return response
+
+    def save(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(list(self._recordings.values()), f, indent=2)
@@ -0,0 +1,123 @@
+import re
+from numbers import Number
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+
+# The count is optional ("FETCH FIRST ROW ONLY" fetches one row); PERCENT and WITH TIES
+# clauses are matched so they are recognised, but not rewritten
+_FETCH_FIRST_RE = re.compile(r"\bFETCH\s+(?:FIRST|NEXT)\s+(?:(\d+)\s+)?(PERCENT\s+)?ROWS?\s+(?:ONLY|(WITH\s+TIES))\s*$",
+                             re.IGNORECASE)
+_LIMIT_RE = re.compile(r"\bLIMIT\s+(\d+)\s*$", re.IGNORECASE)
+
+
+def _fetch_first_to_limit(match: re.Match) -> str:
+    if match.group(2) or match.group(3):
+        return match.group(0)
+    return f"LIMIT {match.group(1) or 1}"
+
+
+def limit_rows(sql_query: str, max_rows: int, dialect: str = "oracle") -> str:
+    """Limit a query so the database returns at most `max_rows` + 1 rows.
+
+    The extra row lets the caller tell a complete result from a truncated
+    one. Queries that already fetch no more than `max_rows` are left as is; a
+    larger limit is lowered and a missing one appended to the query itself.
+    Wrapping it in ``SELECT * FROM (...)`` instead would fail on queries
+    returning duplicate column names, e.g. a join selecting both tables' id.
+    FETCH FIRST ... PERCENT and ... WITH TIES clauses are left as they are; the
+    caller only fetches `max_rows` + 1 rows of the result anyway.
+    """
+    sql_query = sql_query.strip().rstrip(";").rstrip()
+    if dialect != "oracle":
+        # Local copies (e.g. SQLite) don't understand Oracle's row limiting clause
+        sql_query = _FETCH_FIRST_RE.sub(_fetch_first_to_limit, sql_query)
+    pattern = _FETCH_FIRST_RE if dialect == "oracle" else _LIMIT_RE
+    match = pattern.search(sql_query)
+    if match:
+        if dialect == "oracle" and (match.group(2) or match.group(3)):
+            return sql_query
+        count = match.group(1)
+        if int(count or 1) <= max_rows:
+            return sql_query
+        if count is None:
+            # "FETCH FIRST ROW ONLY" with max_rows < 1: put the count in front of ROW(S)
+            position = match.start(0) + re.search(r"ROWS?", match.group(0), re.IGNORECASE).start()
+            return sql_query[:position] + f"{max_rows + 1} " + sql_query[position:]
+        return sql_query[:match.start(1)] + str(max_rows + 1) + sql_query[match.end(1):]
+    # On its own line, so a trailing line comment can't swallow it
+    if dialect == "oracle":
+        return f"{sql_query}\nFETCH FIRST {max_rows + 1} ROWS ONLY"
+    return f"{sql_query}\nLIMIT {max_rows + 1}"
+
+
+def run_bounded(engine, sql_query: str, max_rows: int, timeout: Optional[float] = None,
+                fetch_size: int = 500) -> Tuple[List[str], List[tuple], bool]:
+    """Run a row-limited query with a server-side cursor and a call timeout.
+
+    Returns the column names, at most `max_rows` rows and whether the result
+    was truncated.
+    """
+    dialect = engine.dialect.name
+    bounded_query = limit_rows(sql_query, max_rows, dialect)
+    with engine.connect() as conn:
+        dbapi_connection = conn.connection.dbapi_connection
+        # python-oracledb/cx_Oracle abort any round trip that exceeds call_timeout (ms)
+        use_call_timeout = bool(timeout) and hasattr(dbapi_connection, "call_timeout")
+        if use_call_timeout:
+            dbapi_connection.call_timeout = int(timeout * 1000)
+        try:
+            result = conn.execution_options(yield_per=fetch_size).execute(text(bounded_query))
+            columns = list(result.keys())
+            rows = [tuple(row) for row in result.fetchmany(max_rows + 1)]
+            result.close()
+        finally:
+            if use_call_timeout:
+                # The connection goes back to the pool; don't leak the timeout
+                dbapi_connection.call_timeout = 0
+    truncated = len(rows) > max_rows
+    return columns, rows[:max_rows], truncated
+
+
+def _summarise_columns(columns: Sequence[str], rows: Sequence[tuple]) -> List[str]:
+    lines = []
+    for i, column in enumerate(columns):
+        values = [row[i] for row in rows if row[i] is not None]
+        if values and all(isinstance(value, Number) and not isinstance(value, bool) for value in values):
+            lines.append(f"{column}: sum={sum(values)}, min={min(values)}, max={max(values)}")
+    return lines
+
+
+def render_result(columns: Sequence[str], rows: Sequence[tuple], truncated: bool, max_chars: int = 4000) -> str:
+    """Render rows as a compact table for the response prompt, within `max_chars`.
+
+    When rows are dropped (by the row limit or the character budget) a note
+    and per-column numeric summaries of the fetched rows are appended.
+    """
+    header = " | ".join(str(column) for column in columns)
+    lines = [header]
+    used = len(header)
+    shown = 0
+    for row in rows:
+        line = " | ".join("" if value is None else str(value) for value in row)
+        if used + len(line) + 1 > max_chars:
+            break
+        lines.append(line)
+        used += len(line) + 1
+        shown += 1
+
+    if truncated or shown < len(rows):
+        total = f"more than {len(rows)}" if truncated else str(len(rows))
+        lines.append(f"... showing {shown} of {total} rows (result truncated)")
+        summary = _summarise_columns(columns, rows)
+        if summary:
+            lines.append(f"Summary of the first {len(rows)} rows:")
+            lines.extend(summary)
+    return "\n".join(lines)
+
+
+def truncate_text(result: str, max_chars: int = 4000) -> str:
+    """Cut an already-stringified result down to `max_chars`."""
+    if len(result) <= max_chars:
+        return result
+    return result[:max_chars] + f"\n... (result truncated, {len(result)} characters in total)"
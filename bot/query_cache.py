@@ -0,0 +1,89 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+NUMBER_WORDS = {
+    "zero": "0", "one": "1", "two": "2", "three": "3", "four": "4", "five": "5",
+    "six": "6", "seven": "7", "eight": "8", "nine": "9", "ten": "10",
+    "eleven": "11", "twelve": "12",
+}
+
+_QUOTED_RE = re.compile(r"((?<!\w)'[^']*'(?!\w)|\"[^\"]*\")")
+_NUMBER_RE = re.compile(r"(?<![\w.])\d[\d,]*(?:\.\d+)?(?![\w.])")
+_NUMBER_WORD_RE = re.compile(r"\b(" + "|".join(NUMBER_WORDS) + r")\b")
+
+
+def _canonical_number(match: re.Match) -> str:
+    literal = match.group(0).replace(",", "")
+    try:
+        value = float(literal)
+    except ValueError:
+        return match.group(0)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def normalize_question(question: str) -> str:
+    """Normalise a question so near-identical phrasings share a cache key.
+
+    Text outside quotes is lower-cased, number words and literals are
+    canonicalised ("three", "3.0" and "03" all become "3") and whitespace and
+    trailing punctuation are collapsed. Quoted values are kept verbatim since
+    they usually end up as case-sensitive SQL literals.
+    """
+    parts = []
+    for i, part in enumerate(_QUOTED_RE.split(question.strip())):
+        if i % 2 == 1:
+            parts.append(part)
+            continue
+        part = part.lower()
+        part = _NUMBER_WORD_RE.sub(lambda m: NUMBER_WORDS[m.group(1)], part)
+        part = _NUMBER_RE.sub(_canonical_number, part)
+        parts.append(part)
+    normalized = re.sub(r"\s+", " ", "".join(parts)).strip()
+    return normalized.rstrip("?.!; ")
+
+
+class QueryCache:
+    """Thread-safe LRU cache with a per-entry time to live."""
+
+    def __init__(self, max_entries: int = 256, ttl: Optional[float] = 3600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None:
+                value, expires_at = item
+                if expires_at is None or expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
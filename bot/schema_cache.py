@@ -0,0 +1,140 @@
+import os
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import inspect, text
+from logger_config import logger
+
+# The repo root, for the shared src package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils import get_table_data_version
+
+COLUMNS_QUERY = """
+SELECT c.column_name, c.data_type, m.comments
+FROM all_tab_columns c
+LEFT JOIN all_col_comments m
+  ON m.owner = c.owner
+ AND m.table_name = c.table_name
+ AND m.column_name = c.column_name
+WHERE c.table_name IN (:table_name, UPPER(:table_name))
+{owner_filter}
+ORDER BY c.column_id
+"""
+
+DDL_TIME_QUERY = """
+SELECT MAX(last_ddl_time)
+FROM all_objects
+WHERE object_type = 'TABLE'
+AND object_name IN (:table_name, UPPER(:table_name))
+{owner_filter}
+"""
+
+class SchemaCache:
+    """Caches the column/comment prompt context for each table.
+
+    The context is built once per table from the data dictionary and reused
+    across questions. It is rebuilt only when ``last_ddl_time`` in
+    ``all_objects`` changes, and that check itself runs at most once every
+    ``refresh_interval`` seconds.
+    """
+
+    def __init__(self, engine, owner: Optional[str] = None, refresh_interval: float = 300.0):
+        self.engine = engine
+        self.owner = owner
+        self.refresh_interval = refresh_interval
+        self._entries: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def _owner_filter(self, alias: str = "") -> Tuple[str, dict]:
+        if not self.owner:
+            return "", {}
+        column = f"{alias}.owner" if alias else "owner"
+        return f"AND {column} = UPPER(:owner)", {"owner": self.owner}
+
+    def _is_oracle(self) -> bool:
+        return self.engine.dialect.name == "oracle"
+
+    def get_ddl_time(self, table_name: str):
+        """Return the last DDL time of the table, or None if it cannot be determined."""
+        if not self._is_oracle():
+            return None
+        owner_filter, params = self._owner_filter()
+        query = text(DDL_TIME_QUERY.format(owner_filter=owner_filter))
+        with self.engine.connect() as conn:
+            return conn.execute(query, {"table_name": table_name, **params}).scalar()
+
+    def get_data_version(self, table_name: str) -> Optional[str]:
+        """Return a version covering DDL and DML on the table, or None if it cannot be determined.
+
+        Same version as ingestion and the app compute (src.utils.get_table_data_version).
+        """
+        return get_table_data_version(self.engine, table_name, self.owner)
+
+    def _load_columns(self, table_name: str) -> List[Tuple[str, str, Optional[str]]]:
+        if not self._is_oracle():
+            # Non-Oracle engines (e.g. a local SQLite copy) go through the inspector
+            columns = inspect(self.engine).get_columns(table_name, schema=self.owner)
+            return [(col["name"], str(col["type"]), col.get("comment")) for col in columns]
+
+        owner_filter, params = self._owner_filter("c")
+        query = text(COLUMNS_QUERY.format(owner_filter=owner_filter))
+        with self.engine.connect() as conn:
+            rows = conn.execute(query, {"table_name": table_name, **params}).fetchall()
+        return [(row[0], row[1], row[2]) for row in rows]
+
+    @staticmethod
+    def _format_context(columns: List[Tuple[str, str, Optional[str]]]) -> str:
+        formatted_metadata = ""
+        for col_name, data_type, metadata in columns:
+            formatted_metadata += f"{col_name} ({data_type}) : {metadata or ''}\n"
+        return formatted_metadata
+
+    def _refresh(self, table_name: str, entry: Optional[dict]) -> dict:
+        ddl_time = self.get_ddl_time(table_name)
+        if entry is not None and entry["ddl_time"] == ddl_time:
+            entry["checked_at"] = time.monotonic()
+            return entry
+
+        columns = self._load_columns(table_name)
+        logger.info(f"Loaded schema for {table_name}: {len(columns)} columns (last DDL: {ddl_time})")
+        return {
+            "ddl_time": ddl_time,
+            "columns": [col_name for col_name, _, _ in columns],
+            "context": self._format_context(columns),
+            "checked_at": time.monotonic(),
+        }
+
+    def get_entry(self, table_name: str) -> Optional[dict]:
+        """Return the cached schema entry for the table, refreshing it if stale."""
+        with self._lock:
+            entry = self._entries.get(table_name)
+            if entry is not None and time.monotonic() - entry["checked_at"] < self.refresh_interval:
+                return entry
+            try:
+                entry = self._refresh(table_name, entry)
+                self._entries[table_name] = entry
+            except Exception as e:
+                # Keep serving the previous context rather than failing the question
+                logger.warning(f"Could not refresh schema for {table_name}: {str(e)}")
+            return entry
+
+    def get_context(self, table_name: str) -> str:
+        """Return the column details block for the SQL prompt."""
+        entry = self.get_entry(table_name)
+        return entry["context"] if entry else ""
+
+    def get_columns(self, table_name: str) -> List[str]:
+        """Return the cached column names of the table."""
+        entry = self.get_entry(table_name)
+        return list(entry["columns"]) if entry else []
+
+    def invalidate(self, table_name: Optional[str] = None) -> None:
+        """Drop the cached entry for one table, or for all tables."""
+        with self._lock:
+            if table_name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(table_name, None)
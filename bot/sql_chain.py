@@ -1,18 +1,59 @@
-from typing import Optional, Tuple
+import asyncio
+import json
+from typing import List, Optional
 from langchain.schema import HumanMessage
 from logger_config import logger
 from exceptions import SQLGenerationError, SQLExecutionError, MaxRetriesExceededError
+from schema_cache import SchemaCache
+from query_cache import QueryCache, normalize_question
+from sql_validator import clean_sql, auto_fix, validate_sql, explain_sql
+from guardrails import limit_rows, run_bounded, render_result, truncate_text
 
 class SQLChain:
-    def __init__(self, llm, db, max_retries: int = 10):
+    def __init__(self, llm, db, max_retries: int = 10, table_name: str = "CMDM_Product",
+                 engine=None, schema_owner: Optional[str] = None, schema_refresh_interval: float = 300.0,
+                 cache_max_entries: int = 256, cache_ttl: Optional[float] = 3600.0, cache_results: bool = False,
+                 max_llm_calls: int = 3, explain_before_execute: bool = False,
+                 max_rows: int = 1000, statement_timeout: Optional[float] = 30.0,
+                 max_result_chars: int = 4000, fetch_size: int = 500,
+                 db_concurrency: Optional[int] = None):
         self.llm = llm
         self.db = db
         self.max_retries = max_retries
+        self.table_name = table_name
+        # Budget of model calls (initial generation + fixes) per question
+        self.max_llm_calls = max_llm_calls
+        self.explain_before_execute = explain_before_execute
+        # Guardrails on what a generated query may cost and how much reaches the prompt
+        self.max_rows = max_rows
+        self.statement_timeout = statement_timeout
+        self.max_result_chars = max_result_chars
+        self.fetch_size = fetch_size
+        
+        # LangChain's SQLDatabase keeps its SQLAlchemy engine in `_engine`
+        engine = engine if engine is not None else getattr(db, "_engine", None)
+        self.engine = engine
+        # Concurrent statements allowed by the async API; defaults to the engine's pool size
+        if db_concurrency is None:
+            pool_size = getattr(getattr(engine, "pool", None), "size", None)
+            db_concurrency = pool_size() if callable(pool_size) else 5
+        self.db_concurrency = db_concurrency
+        self._db_semaphore = None
+        self._db_semaphore_loop = None
+        self.schema_cache = SchemaCache(engine, owner=schema_owner,
+                                        refresh_interval=schema_refresh_interval) if engine is not None else None
+        
+        # Question -> SQL cache; result sets are only cached when cache_results is set
+        self.query_cache = QueryCache(max_entries=cache_max_entries, ttl=cache_ttl) if cache_max_entries else None
+        self.cache_results = cache_results
         
         self.sql_prompt_template = """
-You are an AI assistant that helps users query an Oracle database from CMDM_Product table.
+You are an AI assistant that helps users query an Oracle database from {table_name} table.
 Based on the user's question, generate the appropriate SQL query.
 
+Table Column Details:
+{schema}
+
 **Note : Only provide the SQL query and nothing else. Also provide the column/s name is "**
 **IMP : Generate SQL queries for an Oracle database. Avoid unsupported keywords like
 LIMIT, OFFSET, AUTO_INCREMENT, BOOLEAN, TEXT, DATETIME, and IF EXISTS. Use FETCH FIRST N ROWS ONLY
@@ -25,6 +66,34 @@ User Question: {query}
 
 SQL Query:"""
 
+        self.fix_prompt_template = """
+You are an AI assistant that fixes Oracle SQL queries on the {table_name} table.
+The query below was generated for the user's question but was rejected.
+
+Table Column Details:
+{schema}
+
+User Question: {question}
+Rejected SQL Query: {sql_query}
+Problems: {problems}
+
+**IMP : Return a corrected Oracle SQL query. Do not use LIMIT or OFFSET; use FETCH FIRST N ROWS ONLY.
+Use only the columns listed above, written as is in quotation marks e.g. "COL_NAME".**
+**Note : Only provide the SQL query and nothing else. **
+
+SQL Query:"""
+
+        self.decompose_prompt_template = """
+You are an AI assistant that splits questions about the {table_name} table into sub-questions.
+If the question asks for several things that can each be answered by a separate, independent
+SQL query, list those sub-questions. Otherwise return the question unchanged as the only item.
+
+**Note : Only provide a JSON list of strings and nothing else. **
+
+User Question: {question}
+
+Sub-questions:"""
+
         self.response_prompt_template = """
 You are an AI assistant that helps users understand data from an Oracle database.
 Given the user's question, SQL query and its results, provide a clear, concise answer.
@@ -36,41 +105,131 @@ SQL Result: {sql_result}
 Your Response:
 """
 
+    def get_schema_context(self) -> str:
+        """Return the cached column details for the table (empty if unavailable)."""
+        if self.schema_cache is None:
+            return ""
+        return self.schema_cache.get_context(self.table_name)
+
+    def get_data_version(self):
+        """Return the table data version, or None if unknown.
+
+        Cached SQL only depends on the schema, so the last DDL time is enough.
+        When result sets are cached too, the version also covers DML (see
+        SchemaCache.get_data_version), so inserts and updates invalidate them.
+        """
+        if self.schema_cache is None:
+            return None
+        if self.cache_results:
+            return self.schema_cache.get_data_version(self.table_name)
+        entry = self.schema_cache.get_entry(self.table_name)
+        return entry["ddl_time"] if entry else None
+
+    def _cache_key(self, user_question: str) -> tuple:
+        return (normalize_question(user_question), self.table_name, str(self.get_data_version()))
+
+    def _invoke_sql_prompt(self, prompt: str) -> str:
+        sql_response = self.llm.invoke([HumanMessage(content=prompt)])
+        sql_query = auto_fix(clean_sql(sql_response.content))
+        logger.info(f"Generated SQL query: {sql_query}")
+        return sql_query
+
     def generate_sql(self, user_question: str) -> str:
         """Generate SQL query from natural language question."""
         try:
-            sql_messages = [HumanMessage(content=self.sql_prompt_template.format(query=user_question))]
-            sql_response = self.llm.invoke(sql_messages)
-            sql_query = sql_response.content.strip(";")
-            logger.info(f"Generated SQL query: {sql_query}")
-            return sql_query
+            return self._invoke_sql_prompt(self.sql_prompt_template.format(
+                table_name=self.table_name,
+                schema=self.get_schema_context(),
+                query=user_question
+            ))
         except Exception as e:
             logger.error(f"Error generating SQL query: {str(e)}")
             raise SQLGenerationError(f"Failed to generate SQL query: {str(e)}")
 
-    def execute_sql_with_retry(self, sql_query: str) -> Tuple[str, int]:
-        """Execute SQL query with retry logic."""
+    def fix_sql(self, sql_query: str, problems: str, user_question: Optional[str] = None) -> str:
+        """Ask the model to correct a rejected query, given the problems found."""
+        try:
+            return self._invoke_sql_prompt(self.fix_prompt_template.format(
+                table_name=self.table_name,
+                schema=self.get_schema_context(),
+                question=user_question or "(not available)",
+                sql_query=sql_query,
+                problems=problems
+            ))
+        except Exception as e:
+            logger.error(f"Failed to generate new SQL query: {str(e)}")
+            raise SQLGenerationError(f"Failed to generate new SQL query: {str(e)}")
+
+    def validate_sql(self, sql_query: str) -> Optional[str]:
+        """Validate a query before execution; returns the problems found, or None."""
+        columns = self.schema_cache.get_columns(self.table_name) if self.schema_cache else []
+        problems = validate_sql(sql_query, columns, self.table_name)
+        if not problems and self.explain_before_execute and self.engine is not None:
+            explain_error = explain_sql(self.engine, sql_query)
+            if explain_error:
+                problems.append(explain_error)
+        return "; ".join(problems) if problems else None
+
+    def run_query(self, sql_query: str) -> str:
+        """Run a query under the row limit and timeout and render a bounded result."""
+        if self.engine is None:
+            result = self.db.run(limit_rows(sql_query, self.max_rows))
+            return truncate_text(str(result), self.max_result_chars)
+        
+        columns, rows, truncated = run_bounded(
+            self.engine, sql_query, self.max_rows,
+            timeout=self.statement_timeout, fetch_size=self.fetch_size
+        )
+        if truncated:
+            logger.warning(f"SQL result truncated to {self.max_rows} rows")
+        return render_result(columns, rows, truncated, self.max_result_chars)
+
+    def execute_sql_with_retry(self, sql_query: str, user_question: Optional[str] = None,
+                               llm_calls: int = 1, return_query: bool = False):
+        """Execute SQL query with retry logic.
+
+        Each attempt is validated locally first, so most bad queries are fixed
+        without a database round trip. Fixes stop once the per-question budget
+        of `max_llm_calls` model calls (`llm_calls` already spent) or
+        `max_retries` retries is used up, or when the model repeats a query
+        that already failed.
+
+        Returns the result and the number of retries; with `return_query` also
+        the SQL that finally ran, as a third item.
+        """
         retries = 0
         last_error = None
+        failed_queries = set()
+        sql_query = auto_fix(clean_sql(sql_query))
         
-        while retries < self.max_retries:
-            try:
-                result = self.db.run(sql_query)
-                logger.info(f"SQL query executed successfully after {retries} retries")
-                return result, retries
-            except Exception as e:
-                last_error = str(e)
-                retries += 1
-                logger.warning(f"SQL execution failed (attempt {retries}): {last_error}")
-                
-                # Generate new SQL query for retry
+        while True:
+            last_error = self.validate_sql(sql_query)
+            if last_error is None:
                 try:
-                    sql_query = self.generate_sql(f"Fix this SQL query that gave error '{last_error}': {sql_query}")
-                except Exception as gen_error:
-                    logger.error(f"Failed to generate new SQL query: {str(gen_error)}")
-                    raise SQLGenerationError(f"Failed to generate new SQL query: {str(gen_error)}")
+                    result = self.run_query(sql_query)
+                    logger.info(f"SQL query executed successfully after {retries} retries")
+                    return (result, retries, sql_query) if return_query else (result, retries)
+                except Exception as e:
+                    last_error = str(e)
+                    logger.warning(f"SQL execution failed (attempt {retries + 1}): {last_error}")
+            else:
+                logger.warning(f"SQL validation failed (attempt {retries + 1}): {last_error}")
+            
+            failed_queries.add(sql_query)
+            retries += 1
+            if retries >= self.max_retries or llm_calls >= self.max_llm_calls:
+                break
+            
+            # Generate new SQL query for retry
+            sql_query = self.fix_sql(sql_query, last_error, user_question)
+            llm_calls += 1
+            if sql_query in failed_queries:
+                logger.warning("Model repeated a query that already failed; giving up")
+                break
         
-        raise MaxRetriesExceededError(f"Max retries ({self.max_retries}) exceeded. Last error: {last_error}")
+        raise MaxRetriesExceededError(
+            f"Gave up after {retries} retries ({llm_calls} model calls). Last error: {last_error}"
+        )
 
     def format_response(self, user_question: str, sql_query: str, sql_result: str) -> str:
         """Format the final response using LLM."""
@@ -93,23 +252,199 @@ Your Response:
         try:
             logger.info(f"Processing user question: {user_question}")
             
-            # Generate SQL
-            sql_query = self.generate_sql(user_question)
+            cache_key = self._cache_key(user_question) if self.query_cache is not None else None
+            cached = self.query_cache.get(cache_key) if cache_key else None
+            if cached and "formatted_response" in cached:
+                logger.info("Serving cached result for question")
+                return {
+                    "user_question": user_question,
+                    "sql_query": cached["sql_query"],
+                    "sql_result": cached["sql_result"],
+                    "formatted_response": cached["formatted_response"],
+                    "retry_count": 0,
+                    "cache_hit": True
+                }
+            
+            # Generate SQL (reusing the cached query for a repeated question)
+            if cached:
+                logger.info(f"Reusing cached SQL query: {cached['sql_query']}")
+                sql_query = cached["sql_query"]
+            else:
+                sql_query = self.generate_sql(user_question)
             
             # Execute SQL with retry
-            sql_result, retry_count = self.execute_sql_with_retry(sql_query)
+            sql_result, retry_count, sql_query = self.execute_sql_with_retry(
+                sql_query, user_question, llm_calls=0 if cached else 1, return_query=True
+            )
             
             # Format response
             formatted_response = self.format_response(user_question, sql_query, sql_result)
             
+            if cache_key:
+                entry = {"sql_query": sql_query}
+                if self.cache_results:
+                    entry["sql_result"] = sql_result
+                    entry["formatted_response"] = formatted_response
+                self.query_cache.set(cache_key, entry)
+            
+            return {
+                "user_question": user_question,
+                "sql_query": sql_query,
+                "sql_result": sql_result,
+                "formatted_response": formatted_response,
+                "retry_count": retry_count,
+                "cache_hit": cached is not None
+            }
+            
+        except Exception as e:
+            logger.error(f"Chain execution failed: {str(e)}")
+            raise
+
+    def _get_db_semaphore(self) -> asyncio.Semaphore:
+        # Semaphores are bound to the loop they are first used on
+        loop = asyncio.get_running_loop()
+        if self._db_semaphore is None or self._db_semaphore_loop is not loop:
+            self._db_semaphore = asyncio.Semaphore(self.db_concurrency)
+            self._db_semaphore_loop = loop
+        return self._db_semaphore
+
+    async def agenerate_sql(self, user_question: str) -> str:
+        """Async variant of generate_sql."""
+        try:
+            schema = await asyncio.to_thread(self.get_schema_context)
+            sql_response = await self.llm.ainvoke([HumanMessage(content=self.sql_prompt_template.format(
+                table_name=self.table_name,
+                schema=schema,
+                query=user_question
+            ))])
+            sql_query = auto_fix(clean_sql(sql_response.content))
+            logger.info(f"Generated SQL query: {sql_query}")
+            return sql_query
+        except Exception as e:
+            logger.error(f"Error generating SQL query: {str(e)}")
+            raise SQLGenerationError(f"Failed to generate SQL query: {str(e)}")
+
+    async def adecompose_question(self, user_question: str) -> List[str]:
+        """Split a multi-part question into independent sub-questions."""
+        try:
+            response = await self.llm.ainvoke([HumanMessage(content=self.decompose_prompt_template.format(
+                table_name=self.table_name,
+                question=user_question
+            ))])
+            sub_questions = json.loads(clean_sql(response.content))
+            if isinstance(sub_questions, list) and sub_questions and all(isinstance(q, str) for q in sub_questions):
+                return sub_questions
+        except Exception as e:
+            logger.warning(f"Could not decompose question, answering it as a whole: {str(e)}")
+        return [user_question]
+
+    async def aformat_response(self, user_question: str, sql_query: str, sql_result: str) -> str:
+        """Async variant of format_response."""
+        try:
+            final_response = await self.llm.ainvoke([HumanMessage(content=self.response_prompt_template.format(
+                question=user_question,
+                sql_result=sql_result,
+                sql_query=sql_query
+            ))])
+            return final_response.content
+        except Exception as e:
+            logger.error(f"Error formatting response: {str(e)}")
+            raise Exception(f"Failed to format response: {str(e)}")
+
+    async def _aanswer_sub_question(self, sub_question: str) -> dict:
+        cache_key = self._cache_key(sub_question) if self.query_cache is not None else None
+        cached = self.query_cache.get(cache_key) if cache_key else None
+        sql_query = cached["sql_query"] if cached else await self.agenerate_sql(sub_question)
+        
+        # The DB driver is synchronous: statements run on worker threads, bounded by the pool size
+        async with self._get_db_semaphore():
+            sql_result, retry_count, sql_query = await asyncio.to_thread(
+                self.execute_sql_with_retry, sql_query, sub_question, 0 if cached else 1, True
+            )
+        
+        if cache_key and not cached:
+            self.query_cache.set(cache_key, {"sql_query": sql_query})
+        return {
+            "sub_question": sub_question,
+            "sql_query": sql_query,
+            "sql_result": sql_result,
+            "retry_count": retry_count
+        }
+
+    async def arun(self, user_question: str, decompose: bool = True) -> dict:
+        """Execute the chain asynchronously.
+
+        Multi-part questions are split into independent sub-questions whose
+        queries are generated and executed concurrently; the answer is then
+        formatted once over all results.
+        """
+        try:
+            logger.info(f"Processing user question (async): {user_question}")
+            
+            cache_key = self._cache_key(user_question) if self.query_cache is not None else None
+            cached = self.query_cache.get(cache_key) if cache_key else None
+            if cached and "formatted_response" in cached:
+                return {
+                    "user_question": user_question,
+                    "sql_query": cached["sql_query"],
+                    "sql_result": cached["sql_result"],
+                    "formatted_response": cached["formatted_response"],
+                    "retry_count": 0,
+                    "cache_hit": True
+                }
+            
+            sub_questions = await self.adecompose_question(user_question) if decompose and not cached else [user_question]
+            parts = await asyncio.gather(*(self._aanswer_sub_question(q) for q in sub_questions))
+            
+            if len(parts) == 1:
+                sql_query = parts[0]["sql_query"]
+                sql_result = parts[0]["sql_result"]
+            else:
+                sql_query = ";\n".join(part["sql_query"] for part in parts)
+                sql_result = "\n\n".join(
+                    f"Sub-question: {part['sub_question']}\n{part['sql_result']}" for part in parts
+                )
+            
+            formatted_response = await self.aformat_response(user_question, sql_query, sql_result)
+            
+            if cache_key and self.cache_results:
+                self.query_cache.set(cache_key, {
+                    "sql_query": sql_query,
+                    "sql_result": sql_result,
+                    "formatted_response": formatted_response
+                })
+            
             return {
                 "user_question": user_question,
                 "sql_query": sql_query,
                 "sql_result": sql_result,
                 "formatted_response": formatted_response,
-                "retry_count": retry_count
+                "retry_count": sum(part["retry_count"] for part in parts),
+                "sub_questions": sub_questions,
+                "cache_hit": cached is not None
             }
             
         except Exception as e:
             logger.error(f"Chain execution failed: {str(e)}")
             raise
+
+    async def arun_batch(self, user_questions: List[str], concurrency: int = 4) -> List[dict]:
+        """Run many questions with at most `concurrency` in flight.
+
+        Failures are returned in place as {"user_question", "error"} so one bad
+        question does not abort the batch.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def run_one(user_question: str) -> dict:
+            async with semaphore:
+                try:
+                    return await self.arun(user_question)
+                except Exception as e:
+                    return {"user_question": user_question, "error": str(e)}
+        
+        return await asyncio.gather(*(run_one(q) for q in user_questions))
+
+    def run_batch(self, user_questions: List[str], concurrency: int = 4) -> List[dict]:
+        """Synchronous entry point for arun_batch (e.g. for regression suites)."""
+        return asyncio.run(self.arun_batch(user_questions, concurrency))
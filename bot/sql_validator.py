@@ -0,0 +1,103 @@
+import re
+from typing import Iterable, List, Optional
+
+from sqlalchemy import text
+
+# Keywords the SQL prompt tells the model to avoid, with the hint fed back on a fix
+FORBIDDEN_KEYWORDS = {
+    "LIMIT": "Oracle does not support LIMIT; use FETCH FIRST N ROWS ONLY",
+    "OFFSET": "do not use OFFSET",
+    "AUTO_INCREMENT": "use a SEQUENCE instead of AUTO_INCREMENT",
+    "BOOLEAN": "BOOLEAN is not a supported column type",
+    "DATETIME": "use DATE or TIMESTAMP instead of DATETIME",
+    "IF EXISTS": "IF EXISTS is not supported",
+    "NOW()": "use SYSTIMESTAMP instead of NOW()",
+}
+
+_STRING_LITERAL_RE = re.compile(r"'(?:[^']|'')*'")
+_QUOTED_IDENT_RE = re.compile(r'"([^"]+)"')
+_CODE_FENCE_RE = re.compile(r"^```[a-zA-Z]*\s*|\s*```$")
+_TRAILING_LIMIT_RE = re.compile(r"\s+LIMIT\s+(\d+)\s*$", re.IGNORECASE)
+_NOW_RE = re.compile(r"\bNOW\s*\(\s*\)", re.IGNORECASE)
+
+
+def clean_sql(sql_query: str) -> str:
+    """Strip markdown fences, a leading "SQL Query:" label and trailing semicolons."""
+    sql_query = _CODE_FENCE_RE.sub("", sql_query.strip())
+    sql_query = re.sub(r"^SQL Query:\s*", "", sql_query, flags=re.IGNORECASE)
+    return sql_query.strip().rstrip(";").strip()
+
+
+def auto_fix(sql_query: str) -> str:
+    """Apply rewrites that do not need a model call (trailing LIMIT, NOW())."""
+    sql_query = _TRAILING_LIMIT_RE.sub(r" FETCH FIRST \1 ROWS ONLY", sql_query)
+    return _NOW_RE.sub("SYSTIMESTAMP", sql_query)
+
+
+def _aliases(sql_without_literals: str) -> set:
+    """Quoted identifiers introduced as aliases (`AS "x"` or `) "x"`)."""
+    return set(re.findall(r'(?:\bAS|\))\s*"([^"]+)"', sql_without_literals, flags=re.IGNORECASE))
+
+
+def validate_sql(sql_query: str, columns: Iterable[str] = (), table_name: Optional[str] = None) -> List[str]:
+    """Check a generated query locally and return a list of problems.
+
+    An empty list means the query looks safe to send to the database. The
+    checks mirror the rules in the SQL prompt: a single SELECT statement,
+    balanced quotes/parentheses, no Oracle-unsupported keywords and quoted
+    column names that exist in the table.
+    """
+    problems = []
+    if not sql_query:
+        return ["The query is empty"]
+
+    if sql_query.count("'") % 2:
+        problems.append("Unbalanced single quotes")
+    stripped = _STRING_LITERAL_RE.sub("''", sql_query)
+    if stripped.count('"') % 2:
+        problems.append("Unbalanced double quotes")
+    if stripped.count("(") != stripped.count(")"):
+        problems.append("Unbalanced parentheses")
+
+    first_word = stripped.lstrip("( \n\t").split(None, 1)[0].upper() if stripped.strip() else ""
+    if first_word not in ("SELECT", "WITH"):
+        problems.append("Only a single SELECT statement is allowed")
+    if ";" in stripped:
+        problems.append("Only a single statement is allowed")
+
+    unquoted = _QUOTED_IDENT_RE.sub('""', stripped).upper()
+    for keyword, hint in FORBIDDEN_KEYWORDS.items():
+        pattern = re.escape(keyword) if keyword.endswith(")") else r"\b" + re.escape(keyword) + r"\b"
+        if re.search(pattern, unquoted):
+            problems.append(hint)
+
+    columns = list(columns)
+    if columns:
+        known = set(columns)
+        by_upper = {col.upper(): col for col in columns}
+        allowed = known | _aliases(stripped)
+        if table_name:
+            allowed |= {table_name, table_name.upper()}
+        for identifier in sorted(set(_QUOTED_IDENT_RE.findall(stripped)) - allowed):
+            suggestion = by_upper.get(identifier.upper())
+            if suggestion:
+                problems.append(f'Unknown column "{identifier}" (did you mean "{suggestion}"?)')
+            else:
+                problems.append(f'Unknown column "{identifier}"')
+
+    return problems
+
+
+def explain_sql(engine, sql_query: str) -> Optional[str]:
+    """Ask Oracle to parse the query with EXPLAIN PLAN without running it.
+
+    Returns the database error message, or None if the statement parsed.
+    """
+    with engine.connect() as conn:
+        try:
+            conn.execute(text(f"EXPLAIN PLAN FOR {sql_query}"))
+            return None
+        except Exception as e:
+            return str(e)
+        finally:
+            conn.rollback()
@@ -1,27 +1,28 @@
-import json
-import os
+import copy
+
+from src.config_store import get_config_store
 
 CONFIG_FILE = 'app_config.json'
 
+DEFAULT_CONFIG = {
+    'contributing_columns': ['Sales', 'Revenue'],
+    'top_n': 3
+}
+
 def load_config():
-    """Load configuration from JSON file"""
-    default_config = {
-        'contributing_columns': ['Sales', 'Revenue'],
-        'top_n': 3
-    }
-    
+    """Load configuration from the shared config store (no disk read once loaded)"""
     try:
-        if os.path.exists(CONFIG_FILE):
-            with open(CONFIG_FILE, 'r') as f:
-                return json.load(f)
-        return default_config
+        # Callers may edit the result before save_config, so hand out a copy of the snapshot
+        return copy.deepcopy(get_config_store(CONFIG_FILE, default=DEFAULT_CONFIG).config)
     except Exception:
-        return default_config
+        return copy.deepcopy(DEFAULT_CONFIG)
 
 def save_config(config):
-    """Save configuration to JSON file"""
+    """Save configuration with a locked, atomic write"""
     try:
-        with open(CONFIG_FILE, 'w') as f:
-            json.dump(config, f)
+        def replace(current):
+            current.clear()
+            current.update(config)
+        get_config_store(CONFIG_FILE, default=DEFAULT_CONFIG).update(replace)
     except Exception as e:
         print(f"Error saving config: {e}")
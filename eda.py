@@ -1,202 +1,751 @@
+import os
+import sys
+import pickle
+import hashlib
+import logging
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+import sqlalchemy as sa
+
+from src.utils import get_table_data_version
+
+logger = logging.getLogger(__name__)
+
+# Categorical columns report at most this many distinct values (End User can have thousands)
+MAX_CATEGORIES = int(os.getenv("EDA_MAX_CATEGORIES", "50"))
+TOP_N = 10
+# Reports are cached here, one directory per dataset hash
+EDA_CACHE_DIR = os.getenv("EDA_CACHE_DIR", ".eda_cache")
+# Reports on data with no known version are not cached; their plots are removed after this many seconds
+UNCACHED_REPORT_TTL = int(os.getenv("EDA_UNCACHED_REPORT_TTL", "3600"))
+# Processes rendering plots; 1 renders in this process
+EDA_WORKERS = int(os.getenv("EDA_WORKERS", "4"))
+PLOT_DPI = int(os.getenv("EDA_PLOT_DPI", "300"))
+
+REQUIRED_COLUMNS = ['Date', 'Region', 'Transaction Type', 'Reason Code', 'End User', 'Amount']
+# Low-cardinality dimensions aggregated together in one groupby
+DIMENSIONS = ['Date', 'Region', 'Transaction Type', 'Reason Code']
+CATEGORICAL_COLUMNS = DIMENSIONS + ['End User']
 
-def perform_comprehensive_eda(df):
+# Sampling mode: rows kept per stratum (quantiles and End User rankings come from
+# these) and rows read per chunk, which bounds memory
+SAMPLE_STRATA = ['Date', 'Transaction Type']
+SAMPLE_PER_STRATUM = int(os.getenv("EDA_SAMPLE_PER_STRATUM", "5000"))
+SAMPLE_CHUNKSIZE = int(os.getenv("EDA_SAMPLE_CHUNKSIZE", "250000"))
+# End Users tracked per ranking in sampling mode (heavy hitters; the rest are pruned)
+TOP_USERS_CAPACITY = int(os.getenv("EDA_TOP_USERS_CAPACITY", "10000"))
+
+
+def dataset_hash(df):
     """
-    Perform comprehensive Exploratory Data Analysis on the given DataFrame
-    
+    Content hash of a DataFrame (values, index, column names and dtypes)
+
     Parameters:
-    df (pandas.DataFrame): Input DataFrame with transaction data
-    
+    df (pandas.DataFrame): Input DataFrame
+
     Returns:
-    dict: A dictionary containing summary statistics and plot information
+    str: Hex digest
+    """
+    digest = hashlib.sha1()
+    digest.update(repr([(str(column), str(dtype)) for column, dtype in df.dtypes.items()]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    return digest.hexdigest()
+
+
+def _is_categorical(series):
+    return (pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)
+            or isinstance(series.dtype, pd.CategoricalDtype))
+
+
+def generate_column_summary(df, max_categories=MAX_CATEGORIES):
+    """
+    Per-column summary; categorical columns keep only their max_categories most frequent values
+
+    Parameters:
+    df (pandas.DataFrame): Input DataFrame
+    max_categories (int): Cap on values reported per categorical column
+
+    Returns:
+    dict: Column name -> summary
+    """
+    numeric = df.select_dtypes('number')
+    # One vectorised pass over every numeric column
+    stats = numeric.agg(['sum', 'mean', 'min', 'max']) if not numeric.empty else None
+
+    summary = {}
+    for column in df.columns:
+        if column in numeric.columns:
+            summary[column] = {
+                'type': 'numeric',
+                'total': stats.at['sum', column],
+                'mean': stats.at['mean', column],
+                'min': stats.at['min', column],
+                'max': stats.at['max', column]
+            }
+        elif _is_categorical(df[column]):
+            counts = df[column].value_counts(dropna=False)
+            top = counts.head(max_categories)
+            summary[column] = {
+                'type': 'categorical',
+                'distinct': int(len(counts)),
+                'unique_values': top.index.tolist(),
+                'value_counts': top.to_dict(),
+                'truncated': len(counts) > max_categories
+            }
+        else:
+            summary[column] = {
+                'type': str(df[column].dtype),
+                'min': df[column].min(),
+                'max': df[column].max()
+            }
+    return summary
+
+
+def compute_aggregations(df, max_categories=MAX_CATEGORIES, top_n=TOP_N):
+    """
+    Every aggregate the plots need. The low-cardinality dimensions are grouped once
+    into a small cube and the per-plot totals are rolled up from it; End User and
+    the quarterly amount distribution get one grouped pass each.
+
+    Parameters:
+    df (pandas.DataFrame): Transaction data with REQUIRED_COLUMNS
+    max_categories (int): Cap on reason codes plotted
+    top_n (int): End users plotted
+
+    Returns:
+    dict: Aggregated Series/DataFrames, small enough to send to plot processes
     """
-    # Set up the plot style
-    plt.style.use('seaborn')
-    plt.figure(figsize=(20, 15))
-    
-    # 1. Summary Statistics
-    def generate_column_summary(df):
-        summary = {}
-        for column in df.columns:
-            if df[column].dtype == 'object':
-                summary[column] = {
-                    'type': 'categorical',
-                    'unique_values': df[column].unique().tolist(),
-                    'value_counts': df[column].value_counts().to_dict()
-                }
-            else:
-                summary[column] = {
-                    'type': 'numeric',
-                    'total': df[column].sum(),
-                    'mean': df[column].mean(),
-                    'min': df[column].min(),
-                    'max': df[column].max()
-                }
-        return summary
-    
-    column_summary = generate_column_summary(df)
-    
-    # 2. Create subplots
-    fig, axs = plt.subplots(2, 3, figsize=(25, 15))
-    fig.suptitle('Comprehensive Transaction Analysis', fontsize=16, fontweight='bold')
-    
-    # Plot 1: Transaction Amount by Quarter and Transaction Type
-    plt1 = sns.boxplot(x='Date', y='Amount', hue='Transaction Type', 
-                       data=df, ax=axs[0, 0], palette='viridis')
-    plt1.set_title('Transaction Amount by Quarter and Type', fontsize=12)
-    plt1.set_xlabel('Quarter', fontsize=10)
-    plt1.set_ylabel('Amount ($)', fontsize=10)
-    plt1.tick_params(axis='x', rotation=45)
-    
-    # Plot 2: Total Transaction Amount by Region
-    region_totals = df.groupby('Region')['Amount'].sum().sort_values(ascending=False)
-    plt2 = region_totals.plot(kind='bar', ax=axs[0, 1], color='skyblue', edgecolor='black')
-    plt2.set_title('Total Transaction Amount by Region', fontsize=12)
-    plt2.set_xlabel('Region', fontsize=10)
-    plt2.set_ylabel('Total Amount ($)', fontsize=10)
-    plt2.tick_params(axis='x', rotation=45)
-    
-    # Plot 3: Transaction Type Distribution
-    plt3 = df['Transaction Type'].value_counts().plot(
-        kind='pie', ax=axs[0, 2], autopct='%1.1f%%', 
-        colors=['lightgreen', 'lightcoral'], 
-        wedgeprops={'edgecolor': 'black', 'linewidth': 1}
-    )
-    plt3.set_title('Distribution of Transaction Types', fontsize=12)
-    
-    # Plot 4: Reason Code Distribution
-    reason_counts = df['Reason Code'].value_counts()
-    plt4 = reason_counts.plot(
-        kind='bar', ax=axs[1, 0], 
-        color='salmon', edgecolor='black'
-    )
-    plt4.set_title('Distribution of Reason Codes', fontsize=12)
-    plt4.set_xlabel('Reason Code', fontsize=10)
-    plt4.set_ylabel('Count', fontsize=10)
-    plt4.tick_params(axis='x', rotation=45)
-    
-    # Plot 5: Heatmap of Transaction Amounts
-    pivot_data = df.pivot_table(
-        values='Amount', 
-        index='Region', 
-        columns='Transaction Type', 
-        aggfunc='sum'
-    )
-    plt5 = sns.heatmap(
-        pivot_data, 
-        ax=axs[1, 1], 
-        annot=True, 
-        fmt='.0f', 
-        cmap='YlGnBu',
-        linewidths=0.5
-    )
-    plt5.set_title('Transaction Amounts Heatmap', fontsize=12)
-    
-    # Plot 6: End User Transaction Volumes
-    top_10_users = df.groupby('End User')['Amount'].sum().nlargest(10)
-    plt6 = top_10_users.plot(
-        kind='bar', 
-        ax=axs[1, 2], 
-        color='lightblue', 
-        edgecolor='black'
-    )
-    plt6.set_title('Top 10 End Users by Transaction Volume', fontsize=12)
-    plt6.set_xlabel('End User', fontsize=10)
-    plt6.set_ylabel('Total Transaction Amount ($)', fontsize=10)
-    plt6.tick_params(axis='x', rotation=45)
-    
-    # Adjust layout and save
-    plt.tight_layout(rect=[0, 0.03, 1, 0.95])
-    plt.savefig('transaction_analysis.png', dpi=300, bbox_inches='tight')
-    
+    missing = [column for column in REQUIRED_COLUMNS if column not in df.columns]
+    if missing:
+        raise ValueError(f"EDA needs columns {missing}")
+
+    cube = (df.groupby(DIMENSIONS, observed=True, dropna=False)['Amount']
+              .agg(['sum', 'count'])
+              .reset_index())
+    end_users = df.groupby('End User', observed=True)['Amount'].agg(['sum', 'count'])
+    # count, mean, std, min, quartiles and max per box
+    amount_stats = df.groupby(['Date', 'Transaction Type'], observed=True)['Amount'].describe()
+    return _rollup(cube, end_users['sum'].nlargest(top_n), end_users['count'].nlargest(top_n), amount_stats,
+                   int(len(end_users)), max_categories)
+
+
+def _rollup(cube, top_users_amount, top_users_count, amount_stats, end_user_count, max_categories):
+    """Per-plot aggregates from the dimension cube (columns DIMENSIONS + sum, count)"""
     return {
-        'column_summary': column_summary,
-        'plots_generated': [
-            'Transaction Amount by Quarter and Type',
-            'Total Transaction Amount by Region',
-            'Transaction Type Distribution',
-            'Reason Code Distribution',
-            'Transaction Amounts Heatmap',
-            'Top 10 End Users by Transaction Volume'
-        ]
+        'cube': cube,
+        'amount_stats': amount_stats,
+        'region_totals': cube.groupby('Region')['sum'].sum().sort_values(ascending=False),
+        'type_counts': cube.groupby('Transaction Type')['count'].sum().sort_values(ascending=False),
+        'reason_counts': cube.groupby('Reason Code')['count'].sum().sort_values(ascending=False).head(max_categories),
+        'region_type_totals': cube.pivot_table(values='sum', index='Region', columns='Transaction Type',
+                                               aggfunc='sum'),
+        'trend': cube.groupby(['Date', 'Transaction Type'])['sum'].sum().unstack(),
+        'top_users_amount': top_users_amount,
+        'top_users_count': top_users_count.sort_values(),
+        'end_user_count': end_user_count
     }
 
-# Example usage (commented out)
-# df = pd.read_csv('your_data.csv')
-# eda_results = perform_comprehensive_eda(df)
-# print(eda_results['column_summary'])
 
+class HyperLogLog:
+    """
+    Approximate distinct counter in 2**precision registers (16 KB at the default
+    precision, standard error about 1.04 / sqrt(2**precision), i.e. ~0.8%)
+    """
 
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-
-# Assuming your DataFrame is named df
-# Example summary information:
-summary = {
-    'Date': df['Date'].unique(),
-    'Transaction Type': df['Transaction Type'].unique(),
-    'End User Count': df['End User'].nunique(),
-    'Region': df['Region'].unique(),
-    'Reason Code': df['Reason Code'].unique(),
-    'Total Amount': df['Amount'].sum()
+    def __init__(self, precision=14):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def update(self, values):
+        hashes = pd.util.hash_pandas_object(pd.Series(values), index=False).to_numpy(dtype=np.uint64)
+        buckets = (hashes >> np.uint64(64 - self.precision)).astype(np.int64)
+        rest = hashes & np.uint64((1 << (64 - self.precision)) - 1)
+        # Position of the leftmost 1 bit in the remaining 64 - precision bits
+        width = 64 - self.precision
+        ranks = np.full(len(rest), width + 1, dtype=np.uint8)
+        nonzero = rest > 0
+        ranks[nonzero] = width - np.floor(np.log2(rest[nonzero].astype(np.float64))).astype(np.uint8)
+        np.maximum.at(self.registers, buckets, ranks)
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def count(self):
+        m = len(self.registers)
+        estimate = 0.7213 / (1 + 1.079 / m) * m * m / np.sum(np.exp2(-self.registers.astype(np.float64)))
+        empty = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and empty:
+            # Small-range correction (linear counting)
+            estimate = m * np.log(m / empty)
+        return int(round(estimate))
+
+
+class StratifiedSample:
+    """
+    Uniform sample of at most per_stratum rows from every stratum, built chunk by
+    chunk (bottom-k on a random key), with the stratum sizes seen so far
+    """
+
+    def __init__(self, strata=SAMPLE_STRATA, per_stratum=SAMPLE_PER_STRATUM, seed=0):
+        self.strata = list(strata)
+        self.per_stratum = per_stratum
+        self.rng = np.random.default_rng(seed)
+        self.sample = None
+        self.sizes = None
+
+    def update(self, chunk):
+        chunk = chunk.assign(_key=self.rng.random(len(chunk)))
+        sizes = chunk.groupby(self.strata, observed=True, dropna=False).size()
+        self.sizes = sizes if self.sizes is None else self.sizes.add(sizes, fill_value=0)
+        combined = chunk if self.sample is None else pd.concat([self.sample, chunk], ignore_index=True)
+        self.sample = (combined.sort_values('_key', kind='stable')
+                               .groupby(self.strata, observed=True, dropna=False)
+                               .head(self.per_stratum))
+
+    def frame(self):
+        """The sampled rows, without the sampling key"""
+        return self.sample.drop(columns='_key')
+
+
+def compute_aggregations_sampled(chunks, max_categories=MAX_CATEGORIES, top_n=TOP_N,
+                                 per_stratum=SAMPLE_PER_STRATUM, scale=1.0, seed=0):
+    """
+    Approximate aggregations over data read in chunks, in memory bounded by the
+    chunk size and the sample, not the table.
+
+    The dimension cube and the Amount totals are exact over every row read;
+    distinct counts come from a HyperLogLog per categorical column; the End User
+    rankings keep only the TOP_USERS_CAPACITY heaviest users between chunks; the
+    quartiles come from a stratified sample of per_stratum rows per
+    (Date, Transaction Type).
+
+    Parameters:
+    chunks (iterable): DataFrames with REQUIRED_COLUMNS
+    max_categories (int): Cap on values reported per categorical column
+    top_n (int): End users plotted
+    per_stratum (int): Sampled rows per stratum
+    scale (float): Multiplier for sums and counts when the chunks are themselves
+        a sample of the table (e.g. 100 / sample_percent)
+    seed (int): Sampling seed, so reruns are reproducible
+
+    Returns:
+    tuple: (column_summary, aggregations) shaped like the exact mode's, with
+        aggregations['approximate'] set
+    """
+    cube_parts, sketches = [], {column: HyperLogLog() for column in CATEGORICAL_COLUMNS}
+    sample = StratifiedSample(per_stratum=per_stratum, seed=seed)
+    amount = {'sum': 0.0, 'count': 0, 'min': np.inf, 'max': -np.inf}
+    users_amount = users_count = pd.Series(dtype='float64')
+    rows = 0
+    for chunk in chunks:
+        missing = [column for column in REQUIRED_COLUMNS if column not in chunk.columns]
+        if missing:
+            raise ValueError(f"EDA needs columns {missing}")
+        if chunk.empty:
+            continue
+        rows += len(chunk)
+        cube_parts.append(chunk.groupby(DIMENSIONS, observed=True, dropna=False)['Amount'].agg(['sum', 'count']))
+        # Partial cubes are re-reduced as they pile up so they stay small
+        if len(cube_parts) > 16:
+            cube_parts = [pd.concat(cube_parts).groupby(level=DIMENSIONS, dropna=False).sum()]
+        for column, sketch in sketches.items():
+            sketch.update(chunk[column])
+        amount['sum'] += chunk['Amount'].sum()
+        amount['count'] += int(chunk['Amount'].count())
+        amount['min'] = min(amount['min'], chunk['Amount'].min())
+        amount['max'] = max(amount['max'], chunk['Amount'].max())
+        sample.update(chunk[REQUIRED_COLUMNS])
+        users = chunk.groupby('End User', observed=True)['Amount'].agg(['sum', 'count'])
+        users_amount = users_amount.add(users['sum'], fill_value=0).nlargest(TOP_USERS_CAPACITY)
+        users_count = users_count.add(users['count'], fill_value=0).nlargest(TOP_USERS_CAPACITY)
+    if not rows:
+        raise ValueError("EDA needs at least one row")
+
+    cube = pd.concat(cube_parts).groupby(level=DIMENSIONS, dropna=False).sum().reset_index()
+    cube[['sum', 'count']] = cube[['sum', 'count']] * scale
+    sampled = sample.frame()
+    amount_stats = sampled.groupby(['Date', 'Transaction Type'], observed=True)['Amount'].describe()
+    # describe() counts sampled rows; report the stratum sizes instead
+    amount_stats['count'] = sample.sizes.reindex(amount_stats.index).to_numpy() * scale
+
+    distinct = {column: sketch.count() for column, sketch in sketches.items()}
+
+    aggregations = _rollup(cube, users_amount.nlargest(top_n).mul(scale).rename('sum'),
+                           users_count.nlargest(top_n).mul(scale).rename('count'), amount_stats,
+                           distinct['End User'], max_categories)
+    aggregations['approximate'] = True
+    column_summary = _summary_from_cube(cube, distinct, users_count.mul(scale), amount, scale, max_categories)
+    return column_summary, aggregations
+
+
+def _summary_from_cube(cube, distinct, end_user_counts, amount, scale, max_categories):
+    """Column summary without the rows: dimension counts from the cube, End User from the tracked heavy hitters"""
+    summary = {}
+    for column in CATEGORICAL_COLUMNS:
+        if column == 'End User':
+            counts = end_user_counts
+        else:
+            counts = cube.groupby(column, dropna=False)['count'].sum()
+        counts = counts.sort_values(ascending=False).round().astype('int64')
+        top = counts.head(max_categories)
+        summary[column] = {
+            'type': 'categorical',
+            'distinct': int(distinct[column]),
+            'unique_values': top.index.tolist(),
+            'value_counts': top.to_dict(),
+            'truncated': distinct[column] > len(top),
+            'approximate': True
+        }
+    summary['Amount'] = {
+        'type': 'numeric',
+        'total': amount['sum'] * scale,
+        'mean': amount['sum'] / amount['count'] if amount['count'] else np.nan,
+        'min': amount['min'],
+        'max': amount['max']
+    }
+    return summary
+
+
+def _db_columns(columns_mapping):
+    """Logical EDA column -> sa.column on the table (columns are created unquoted, i.e. upper case)"""
+    columns_mapping = columns_mapping or {}
+    return {column: sa.column(columns_mapping.get(column, column.upper().replace(' ', '_')))
+            for column in REQUIRED_COLUMNS}
+
+
+def _quantile(dialect, q, amount):
+    if dialect == 'oracle':
+        return sa.func.approx_percentile(q).within_group(amount)
+    if dialect == 'postgresql':
+        return sa.func.percentile_cont(q).within_group(amount)
+    return None
+
+
+def compute_aggregations_sql(engine, table_name, columns_mapping=None, max_categories=MAX_CATEGORIES,
+                             top_n=TOP_N):
+    """
+    Aggregations computed by the database, so only aggregated rows are fetched.
+
+    Distinct counts use APPROX_COUNT_DISTINCT and quartiles APPROX_PERCENTILE on
+    Oracle; other databases fall back to COUNT(DISTINCT) and PERCENTILE_CONT, or
+    skip the box plot when they have no percentile function.
+
+    Parameters:
+    engine: SQLAlchemy engine
+    table_name (str): Transaction table
+    columns_mapping (dict, optional): Logical column (REQUIRED_COLUMNS) -> database column
+    max_categories (int): Cap on values reported per categorical column
+    top_n (int): End users plotted
+
+    Returns:
+    tuple: (column_summary, aggregations)
+    """
+    dialect = engine.dialect.name
+    columns = _db_columns(columns_mapping)
+    table = sa.table(table_name, *columns.values())
+    amount = columns['Amount']
+    dimensions = [columns[column].label(column) for column in DIMENSIONS]
+
+    cube_query = (sa.select(*dimensions, sa.func.sum(amount).label('sum'), sa.func.count(amount).label('count'))
+                  .select_from(table)
+                  .group_by(*[columns[column] for column in DIMENSIONS]))
+
+    def top_users(order_by):
+        return (sa.select(columns['End User'].label('End User'), sa.func.sum(amount).label('sum'),
+                          sa.func.count(amount).label('count'))
+                .select_from(table)
+                .group_by(columns['End User'])
+                .order_by(order_by.desc())
+                .limit(top_n))
+
+    count_distinct = (sa.func.approx_count_distinct if dialect == 'oracle'
+                      else lambda column: sa.func.count(sa.distinct(column)))
+    distinct_query = sa.select(*[count_distinct(columns[column]).label(column.replace(' ', '_'))
+                                 for column in CATEGORICAL_COLUMNS]).select_from(table)
+    totals_query = sa.select(sa.func.sum(amount).label('sum'), sa.func.count(amount).label('count'),
+                             sa.func.min(amount).label('min'), sa.func.max(amount).label('max')).select_from(table)
+
+    quantiles = [_quantile(dialect, q, amount) for q in (0.25, 0.5, 0.75)]
+    stats_query = None
+    if all(quantile is not None for quantile in quantiles):
+        stats_query = (sa.select(columns['Date'].label('Date'), columns['Transaction Type'].label('Transaction Type'),
+                                 sa.func.count(amount).label('count'), sa.func.avg(amount).label('mean'),
+                                 sa.func.min(amount).label('min'),
+                                 *[quantile.label(f"q{int(q * 100)}") for q, quantile in zip((0.25, 0.5, 0.75), quantiles)],
+                                 sa.func.max(amount).label('max'))
+                       .select_from(table)
+                       .group_by(columns['Date'], columns['Transaction Type']))
+
+    with engine.connect() as conn:
+        cube = pd.read_sql(cube_query, conn)
+        by_amount = pd.read_sql(top_users(sa.func.sum(amount)), conn).set_index('End User')
+        by_count = pd.read_sql(top_users(sa.func.count(amount)), conn).set_index('End User')
+        distinct_row = conn.execute(distinct_query).one()
+        totals = conn.execute(totals_query).one()
+        amount_stats = None
+        if stats_query is not None:
+            amount_stats = (pd.read_sql(stats_query, conn)
+                              .rename(columns={'q25': '25%', 'q50': '50%', 'q75': '75%'})
+                              .set_index(['Date', 'Transaction Type'])
+                              .sort_index())
+        else:
+            logger.info(f"No percentile function on {dialect}; skipping the amount box plot")
+
+    distinct = {column: int(distinct_row._mapping[column.replace(' ', '_')]) for column in CATEGORICAL_COLUMNS}
+    aggregations = _rollup(cube, by_amount['sum'], by_count['count'], amount_stats,
+                           distinct['End User'], max_categories)
+    aggregations['approximate'] = dialect == 'oracle'
+
+    amount_totals = {'sum': totals.sum or 0, 'count': totals.count, 'min': totals.min, 'max': totals.max}
+    # End User frequencies: the top_n by count is all that was fetched
+    summary = _summary_from_cube(cube, distinct, by_count['count'], amount_totals, 1.0, max_categories)
+    for column in CATEGORICAL_COLUMNS:
+        summary[column]['approximate'] = aggregations['approximate']
+    return summary, aggregations
+
+
+def _sample_chunks(engine, table_name, columns_mapping, sample_percent, chunksize):
+    """Transaction rows streamed in chunks with the logical column names, optionally from an Oracle SAMPLE"""
+    columns = _db_columns(columns_mapping)
+    if sample_percent:
+        if engine.dialect.name != 'oracle':
+            raise ValueError("sample_percent needs Oracle's SAMPLE clause")
+        # SAMPLE has no SQLAlchemy construct; identifiers are quoted by the dialect
+        quote = engine.dialect.identifier_preparer.quote
+        select_list = ', '.join(f"{quote(columns[column].name)} AS {quote(column)}" for column in REQUIRED_COLUMNS)
+        query = sa.text(f"SELECT {select_list} FROM {quote(table_name)} SAMPLE ({float(sample_percent)})")
+    else:
+        table = sa.table(table_name, *columns.values())
+        query = sa.select(*[columns[column].label(column) for column in REQUIRED_COLUMNS]).select_from(table)
+    with engine.connect().execution_options(stream_results=True) as conn:
+        yield from pd.read_sql(query, conn, chunksize=chunksize)
+
+
+def perform_eda_from_db(engine, table_name, columns_mapping=None, mode='sql', cache_dir=EDA_CACHE_DIR,
+                        max_categories=MAX_CATEGORIES, workers=EDA_WORKERS, dpi=PLOT_DPI, use_cache=True,
+                        per_stratum=SAMPLE_PER_STRATUM, sample_percent=None, chunksize=SAMPLE_CHUNKSIZE):
+    """
+    EDA on a database table without loading it into memory
+
+    Parameters:
+    engine: SQLAlchemy engine
+    table_name (str): Transaction table
+    columns_mapping (dict, optional): Logical column (REQUIRED_COLUMNS) -> database column
+    mode (str): 'sql' aggregates in the database; 'sample' streams rows in chunks
+        (see compute_aggregations_sampled)
+    cache_dir, max_categories, workers, dpi, use_cache: As for perform_comprehensive_eda;
+        reports are cached by the table's data version, and not at all when it is unknown
+    per_stratum (int): Sampled rows per stratum in 'sample' mode
+    sample_percent (float, optional): Read only this percentage of the table's rows
+        in 'sample' mode (Oracle only); sums and counts are scaled back up
+    chunksize (int): Rows per chunk in 'sample' mode
+
+    Returns:
+    dict: The report, as from perform_comprehensive_eda
+    """
+    if mode not in ('sql', 'sample'):
+        raise ValueError(f"Unknown EDA mode {mode}")
+    version = get_table_data_version(engine, table_name)
+    key = None
+    if version is not None:
+        key = _report_key(engine.url.render_as_string(hide_password=True), table_name, version,
+                          sorted((columns_mapping or {}).items()), mode, max_categories, dpi,
+                          per_stratum, sample_percent)
+
+    def analyse():
+        if mode == 'sql':
+            return compute_aggregations_sql(engine, table_name, columns_mapping, max_categories)
+        chunks = _sample_chunks(engine, table_name, columns_mapping, sample_percent, chunksize)
+        scale = 100.0 / sample_percent if sample_percent else 1.0
+        return compute_aggregations_sampled(chunks, max_categories, per_stratum=per_stratum, scale=scale)
+
+    return _build_report(key, cache_dir, use_cache, analyse, workers, dpi)
+
+
+# Plot renderers run in worker processes: module-level, taking only aggregated data
+
+def _plot_amount_box(ax, stats):
+    """Box plot per quarter and transaction type drawn from precomputed quartiles"""
+    import matplotlib.pyplot as plt
+    dates = list(dict.fromkeys(stats.index.get_level_values(0)))
+    types = list(dict.fromkeys(stats.index.get_level_values(1)))
+    width = 0.8 / max(len(types), 1)
+    colors = plt.get_cmap('viridis')([i / max(len(types) - 1, 1) for i in range(len(types))])
+    for position, transaction_type in enumerate(types):
+        boxes, positions = [], []
+        for date_position, date in enumerate(dates):
+            if (date, transaction_type) not in stats.index:
+                continue
+            row = stats.loc[(date, transaction_type)]
+            iqr = row['75%'] - row['25%']
+            boxes.append({
+                'med': row['50%'], 'q1': row['25%'], 'q3': row['75%'],
+                # Tukey whiskers, clipped to the observed range
+                'whislo': max(row['min'], row['25%'] - 1.5 * iqr),
+                'whishi': min(row['max'], row['75%'] + 1.5 * iqr),
+                'fliers': [], 'label': str(date)
+            })
+            positions.append(date_position - 0.4 + width * (position + 0.5))
+        if boxes:
+            artists = ax.bxp(boxes, positions=positions, widths=width * 0.9, patch_artist=True, showfliers=False)
+            for box in artists['boxes']:
+                box.set_facecolor(colors[position])
+            artists['boxes'][0].set_label(str(transaction_type))
+    ax.set_xticks(range(len(dates)))
+    ax.set_xticklabels([str(date) for date in dates])
+    ax.set_xlabel('Quarter', fontsize=10)
+    ax.set_ylabel('Amount ($)', fontsize=10)
+    ax.tick_params(axis='x', rotation=45)
+    ax.legend(title='Transaction Type')
+
+
+def _plot_bar(ax, series, color='skyblue', xlabel=None, ylabel=None, horizontal=False):
+    series.plot(kind='barh' if horizontal else 'bar', ax=ax, color=color, edgecolor='black')
+    ax.set_xlabel(xlabel or '', fontsize=10)
+    ax.set_ylabel(ylabel or '', fontsize=10)
+    if not horizontal:
+        ax.tick_params(axis='x', rotation=45)
+
+
+def _plot_pie(ax, series):
+    series.plot(kind='pie', ax=ax, autopct='%1.1f%%', colors=['lightgreen', 'lightcoral'],
+                wedgeprops={'edgecolor': 'black', 'linewidth': 1})
+    ax.set_ylabel('')
+
+
+def _plot_heatmap(ax, pivot):
+    import seaborn as sns
+    sns.heatmap(pivot, ax=ax, annot=True, fmt='.0f', cmap='YlGnBu', linewidths=0.5)
+
+
+def _plot_trend(ax, trend):
+    trend.plot(ax=ax, marker='o')
+    ax.set_xlabel('Quarter', fontsize=10)
+    ax.set_ylabel('Total Amount ($)', fontsize=10)
+    ax.tick_params(axis='x', rotation=45)
+
+
+PLOTTERS = {
+    'box': _plot_amount_box,
+    'bar': _plot_bar,
+    'pie': _plot_pie,
+    'heatmap': _plot_heatmap,
+    'trend': _plot_trend,
 }
-print("Summary Information:")
-print(summary)
-
-# Create a figure with multiple subplots
-fig, axes = plt.subplots(3, 2, figsize=(16, 18))
-plt.subplots_adjust(hspace=0.4, wspace=0.3)
-
-# Plot 1: Transaction Type Count
-sns.countplot(data=df, x='Transaction Type', palette='Set2', ax=axes[0, 0])
-axes[0, 0].set_title('Transaction Type Frequency', fontsize=14)
-axes[0, 0].set_xlabel('Transaction Type', fontsize=12)
-axes[0, 0].set_ylabel('Count', fontsize=12)
-
-# Plot 2: Amount Distribution by Quarter
-sns.boxplot(data=df, x='Date', y='Amount', palette='Set3', ax=axes[0, 1])
-axes[0, 1].set_title('Amount Distribution per Quarter', fontsize=14)
-axes[0, 1].set_xlabel('Quarter', fontsize=12)
-axes[0, 1].set_ylabel('Amount ($)', fontsize=12)
-
-# Plot 3: Total Amount by Region
-# First aggregate the data
-region_amount = df.groupby('Region')['Amount'].sum().reset_index()
-sns.barplot(data=region_amount, x='Region', y='Amount', palette='viridis', ax=axes[1, 0])
-axes[1, 0].set_title('Total Amount by Region', fontsize=14)
-axes[1, 0].set_xlabel('Region', fontsize=12)
-axes[1, 0].set_ylabel('Total Amount ($)', fontsize=12)
-for p in axes[1, 0].patches:
-    height = p.get_height()
-    axes[1, 0].annotate(f'{height:,.0f}', (p.get_x() + p.get_width() / 2, height),
-                        ha='center', va='bottom', fontsize=10)
-
-# Plot 4: Reason Code Frequency
-sns.countplot(data=df, x='Reason Code', palette='pastel', ax=axes[1, 1])
-axes[1, 1].set_title('Reason Code Frequency', fontsize=14)
-axes[1, 1].set_xlabel('Reason Code', fontsize=12)
-axes[1, 1].set_ylabel('Count', fontsize=12)
-axes[1, 1].tick_params(axis='x', rotation=45)
-
-# Plot 5: Trend Over Time by Transaction Type
-# Aggregate total amount by Date and Transaction Type
-trend = df.groupby(['Date', 'Transaction Type'])['Amount'].sum().reset_index()
-sns.lineplot(data=trend, x='Date', y='Amount', hue='Transaction Type', marker='o', ax=axes[2, 0])
-axes[2, 0].set_title('Total Amount Trend by Transaction Type', fontsize=14)
-axes[2, 0].set_xlabel('Quarter', fontsize=12)
-axes[2, 0].set_ylabel('Total Amount ($)', fontsize=12)
-axes[2, 0].tick_params(axis='x', rotation=45)
-
-# Plot 6: (Optional) Distribution of End Users (if needed)
-# Here we show the count of transactions per End User (top 10 for clarity)
-top_end_users = df['End User'].value_counts().nlargest(10).index
-sns.countplot(data=df[df['End User'].isin(top_end_users)], y='End User', palette='coolwarm', ax=axes[2, 1])
-axes[2, 1].set_title('Top 10 End Users by Transaction Count', fontsize=14)
-axes[2, 1].set_xlabel('Count', fontsize=12)
-axes[2, 1].set_ylabel('End User', fontsize=12)
-
-plt.tight_layout()
-plt.show()
\ No newline at end of file
+
+
+def build_plot_specs(aggregations):
+    """(file name, title, plotter, data, options) for every plot whose data is available"""
+    specs = [
+        ('amount_by_quarter_type.png', 'Transaction Amount by Quarter and Type', 'box',
+         aggregations['amount_stats'], {}),
+        ('region_totals.png', 'Total Transaction Amount by Region', 'bar',
+         aggregations['region_totals'], {'xlabel': 'Region', 'ylabel': 'Total Amount ($)'}),
+        ('transaction_types.png', 'Distribution of Transaction Types', 'pie',
+         aggregations['type_counts'], {}),
+        ('reason_codes.png', 'Distribution of Reason Codes', 'bar',
+         aggregations['reason_counts'], {'color': 'salmon', 'xlabel': 'Reason Code', 'ylabel': 'Count'}),
+        ('region_type_heatmap.png', 'Transaction Amounts Heatmap', 'heatmap',
+         aggregations['region_type_totals'], {}),
+        ('top_end_users_amount.png', f'Top {TOP_N} End Users by Transaction Volume', 'bar',
+         aggregations['top_users_amount'],
+         {'color': 'lightblue', 'xlabel': 'End User', 'ylabel': 'Total Transaction Amount ($)'}),
+        ('amount_trend.png', 'Total Amount Trend by Transaction Type', 'trend',
+         aggregations['trend'], {}),
+        ('top_end_users_count.png', f'Top {TOP_N} End Users by Transaction Count', 'bar',
+         aggregations['top_users_count'],
+         {'color': 'lightcoral', 'xlabel': 'Count', 'ylabel': 'End User', 'horizontal': True}),
+    ]
+    # e.g. amount_stats on databases without percentile functions
+    return [spec for spec in specs if spec[3] is not None]
+
+
+def render_plot(path, title, kind, data, options, dpi=PLOT_DPI):
+    """Render one plot to a PNG file; runs in a worker process"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(10, 7))
+    try:
+        PLOTTERS[kind](ax, data, **options)
+        ax.set_title(title, fontsize=12)
+        fig.tight_layout()
+        fig.savefig(path, dpi=dpi, bbox_inches='tight')
+    finally:
+        plt.close(fig)
+    return path
+
+
+def render_plots(specs, output_dir, dpi=PLOT_DPI, workers=EDA_WORKERS):
+    """
+    Render every plot, in parallel processes when workers > 1
+
+    Returns:
+    dict: Plot title -> PNG path
+    """
+    jobs = [(os.path.join(output_dir, file_name), title, kind, data, options)
+            for file_name, title, kind, data, options in specs]
+    if workers <= 1:
+        paths = [render_plot(*job, dpi=dpi) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+            futures = [executor.submit(render_plot, *job, dpi=dpi) for job in jobs]
+            paths = [future.result() for future in futures]
+    return {title: path for (_, title, _, _, _), path in zip(jobs, paths)}
+
+
+def _report_key(*parts):
+    return hashlib.sha1('|'.join(str(part) for part in (*parts, TOP_N)).encode()).hexdigest()
+
+
+def _load_report(report_dir):
+    path = os.path.join(report_dir, 'report.pkl')
+    try:
+        with open(path, 'rb') as f:
+            report = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable EDA cache {path}: {str(e)}")
+        return None
+    # Plots deleted by hand invalidate the entry
+    if not all(os.path.exists(path) for path in report['plot_files'].values()):
+        return None
+    return report
+
+
+def _save_report(report_dir, report):
+    # Temp file + rename so concurrent readers never see a partial pickle
+    fd, temp_path = tempfile.mkstemp(dir=report_dir, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(report, f)
+        os.replace(temp_path, os.path.join(report_dir, 'report.pkl'))
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def _prune_uncached_reports(cache_dir, max_age=UNCACHED_REPORT_TTL):
+    """Remove uncached report directories older than max_age seconds"""
+    cutoff = time.time() - max_age
+    try:
+        entries = list(os.scandir(cache_dir))
+    except FileNotFoundError:
+        return
+    for entry in entries:
+        if not (entry.name.startswith('uncached-') and entry.is_dir()):
+            continue
+        try:
+            if entry.stat().st_mtime < cutoff:
+                shutil.rmtree(entry.path)
+        except OSError as e:
+            # Another run may be removing it too
+            logger.warning(f"Could not remove stale EDA report {entry.path}: {str(e)}")
+
+
+def _build_report(key, cache_dir, use_cache, analyse, workers, dpi):
+    """
+    Cached report: analyse() -> (column_summary, aggregations) runs only on a cache
+    miss (or always when key is None), then the plots are rendered
+    """
+    if key is None:
+        # Unversioned data: a fresh directory per run so concurrent runs don't collide.
+        # The caller reads the plots after we return, so earlier runs' directories are
+        # removed once they are stale rather than this one at exit
+        os.makedirs(cache_dir, exist_ok=True)
+        _prune_uncached_reports(cache_dir)
+        report_dir = tempfile.mkdtemp(dir=cache_dir, prefix='uncached-')
+    else:
+        report_dir = os.path.join(cache_dir, key)
+        if use_cache:
+            cached = _load_report(report_dir)
+            if cached is not None:
+                logger.info(f"Using cached EDA report {report_dir}")
+                return cached
+        os.makedirs(report_dir, exist_ok=True)
+
+    column_summary, aggregations = analyse()
+    specs = build_plot_specs(aggregations)
+    plot_files = render_plots(specs, report_dir, dpi=dpi, workers=workers)
+
+    report = {
+        'dataset_hash': key,
+        'column_summary': column_summary,
+        'aggregations': aggregations,
+        'approximate': aggregations.get('approximate', False),
+        'plots_generated': [title for _, title, _, _, _ in specs],
+        'plot_files': plot_files
+    }
+    if key is not None:
+        _save_report(report_dir, report)
+    return report
+
+
+def perform_comprehensive_eda(df, cache_dir=EDA_CACHE_DIR, max_categories=MAX_CATEGORIES,
+                              workers=EDA_WORKERS, dpi=PLOT_DPI, use_cache=True, sample_per_stratum=None):
+    """
+    Perform comprehensive Exploratory Data Analysis on the given DataFrame
+
+    The report is cached under cache_dir keyed by a hash of the data, so running
+    it again on unchanged data returns immediately without re-rendering plots.
+
+    Parameters:
+    df (pandas.DataFrame): Input DataFrame with transaction data
+    cache_dir (str): Directory for cached reports and plot PNGs
+    max_categories (int): Cap on values reported per categorical column
+    workers (int): Processes rendering plots
+    dpi (int): PNG resolution
+    use_cache (bool): Reuse a cached report for the same data
+    sample_per_stratum (int, optional): Use the approximate sampling mode
+        (see compute_aggregations_sampled) with this many rows per stratum
+
+    Returns:
+    dict: A dictionary containing summary statistics and plot information
+    """
+    key = _report_key(dataset_hash(df), max_categories, dpi, sample_per_stratum)
+
+    def analyse():
+        if sample_per_stratum:
+            chunks = (df.iloc[start:start + SAMPLE_CHUNKSIZE] for start in range(0, len(df), SAMPLE_CHUNKSIZE))
+            return compute_aggregations_sampled(chunks, max_categories, per_stratum=sample_per_stratum)
+        return generate_column_summary(df, max_categories), compute_aggregations(df, max_categories)
+
+    return _build_report(key, cache_dir, use_cache, analyse, workers, dpi)
+
+
+def print_eda_summary(df, max_categories=MAX_CATEGORIES):
+    """
+    Print a short overview of transaction data (distinct values capped at max_categories)
+
+    Parameters:
+    df (pandas.DataFrame): Input DataFrame with transaction data
+    max_categories (int): Cap on values printed per column
+    """
+    summary = {
+        'Date': df['Date'].drop_duplicates().head(max_categories).tolist(),
+        'Transaction Type': df['Transaction Type'].drop_duplicates().head(max_categories).tolist(),
+        'End User Count': df['End User'].nunique(),
+        'Region': df['Region'].drop_duplicates().head(max_categories).tolist(),
+        'Reason Code': df['Reason Code'].drop_duplicates().head(max_categories).tolist(),
+        'Total Amount': df['Amount'].sum()
+    }
+    print("Summary Information:")
+    print(summary)
+
+
+if __name__ == "__main__":
+    # Example usage: python eda.py your_data.csv
+    logging.basicConfig(level=logging.INFO)
+    data = pd.read_csv(sys.argv[1])
+    print_eda_summary(data)
+    eda_results = perform_comprehensive_eda(data)
+    for title, path in eda_results['plot_files'].items():
+        print(f"{title}: {path}")
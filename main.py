@@ -2,9 +2,11 @@ import os
 import argparse
 import logging
 from dotenv import load_dotenv
-from src.utils import read_config, get_excel_files, get_file_config_by_path, ensure_directory_exists
+from src.utils import read_config, get_excel_files, get_file_config_by_path, ensure_directory_exists, flush_data_versions
 from src.processing import process_excel_file
 from src.db_operations import create_engine, load_dataframe_to_db
+from src.staging import STAGING_DB, connect_staging, stage_and_load
+from src.tracing import span, configure_tracing
 
 # Configure logging
 logging.basicConfig(
@@ -22,8 +24,28 @@ def main():
     parser.add_argument("--config", default="config/config.yaml", help="Path to config file")
     parser.add_argument("--data-dir", default="data", help="Directory containing Excel files")
     parser.add_argument("--env-file", default=".env", help="Path to .env file with database credentials")
+    parser.add_argument("--trace-file", default=None, help="Append OTLP-style JSON spans to this file")
+    parser.add_argument("--staging", nargs="?", const=STAGING_DB, default=None, metavar="DUCKDB_FILE",
+                        help=f"Stage files in a local DuckDB database (default {STAGING_DB}) and stream "
+                             "them to the database in batches, for files larger than memory")
     args = parser.parse_args()
     
+    if args.trace_file:
+        configure_tracing(otlp_file=args.trace_file)
+    
+    with span("ingestion", data_dir=args.data_dir):
+        run_ingestion(args)
+
+def run_ingestion(args):
+    """
+    Load every configured Excel file in the data directory into the database.
+    
+    Args:
+        args (Namespace): Parsed command line arguments
+        
+    Returns:
+        None
+    """
     try:
         # Ensure directories exist
         ensure_directory_exists(args.data_dir)
@@ -37,13 +59,15 @@ def main():
             logger.warning(f"Environment file {args.env_file} not found. Using system environment variables.")
         
         # Read configuration
-        config = read_config(args.config)
+        with span("read_config"):
+            config = read_config(args.config)
         
         # Get database configuration
         db_config = config.get('database', {})
         
         # Create database engine
-        engine = create_engine(db_config)
+        with span("create_engine"):
+            engine = create_engine(db_config)
         
         # Get all Excel files in the data directory
         excel_files = get_excel_files(args.data_dir)
@@ -52,6 +76,11 @@ def main():
             logger.warning(f"No Excel files found in {args.data_dir}")
             return
         
+        # Local DuckDB staging database, kept after the run for offline analysis
+        staging_conn = connect_staging(args.staging) if args.staging else None
+        if staging_conn is not None:
+            logger.info(f"Staging files in {args.staging}")
+        
         # Process and load each Excel file
         for file_path in excel_files:
             logger.info(f"Processing file: {file_path}")
@@ -64,19 +93,29 @@ def main():
                 continue
             
             try:
+                if staging_conn is not None:
+                    with span("stage_and_load", file_path=file_path) as stage_span:
+                        rows = stage_and_load(staging_conn, file_config, file_path, engine)
+                        stage_span.set_attribute("rows", rows)
+                    logger.info(f"Successfully staged and loaded {file_path} into {file_config.get('table_name')}")
+                    continue
+                
                 # Process the Excel file
-                df = process_excel_file(file_config, file_path)
+                with span("process_excel_file", file_path=file_path) as process_span:
+                    df = process_excel_file(file_config, file_path)
+                    process_span.set_attribute("rows", len(df))
                 
                 # Load the processed data into the database
                 table_name = file_config.get('table_name')
                 dtype_dict = file_config.get('dtype_dict', {})
                 
-                load_dataframe_to_db(
-                    df=df,
-                    table_name=table_name,
-                    engine=engine,
-                    dtypes_dict=dtype_dict
-                )
+                with span("load_dataframe_to_db", table_name=table_name):
+                    load_dataframe_to_db(
+                        df=df,
+                        table_name=table_name,
+                        engine=engine,
+                        dtypes_dict=dtype_dict
+                    )
                 
                 logger.info(f"Successfully processed and loaded {file_path} into {table_name}")
                 
@@ -85,6 +124,12 @@ def main():
                 # Continue with next file instead of stopping
                 continue
         
+        if staging_conn is not None:
+            staging_conn.close()
+        
+        # Apps cache by table data version; make the new DML visible to it now
+        flush_data_versions(engine)
+        
         logger.info("Excel-to-Database loading process completed")
         
     except Exception as e:
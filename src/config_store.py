@@ -0,0 +1,277 @@
+import os
+import copy
+import json
+import logging
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Set
+
+import yaml
+
+from src.utils import build_file_config_index, find_file_config_key, get_file_config_by_table
+
+try:
+    import fcntl
+except ImportError:  # Windows: only the in-process lock applies
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+def _load(path: str) -> Dict[str, Any]:
+    with open(path, 'r') as f:
+        if path.endswith('.json'):
+            return json.load(f) or {}
+        return yaml.safe_load(f) or {}
+
+
+def _dump(data: Dict[str, Any], f, path: str) -> None:
+    if path.endswith('.json'):
+        json.dump(data, f, indent=2)
+    else:
+        yaml.dump(data, f, default_flow_style=False, sort_keys=False)
+
+
+def changed_file_keys(old: Dict[str, Any], new: Dict[str, Any]) -> Set[str]:
+    """Keys of `excel_files` that were added, removed or modified between two configs."""
+    old_files = old.get('excel_files') or {}
+    new_files = new.get('excel_files') or {}
+    return {key for key in set(old_files) | set(new_files) if old_files.get(key) != new_files.get(key)}
+
+
+class ConfigStore:
+    """
+    In-memory view of a YAML (or JSON) config file shared by every thread.
+
+    Reads return the current snapshot without touching disk; the snapshot is
+    replaced atomically whenever the file changes, either through `update`
+    or because another process edited it (picked up by a polling watcher).
+    Writes hold a lock file, go to a temp file and are renamed into place,
+    so readers never see a half-written config.
+
+    Snapshots are shared: treat them as read-only and change config through
+    `update` / `update_file_config`.
+    """
+
+    def __init__(self, path: str, default: Optional[Dict[str, Any]] = None, watch_interval: float = 2.0):
+        self.path = path
+        self.default = default
+        self.watch_interval = watch_interval
+        self._lock = threading.RLock()
+        self._listeners: List[Callable[[Set[str]], None]] = []
+        # lookup name -> (excel_files key or None, file config)
+        self._file_cache: Dict[str, tuple] = {}
+        self._watcher = None
+        self._stop = threading.Event()
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self._snapshot, self._stamp = self._read()
+        self._index = build_file_config_index(self._snapshot)
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+            return stat.st_mtime_ns, stat.st_size
+        except FileNotFoundError:
+            return None
+
+    def _read(self):
+        stamp = self._stat()
+        if stamp is None:
+            if self.default is None:
+                raise FileNotFoundError(self.path)
+            return copy.deepcopy(self.default), None
+        return _load(self.path), stamp
+
+    @property
+    def config(self) -> Dict[str, Any]:
+        """The current config snapshot."""
+        return self._snapshot
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._snapshot.get(key, default)
+
+    def add_listener(self, callback: Callable[[Set[str]], None]) -> None:
+        """
+        Register a callback invoked after every snapshot swap.
+
+        Args:
+            callback (callable): Receives the set of `excel_files` keys that changed
+
+        Returns:
+            None
+        """
+        self._listeners.append(callback)
+
+    def _swap(self, new_config: Dict[str, Any], stamp) -> None:
+        with self._lock:
+            changed = changed_file_keys(self._snapshot, new_config)
+            self._snapshot, self._stamp = new_config, stamp
+            self._index = build_file_config_index(new_config)
+            self.version += 1
+            # Per-file invalidation: drop lookups that resolved to a changed entry, and
+            # misses, since an added entry may now match them
+            for name, (file_key, _) in list(self._file_cache.items()):
+                if file_key is None or file_key in changed:
+                    del self._file_cache[name]
+        for callback in self._listeners:
+            try:
+                callback(changed)
+            except Exception as e:
+                logger.warning(f"Config listener failed: {str(e)}")
+
+    def get_file_config(self, file_path: str) -> Optional[Dict[str, Any]]:
+        """
+        Configuration for an Excel file, memoised per file name until that entry changes.
+
+        Args:
+            file_path (str): File name or path
+
+        Returns:
+            dict: Configuration for the file or None if not found
+        """
+        cached = self._file_cache.get(file_path)
+        if cached is not None:
+            self.hits += 1
+            return cached[1]
+        with self._lock:
+            self.misses += 1
+            snapshot = self._snapshot
+            file_key = find_file_config_key(snapshot, file_path, self._index)
+            file_config = snapshot['excel_files'][file_key] if file_key is not None else None
+            self._file_cache[file_path] = (file_key, file_config)
+        if file_config is None:
+            logger.warning(f"No configuration found for file {file_path}")
+        return file_config
+
+    def get_file_config_by_table(self, table_name: str) -> Optional[Dict[str, Any]]:
+        """Configuration of the Excel file loaded into `table_name` (case-insensitive)."""
+        return get_file_config_by_table(self._snapshot, table_name, self._index)
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Re-read the file if it changed on disk.
+
+        Args:
+            force (bool): Re-read even if the modification stamp is unchanged
+
+        Returns:
+            bool: True if a new snapshot was loaded
+        """
+        stamp = self._stat()
+        if not force and stamp == self._stamp:
+            return False
+        try:
+            new_config, stamp = self._read()
+        except Exception as e:
+            # Keep serving the last good snapshot (e.g. caught mid-edit by a text editor)
+            logger.warning(f"Could not reload {self.path}: {str(e)}")
+            return False
+        self._swap(new_config, stamp)
+        logger.info(f"Reloaded configuration from {self.path}")
+        return True
+
+    @contextmanager
+    def _file_lock(self):
+        if fcntl is None:
+            yield
+            return
+        with open(self.path + '.lock', 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def update(self, mutator: Callable[[Dict[str, Any]], None]) -> Dict[str, Any]:
+        """
+        Apply `mutator` to a copy of the latest config on disk and write it back atomically.
+
+        Args:
+            mutator (callable): Function that edits the config dict in place
+
+        Returns:
+            dict: The new snapshot
+        """
+        with self._lock, self._file_lock():
+            # Start from disk, not the snapshot, so edits made by other processes aren't lost
+            new_config, stamp = self._read()
+            mutator(new_config)
+
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.config-', suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    _dump(new_config, f, self.path)
+                    f.flush()
+                    os.fsync(f.fileno())
+                if stamp is not None:
+                    # mkstemp creates the file 0600; keep the original permissions
+                    os.chmod(temp_path, os.stat(self.path).st_mode & 0o777)
+                os.replace(temp_path, self.path)
+            except Exception:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+            self._swap(new_config, self._stat())
+        logger.info(f"Updated configuration in {self.path}")
+        return new_config
+
+    def update_file_config(self, file_key: str, **fields) -> Dict[str, Any]:
+        """
+        Set fields on one `excel_files` entry, creating it if needed.
+
+        Args:
+            file_key (str): Key under `excel_files`
+            **fields: Values to set, e.g. contributing_columns=[...], top_n=5
+
+        Returns:
+            dict: The new snapshot
+        """
+        def mutate(config):
+            config.setdefault('excel_files', {}).setdefault(file_key, {}).update(fields)
+        return self.update(mutate)
+
+    def start_watching(self) -> None:
+        """Poll the file's modification stamp in a daemon thread and reload on change."""
+        # A watcher started before a fork isn't running in the child, so check liveness
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+
+        def watch():
+            while not self._stop.wait(self.watch_interval):
+                self.reload()
+
+        self._watcher = threading.Thread(target=watch, name="config-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        self._stop.set()
+
+
+_stores: Dict[str, ConfigStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_config_store(path: str, default: Optional[Dict[str, Any]] = None, watch: bool = True) -> ConfigStore:
+    """
+    Process-wide ConfigStore for a path (created and watched on first use).
+
+    Args:
+        path (str): Config file path
+        default (dict, optional): Config to use while the file doesn't exist
+        watch (bool): Start the reload watcher
+
+    Returns:
+        ConfigStore: Shared store
+    """
+    key = os.path.abspath(path)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = ConfigStore(path, default=default)
+            if watch:
+                store.start_watching()
+        return store
@@ -0,0 +1,37 @@
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# (connect, read) seconds; LLM-backed endpoints (commentary, chatbot, PPT) can take a while
+DEFAULT_TIMEOUT = (5, 120)
+
+
+def build_session(retries: int = 3, backoff_factor: float = 0.5, pool_maxsize: int = 10) -> requests.Session:
+    """
+    Create a keep-alive session that retries idempotent requests.
+
+    GET/HEAD/OPTIONS are retried with exponential backoff on connection errors
+    and 502/503/504; POSTs (LLM calls, config writes) are never replayed. Shared
+    by the frontend API clients so they keep one retry policy.
+
+    Args:
+        retries (int): Retries per request
+        backoff_factor (float): Exponential backoff factor between retries
+        pool_maxsize (int): Connections kept alive per host
+
+    Returns:
+        requests.Session: Session with the retrying adapter mounted
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset(['GET', 'HEAD', 'OPTIONS']),
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(max_retries=retry, pool_connections=pool_maxsize, pool_maxsize=pool_maxsize)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update({'Accept-Encoding': 'gzip, deflate'})
+    return session
@@ -0,0 +1,346 @@
+import os
+import json
+import time
+import uuid
+import pickle
+import sqlite3
+import socket
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from src.tracing import span
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+PENDING_STATES = (QUEUED, RUNNING)
+FINISHED_STATES = (SUCCEEDED, FAILED)
+
+HOSTNAME = socket.gethostname()
+
+
+def job_key(kind: str, *args, **kwargs) -> str:
+    """
+    Deduplication key for a job: identical kind and arguments give the same key.
+
+    Args:
+        kind (str): Job type, e.g. "commentary"
+        *args, **kwargs: The job's arguments (must be JSON-serialisable)
+
+    Returns:
+        str: Hex digest
+    """
+    payload = json.dumps([kind, args, kwargs], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+class MemoryJobStore:
+    """Job records held in this process (enough for a single worker process)."""
+
+    def __init__(self):
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def create(self, job: Dict[str, Any], stale_before: float = 0.0) -> Dict[str, Any]:
+        """Insert the job unless an identical one is pending; return whichever job wins."""
+        with self._lock:
+            if job['dedup_key']:
+                for existing in self._jobs.values():
+                    if (existing['dedup_key'] == job['dedup_key'] and existing['status'] in PENDING_STATES
+                            and existing['created_at'] >= stale_before):
+                        return dict(existing)
+            self._jobs[job['id']] = dict(job)
+            return dict(job)
+
+    def update(self, job_id: str, **fields) -> None:
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def purge(self, finished_before: float) -> None:
+        with self._lock:
+            for job_id in [job_id for job_id, job in self._jobs.items()
+                           if job['status'] in FINISHED_STATES and job['finished_at'] < finished_before]:
+                del self._jobs[job_id]
+
+    def fail_pending(self, owner_matches: Callable[[Optional[str]], bool], error: str) -> int:
+        """Mark pending jobs whose owner matches as failed; return how many were."""
+        now = time.time()
+        with self._lock:
+            jobs = [job for job in self._jobs.values()
+                    if job['status'] in PENDING_STATES and owner_matches(job.get('owner'))]
+            for job in jobs:
+                job.update(status=FAILED, error=error, finished_at=now)
+        return len(jobs)
+
+
+class SQLiteJobStore:
+    """
+    Job records in a SQLite file, so any gunicorn worker can answer a poll for a
+    job another worker is running, and deduplication spans processes.
+    """
+
+    COLUMNS = ('id', 'kind', 'dedup_key', 'status', 'result', 'error', 'created_at', 'started_at', 'finished_at',
+               'owner')
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        # Not kept: connections must not be shared with processes forked after this
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY, kind TEXT, dedup_key TEXT, status TEXT,
+                    result BLOB, error TEXT, created_at REAL, started_at REAL, finished_at REAL,
+                    owner TEXT
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_dedup ON jobs (dedup_key, status)")
+            try:
+                # Job files created before owners were recorded
+                conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+            except sqlite3.OperationalError:
+                pass
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _row_to_job(self, row) -> Dict[str, Any]:
+        job = dict(zip(self.COLUMNS, row))
+        job['result'] = pickle.loads(job['result']) if job['result'] is not None else None
+        return job
+
+    def create(self, job: Dict[str, Any], stale_before: float = 0.0) -> Dict[str, Any]:
+        conn = self._connect()
+        # BEGIN IMMEDIATE takes the write lock so two processes can't both insert the same pending job
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if job['dedup_key']:
+                row = conn.execute(
+                    f"SELECT {', '.join(self.COLUMNS)} FROM jobs "
+                    f"WHERE dedup_key = ? AND status IN (?, ?) AND created_at >= ?",
+                    (job['dedup_key'], *PENDING_STATES, stale_before)
+                ).fetchone()
+                if row is not None:
+                    conn.execute("COMMIT")
+                    return self._row_to_job(row)
+            conn.execute(
+                f"INSERT INTO jobs ({', '.join(self.COLUMNS)}) VALUES ({', '.join('?' * len(self.COLUMNS))})",
+                tuple(job[column] if column != 'result' else None for column in self.COLUMNS)
+            )
+            conn.execute("COMMIT")
+            return dict(job)
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def update(self, job_id: str, **fields) -> None:
+        if 'result' in fields:
+            fields['result'] = pickle.dumps(fields['result']) if fields['result'] is not None else None
+        assignments = ', '.join(f"{column} = ?" for column in fields)
+        self._connect().execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connect().execute(
+            f"SELECT {', '.join(self.COLUMNS)} FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def purge(self, finished_before: float) -> None:
+        self._connect().execute(
+            "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?", (*FINISHED_STATES, finished_before)
+        )
+
+    def fail_pending(self, owner_matches: Callable[[Optional[str]], bool], error: str) -> int:
+        conn = self._connect()
+        rows = conn.execute("SELECT id, owner FROM jobs WHERE status IN (?, ?)", PENDING_STATES).fetchall()
+        job_ids = [job_id for job_id, owner in rows if owner_matches(owner)]
+        now = time.time()
+        for job_id in job_ids:
+            # Only if still pending: the job may have finished in the meantime
+            conn.execute("UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ? AND status IN (?, ?)",
+                         (FAILED, error, now, job_id, *PENDING_STATES))
+        return len(job_ids)
+
+
+class JobQueue:
+    """
+    Runs slow operations (LLM calls, PPT export, bulk DB work) on a local worker
+    pool so request threads can return a job id immediately.
+
+    Submitting a job identical to one still queued or running returns the
+    existing job instead of starting another. Pending jobs older than
+    `stale_after` seconds are not reused.
+
+    Each job records the process running it. Jobs left pending by a process
+    that exits (e.g. a gunicorn worker recycled by max_requests) are marked
+    failed, by the process itself on shutdown or, if it was killed, by
+    recover_orphans in the next worker on the same host.
+    """
+
+    def __init__(self, workers: int = 4, store=None, retention: float = 3600.0, stale_after: float = 900.0):
+        self.workers = workers
+        self.store = store or MemoryJobStore()
+        self.retention = retention
+        self.stale_after = stale_after
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def owner(self) -> str:
+        # Read on use: with gunicorn's preload_app the queue is built in the master before forking
+        return f"{HOSTNAME}:{os.getpid()}"
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Created on first use so a gunicorn master can import this before forking
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job")
+        return self._executor
+
+    def submit(self, kind: str, func: Callable, *args, dedup: bool = True, **kwargs) -> Dict[str, Any]:
+        """
+        Queue func(*args, **kwargs).
+
+        Args:
+            kind (str): Job type, recorded with the job and used in its span name
+            func (callable): Work to run; its return value becomes the job result
+            dedup (bool): Reuse an identical pending job instead of queueing another
+
+        Returns:
+            dict: The job record (check `id`; it may be an existing job)
+        """
+        now = time.time()
+        job = {
+            'id': uuid.uuid4().hex,
+            'kind': kind,
+            'dedup_key': job_key(kind, *args, **kwargs) if dedup else None,
+            'status': QUEUED,
+            'result': None,
+            'error': None,
+            'created_at': now,
+            'started_at': None,
+            'finished_at': None,
+            'owner': self.owner,
+        }
+        created = self.store.create(job, stale_before=now - self.stale_after)
+        if created['id'] != job['id']:
+            logger.info(f"Reusing pending {kind} job {created['id']}")
+            return created
+        self.store.purge(now - self.retention)
+        self._get_executor().submit(self._run, job['id'], kind, func, args, kwargs)
+        logger.info(f"Queued {kind} job {job['id']}")
+        return created
+
+    def _run(self, job_id: str, kind: str, func: Callable, args, kwargs) -> None:
+        self.store.update(job_id, status=RUNNING, started_at=time.time())
+        try:
+            with span(f"job.{kind}", job_id=job_id):
+                result = func(*args, **kwargs)
+            self.store.update(job_id, status=SUCCEEDED, result=result, finished_at=time.time())
+        except Exception as e:
+            logger.error(f"{kind} job {job_id} failed: {str(e)}")
+            self.store.update(job_id, status=FAILED, error=str(e), finished_at=time.time())
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.store.get(job_id)
+
+    def stream(self, job_id: str, poll_interval: float = 0.5, timeout: float = 25.0) -> Iterator[Dict[str, Any]]:
+        """
+        Yield the job record each time its status changes, ending once it finishes.
+
+        Args:
+            job_id (str): Job to follow
+            poll_interval (float): Seconds between status checks
+            timeout (float): Stop following after this many seconds (keep it short: a
+                server thread is held meanwhile, and clients reconnect)
+
+        Returns:
+            Iterator[dict]: Job records
+        """
+        deadline = time.monotonic() + timeout
+        last_status = None
+        while time.monotonic() < deadline:
+            job = self.store.get(job_id)
+            if job is None:
+                return
+            if job['status'] != last_status:
+                last_status = job['status']
+                yield job
+            if job['status'] in FINISHED_STATES:
+                return
+            time.sleep(poll_interval)
+
+    def recover_orphans(self) -> int:
+        """Fail pending jobs whose process on this host no longer exists; call on worker start."""
+        count = self.store.fail_pending(lambda owner: not _owner_alive(owner), "Worker exited before the job finished")
+        if count:
+            logger.warning(f"Marked {count} orphaned jobs failed")
+        return count
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=not wait)
+        owner = self.owner
+        # Whatever hasn't finished now dies with this process
+        count = self.store.fail_pending(lambda job_owner: job_owner == owner, "Worker exited before the job finished")
+        if count:
+            logger.warning(f"Marked {count} unfinished jobs failed on shutdown")
+
+
+def _owner_alive(owner: Optional[str]) -> bool:
+    """Whether the process that owns a job may still be running (unknown owners count as alive)."""
+    if not owner or ':' not in owner:
+        return True
+    host, pid = owner.rsplit(':', 1)
+    if host != HOSTNAME or not pid.isdigit():
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def create_job_queue(workers: Optional[int] = None, db_path: Optional[str] = None) -> JobQueue:
+    """
+    Build a JobQueue from arguments or the JOB_WORKERS / JOB_DB_PATH environment variables.
+
+    With a database path, job records live in SQLite and are shared across processes;
+    otherwise they stay in memory, which only works with a single worker process
+    (gunicorn.conf.py sets a default path).
+    """
+    workers = workers or int(os.getenv('JOB_WORKERS', '4'))
+    db_path = db_path or os.getenv('JOB_DB_PATH')
+    store = SQLiteJobStore(db_path) if db_path else MemoryJobStore()
+    return JobQueue(workers=workers, store=store)
+
+
+def public_job(job: Dict[str, Any], include_result: bool = True) -> Dict[str, Any]:
+    """Job record as returned by the API (binary results are fetched separately)."""
+    fields = {key: job[key] for key in ('id', 'kind', 'status', 'error', 'created_at', 'started_at', 'finished_at')}
+    if include_result and job['status'] == SUCCEEDED and not isinstance(job['result'], (bytes, bytearray)):
+        fields['result'] = job['result']
+    return fields
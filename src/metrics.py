@@ -0,0 +1,191 @@
+import math
+import os
+import threading
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labelnames: Sequence[str], labelvalues: Sequence, extra: Optional[Dict[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        pairs.extend(f'{name}="{_escape(value)}"' for name, value in extra.items())
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value))
+
+
+class _Metric:
+    metric_type = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple:
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def _samples(self):
+        raise NotImplementedError
+
+    def render(self, const_labels: Optional[Dict[str, str]] = None) -> str:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.metric_type}']
+        for suffix, labelvalues, extra, value in self._samples():
+            if const_labels:
+                extra = {**const_labels, **(extra or {})}
+            lines.append(f'{self.name}{suffix}{_format_labels(self.labelnames, labelvalues, extra)} {_format_value(value)}')
+        return '\n'.join(lines)
+
+
+class Counter(_Metric):
+    metric_type = 'counter'
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _samples(self):
+        with self._lock:
+            return [('_total', key, None, value) for key, value in self._values.items()]
+
+
+class Gauge(_Metric):
+    metric_type = 'gauge'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._function: Optional[Callable] = None
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable) -> None:
+        """Compute the gauge at scrape time. The function returns a number, or a
+        dict mapping label-value tuples to numbers for labelled gauges."""
+        self._function = function
+
+    def _samples(self):
+        if self._function is not None:
+            value = self._function()
+            if isinstance(value, dict):
+                return [('', key, None, v) for key, v in value.items()]
+            return [] if value is None else [('', (), None, value)]
+        with self._lock:
+            return [('', key, None, value) for key, value in self._values.items()]
+
+
+class Histogram(_Metric):
+    metric_type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state['counts'][i] += 1
+            state['sum'] += value
+            state['count'] += 1
+
+    def _samples(self):
+        samples = []
+        with self._lock:
+            for key, state in self._values.items():
+                for bound, count in zip(self.buckets, state['counts']):
+                    samples.append(('_bucket', key, {'le': _format_value(bound)}, count))
+                samples.append(('_sum', key, None, state['sum']))
+                samples.append(('_count', key, None, state['count']))
+        return samples
+
+
+class MetricsRegistry:
+    """
+    Holds metrics and renders them in the Prometheus text exposition format.
+
+    Values live in this process only. Under a pre-forking server (gunicorn with
+    several workers) every worker has its own registry and a scrape returns the
+    values of whichever worker answered it; they are not aggregated. Set
+    process_label so each worker's series carry its pid and don't overwrite each
+    other, then sum over the label in queries (e.g. sum without (worker) (rate(...))).
+    A recycled worker's series stop and the new worker's start from zero.
+    """
+
+    def __init__(self, process_label: Optional[str] = None):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+        self.process_label = process_label
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        # Read at scrape time: with preload_app the registry is created before the fork
+        const_labels = {self.process_label: str(os.getpid())} if self.process_label else None
+        return '\n'.join(metric.render(const_labels) for metric in metrics) + '\n'
+
+
+# Per-process; see MetricsRegistry
+REGISTRY = MetricsRegistry(process_label=os.getenv("METRICS_PROCESS_LABEL", "worker") or None)
+
+CONTENT_TYPE_LATEST = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def estimate_tokens(text) -> int:
+    """
+    Rough token count (~4 characters per token) for LLM calls that don't report usage.
+    Empty text counts as no tokens, any other text as at least one. Also used by the
+    chatbot benchmark's fake LLM, so its counts match the production metric.
+
+    Args:
+        text (str): Prompt or completion text
+
+    Returns:
+        int: Estimated token count
+    """
+    text = str(text or '')
+    return max(1, len(text) // 4) if text else 0
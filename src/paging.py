@@ -0,0 +1,114 @@
+import logging
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+# Sort key for the frame's index (row labels), which has no column name
+INDEX_KEY = '__index__'
+
+
+class RowWindow(NamedTuple):
+    frame: pd.DataFrame
+    total: int
+    filtered: int
+    start: int
+
+
+def filter_frame(df: pd.DataFrame, search: Optional[str] = None) -> pd.DataFrame:
+    """
+    Rows whose index or any column contains `search` (case-insensitive, plain substring).
+
+    Args:
+        df (pandas.DataFrame): Frame to filter
+        search (str, optional): Text to look for; empty keeps every row
+
+    Returns:
+        pandas.DataFrame: Matching rows
+    """
+    if not search:
+        return df
+    mask = pd.Series(df.index.astype(str), index=df.index).str.contains(search, case=False, regex=False)
+    for column in df.columns:
+        mask |= df[column].astype(str).str.contains(search, case=False, regex=False)
+    return df[mask.to_numpy()]
+
+
+def sort_frame(df: pd.DataFrame, sort_by: Optional[str] = None, ascending: bool = True) -> pd.DataFrame:
+    """
+    Sort by a column, or by the row labels when `sort_by` is INDEX_KEY or the index name.
+
+    Unknown columns leave the frame in its original order. The sort is stable and
+    puts missing values last.
+    """
+    if sort_by is None or sort_by == '':
+        return df
+    if sort_by in df.columns:
+        return df.sort_values(sort_by, ascending=ascending, kind='mergesort', na_position='last')
+    if sort_by == INDEX_KEY or sort_by == df.index.name:
+        return df.sort_index(ascending=ascending, kind='mergesort', na_position='last')
+    logger.warning(f"Ignoring sort on unknown column {sort_by}")
+    return df
+
+
+def window(df: pd.DataFrame, start: int = 0, length: int = DEFAULT_PAGE_SIZE, sort_by: Optional[str] = None,
+           ascending: bool = True, search: Optional[str] = None) -> RowWindow:
+    """
+    One page of a frame after filtering and sorting, so only that page is sent to the browser.
+
+    Args:
+        df (pandas.DataFrame): Full frame
+        start (int): Offset of the first row in the filtered, sorted frame
+        length (int): Rows to return, capped at MAX_PAGE_SIZE (<= 0 means the cap)
+        sort_by (str, optional): Column to sort by, or INDEX_KEY
+        ascending (bool): Sort direction
+        search (str, optional): Filter text, see filter_frame
+
+    Returns:
+        RowWindow: (frame, total rows, rows after filtering, start)
+    """
+    start = max(0, int(start))
+    # DataTables sends length=-1 for "all"; the cap still applies
+    length = MAX_PAGE_SIZE if int(length) <= 0 else min(int(length), MAX_PAGE_SIZE)
+    filtered = sort_frame(filter_frame(df, search), sort_by, ascending)
+    return RowWindow(filtered.iloc[start:start + length], len(df), len(filtered), start)
+
+
+def _int_arg(args: Mapping[str, Any], name: str, default: int) -> int:
+    try:
+        return int(args.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def parse_window_args(args: Mapping[str, Any], columns: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Keyword arguments for `window` from request query parameters.
+
+    Accepts plain parameters (start, length, sort, order=asc|desc, search) and the
+    DataTables server-side parameters (order[0][column], search[value]); DataTables
+    sorts by column position, resolved against `columns`.
+
+    Args:
+        args (Mapping): e.g. flask.request.args
+        columns (list, optional): Column names in display order
+
+    Returns:
+        dict: start, length, sort_by, ascending and search
+    """
+    sort_by = args.get('sort')
+    order = args.get('order', 'asc')
+    if 'order[0][column]' in args and columns:
+        position = _int_arg(args, 'order[0][column]', -1)
+        sort_by = columns[position] if 0 <= position < len(columns) else None
+        order = args.get('order[0][dir]', 'asc')
+    return {
+        'start': _int_arg(args, 'start', 0),
+        'length': _int_arg(args, 'length', DEFAULT_PAGE_SIZE),
+        'sort_by': sort_by,
+        'ascending': str(order).lower() != 'desc',
+        'search': args.get('search[value]', args.get('search')) or None,
+    }
@@ -79,6 +79,9 @@ def basic_processing(df, file_config):
     
     return df
 
+# SQL equivalents of the functions below, used by --staging, live in
+# src.staging.SQL_RULES; keep the two in step.
+
 def process_sales_data(df, file_config):
     """
     Process sales data with specific requirements.
@@ -0,0 +1,342 @@
+"""Out-of-core ingestion through a local DuckDB staging database.
+
+Workbooks are streamed into DuckDB in row batches (schema ``raw``), the
+``columns_mapping`` and the file's processing function are applied as SQL
+(schema ``main``, one table per target table), and the result is streamed to the
+target database in Arrow record batches. Memory stays bounded by the batch size,
+and the staging file can be queried afterwards for offline analysis:
+
+    duckdb data/staging.duckdb "SELECT count(*) FROM SALES_DATA"
+
+The SQL rules mirror the pandas functions in src.processing; files whose
+processing function has no SQL rule get basic processing only.
+"""
+import os
+import re
+import logging
+from datetime import datetime
+from itertools import chain, islice
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+import sqlalchemy as sa
+
+from src.db_operations import create_table_from_dataframe
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+logger = logging.getLogger(__name__)
+
+STAGING_DB = os.getenv("STAGING_DB", "data/staging.duckdb")
+# Rows per batch read from a workbook and per Arrow batch sent to the target database
+STAGING_BATCH_ROWS = int(os.getenv("STAGING_BATCH_ROWS", "50000"))
+RAW_SCHEMA = 'raw'
+
+
+def staging_available() -> bool:
+    return duckdb is not None
+
+
+def connect_staging(path: str = STAGING_DB):
+    """
+    Open (or create) the staging database file.
+
+    Args:
+        path (str): DuckDB file path
+
+    Returns:
+        duckdb.DuckDBPyConnection: Connection with the raw schema created
+    """
+    if duckdb is None:
+        raise ImportError("DuckDB staging needs the duckdb package (pip install duckdb)")
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = duckdb.connect(path)
+    conn.execute(f"CREATE SCHEMA IF NOT EXISTS {RAW_SCHEMA}")
+    return conn
+
+
+def quote(name: str) -> str:
+    """DuckDB identifier, e.g. an Excel header with spaces"""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _literal(value: str) -> str:
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _iter_sheet_batches(path: str, sheet_name: Any, batch_rows: int):
+    """
+    DataFrames of at most batch_rows rows from one worksheet, read in streaming mode.
+    Every cell is text (or None), so no batch's types depend on what the others held.
+    """
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        worksheet = workbook.worksheets[sheet_name] if isinstance(sheet_name, int) else workbook[sheet_name]
+        rows = worksheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(name) if name is not None else f"Unnamed: {position}" for position, name in enumerate(header)]
+        while True:
+            batch = list(islice(rows, batch_rows))
+            if not batch:
+                break
+            frame = pd.DataFrame(batch, columns=columns, dtype=object)
+            yield frame.map(lambda value: None if value is None else str(value))
+    finally:
+        workbook.close()
+
+
+def stage_workbook(conn, file_config: Dict[str, Any], file_path: Optional[str] = None,
+                   batch_rows: int = STAGING_BATCH_ROWS) -> str:
+    """
+    Stream a workbook sheet into raw.<table_name>, replacing any previous copy.
+
+    Only the mapped columns are kept when the file has a columns_mapping. Every raw
+    column is VARCHAR; build_processing_query casts them to their target types.
+
+    Args:
+        conn: Staging connection
+        file_config (dict): Configuration for the specific Excel file
+        file_path (str, optional): Override the file path in config
+        batch_rows (int): Rows read per batch
+
+    Returns:
+        str: Qualified raw table name
+    """
+    path = file_path if file_path else file_config['file_path']
+    sheet_name = file_config.get('sheet_name', 0)
+    raw_table = f"{RAW_SCHEMA}.{quote(file_config['table_name'])}"
+    required_cols = file_config.get('required_columns', [])
+    mapped_cols = list(file_config.get('columns_mapping', {}).keys())
+
+    logger.info(f"Staging Excel file: {path}, sheet: {sheet_name}")
+    rows = 0
+    conn.execute(f"DROP TABLE IF EXISTS {raw_table}")
+    for batch in _iter_sheet_batches(path, sheet_name, batch_rows):
+        if rows == 0:
+            missing_cols = [col for col in required_cols + mapped_cols if col not in batch.columns]
+            if missing_cols:
+                raise ValueError(f"Missing required columns in {path}: {missing_cols}")
+        if mapped_cols:
+            batch = batch[mapped_cols]
+        conn.register('excel_batch', batch)
+        try:
+            if rows == 0:
+                conn.execute(f"CREATE TABLE {raw_table} "
+                             f"({', '.join(f'{quote(col)} VARCHAR' for col in batch.columns)})")
+            conn.execute(f"INSERT INTO {raw_table} BY NAME SELECT * FROM excel_batch")
+        finally:
+            conn.unregister('excel_batch')
+        rows += len(batch)
+
+    if rows == 0:
+        raise ValueError(f"No rows found in {path}, sheet: {sheet_name}")
+    logger.info(f"Staged {rows} rows from {path}")
+    return raw_table
+
+
+def _staging_type(oracle_type: str) -> Optional[str]:
+    """DuckDB type for a dtype_dict (Oracle) column type, or None to keep the text"""
+    oracle_type = oracle_type.strip().upper()
+    base = re.match(r'\w+', oracle_type)
+    base = base.group(0) if base else ''
+    if base in ('NUMBER', 'NUMERIC', 'DECIMAL', 'FLOAT', 'BINARY_FLOAT', 'BINARY_DOUBLE'):
+        return 'DOUBLE'
+    if base in ('INTEGER', 'INT', 'SMALLINT'):
+        return 'BIGINT'
+    if base in ('DATE', 'TIMESTAMP'):
+        return 'TIMESTAMP'
+    return None
+
+
+# SQL versions of the processing functions in src.processing. Each takes the
+# output columns (after columns_mapping) and returns {column: expression}:
+# existing columns are replaced in place, new ones appended. Expressions see the
+# mapped columns as they are after basic processing, which may still be text when
+# dtype_dict has no type for them, so numbers and dates are cast here too.
+
+def _sales_rules(columns: List[str]) -> Dict[str, str]:
+    rules = {}
+    if 'sale_date' in columns:
+        rules['sale_date'] = "TRY_CAST(sale_date AS TIMESTAMP)"
+    # Computed before missing quantities/prices are filled, as in process_sales_data
+    if 'quantity' in columns and 'unit_price' in columns:
+        rules['total_amount'] = "TRY_CAST(quantity AS DOUBLE) * TRY_CAST(unit_price AS DOUBLE)"
+    for col in ('quantity', 'unit_price'):
+        if col in columns:
+            rules[col] = f"COALESCE(TRY_CAST({col} AS DOUBLE), 0)"
+    for col in ('product_id', 'customer_id'):
+        if col in columns:
+            rules[col] = f"CAST({col} AS VARCHAR)"
+    return rules
+
+
+def _inventory_rules(columns: List[str]) -> Dict[str, str]:
+    rules = {}
+    if 'product_id' in columns:
+        rules['product_id'] = "CAST(product_id AS VARCHAR)"
+    filled = {}
+    for col in ('quantity_in_stock', 'reorder_point', 'unit_cost'):
+        if col in columns:
+            filled[col] = f"COALESCE(TRY_CAST({col} AS DOUBLE), 0)"
+            rules[col] = filled[col]
+    if 'quantity_in_stock' in columns and 'unit_cost' in columns:
+        rules['stock_value'] = f"{filled['quantity_in_stock']} * {filled['unit_cost']}"
+    if 'quantity_in_stock' in columns and 'reorder_point' in columns:
+        rules['needs_reorder'] = (f"CASE WHEN {filled['quantity_in_stock']} <= {filled['reorder_point']} "
+                                  "THEN 'Yes' ELSE 'No' END")
+    return rules
+
+
+CUSTOMER_STATUS_MAPPING = {
+    'ACTV': 'ACTIVE',
+    'ACT': 'ACTIVE',
+    'A': 'ACTIVE',
+    'INACT': 'INACTIVE',
+    'INACTIVE': 'INACTIVE',
+    'I': 'INACTIVE',
+    'NEW': 'NEW',
+    'N': 'NEW'
+}
+
+
+def _customer_rules(columns: List[str]) -> Dict[str, str]:
+    rules = {}
+    if 'customer_id' in columns:
+        rules['customer_id'] = "CAST(customer_id AS VARCHAR)"
+    if 'email' in columns:
+        rules['email'] = "lower(trim(email))"
+    if 'phone' in columns:
+        rules['phone'] = r"regexp_replace(phone, '[^\d+]', '', 'g')"
+    if 'status' in columns:
+        cases = ' '.join(f"WHEN {_literal(raw)} THEN {_literal(standard)}"
+                         for raw, standard in CUSTOMER_STATUS_MAPPING.items())
+        rules['status'] = f"CASE upper(trim(status)) {cases} ELSE upper(trim(status)) END"
+    rules['created_at'] = f"TIMESTAMP {_literal(datetime.now().isoformat(sep=' '))}"
+    return rules
+
+
+SQL_RULES: Dict[str, Callable[[List[str]], Dict[str, str]]] = {
+    'process_sales_data': _sales_rules,
+    'process_inventory_data': _inventory_rules,
+    'process_customer_data': _customer_rules,
+}
+
+
+def build_processing_query(raw_table: str, raw_columns: List[str], file_config: Dict[str, Any]) -> str:
+    """
+    SELECT applying columns_mapping, dropping all-empty rows and the file's SQL rules.
+
+    The raw columns are text; each mapped column is cast (TRY_CAST, so unparseable
+    cells become NULL) to the DuckDB equivalent of its dtype_dict type, and columns
+    without one stay VARCHAR.
+
+    Args:
+        raw_table (str): Qualified raw table
+        raw_columns (list): Columns of the raw table, in order
+        file_config (dict): Configuration for the specific Excel file
+
+    Returns:
+        str: DuckDB query producing the rows to load
+    """
+    columns_mapping = file_config.get('columns_mapping', {})
+    source = list(columns_mapping.keys()) if columns_mapping else raw_columns
+    mapped = [(col, columns_mapping.get(col, col)) for col in source]
+    dtypes = {name: _staging_type(dtype) for name, dtype in file_config.get('dtype_dict', {}).items()}
+    casts = [f"TRY_CAST({quote(col)} AS {dtypes[name]})" if dtypes.get(name) else quote(col)
+             for col, name in mapped]
+    all_empty = ' AND '.join(f"{quote(col)} IS NULL" for col, _ in mapped)
+    basic = (f"SELECT {', '.join(f'{cast} AS {quote(name)}' for cast, (_, name) in zip(casts, mapped))} "
+             f"FROM {raw_table} WHERE NOT ({all_empty})")
+
+    processing_func_name = file_config.get('processing_function')
+    if processing_func_name not in SQL_RULES:
+        logger.warning(f"No SQL rules for processing function {processing_func_name}. Using basic processing.")
+        return basic
+
+    columns = [name for _, name in mapped]
+    rules = SQL_RULES[processing_func_name](columns)
+    select_list = [f"{rules.get(name, quote(name))} AS {quote(name)}" for name in columns]
+    select_list += [f"{expression} AS {quote(name)}" for name, expression in rules.items() if name not in columns]
+    return f"SELECT {', '.join(select_list)} FROM ({basic}) AS mapped"
+
+
+def process_staged_table(conn, raw_table: str, file_config: Dict[str, Any]) -> str:
+    """
+    Materialise the processed table main.<table_name> from the raw table.
+
+    Returns:
+        str: Qualified processed table name
+    """
+    table = quote(file_config['table_name'])
+    raw_columns = [row[0] for row in conn.execute(f"DESCRIBE {raw_table}").fetchall()]
+    query = build_processing_query(raw_table, raw_columns, file_config)
+    conn.execute(f"CREATE OR REPLACE TABLE {table} AS {query}")
+    rows = conn.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
+    logger.info(f"Processed staged data for {file_config['table_name']}: {rows} rows")
+    return table
+
+
+def load_staged_table(conn, staged_table: str, table_name: str, engine: sa.engine.Engine,
+                      dtypes_dict: Dict[str, str], batch_rows: int = STAGING_BATCH_ROWS) -> int:
+    """
+    Recreate the target table and stream the staged rows into it in Arrow batches.
+
+    Args:
+        conn: Staging connection
+        staged_table (str): Qualified staged table
+        table_name (str): Target table name
+        engine (Engine): SQLAlchemy engine for the target database
+        dtypes_dict (dict): Dictionary mapping column names to Oracle data types
+        batch_rows (int): Rows per Arrow batch / executemany call
+
+    Returns:
+        int: Rows loaded
+    """
+    reader = conn.execute(f"SELECT * FROM {staged_table}").fetch_record_batch(batch_rows)
+    batches = (batch for batch in reader if batch.num_rows)
+    first = next(batches, None)
+    if first is None:
+        logger.warning(f"Staged table is empty. No data loaded to {table_name}.")
+        return 0
+
+    # Same DDL as the in-memory path
+    columns = reader.schema.names
+    create_table_from_dataframe(engine, table_name, pd.DataFrame(columns=columns), dtypes_dict)
+    target = sa.table(table_name, *[sa.column(col) for col in columns])
+
+    logger.info(f"Loading staged rows into {table_name} in batches of {batch_rows}")
+    rows = 0
+    with engine.begin() as db_conn:
+        for batch in chain([first], batches):
+            db_conn.execute(target.insert(), batch.to_pylist())
+            rows += batch.num_rows
+
+    logger.info(f"Successfully loaded {rows} rows into {table_name}")
+    return rows
+
+
+def stage_and_load(conn, file_config: Dict[str, Any], file_path: str, engine: sa.engine.Engine,
+                   batch_rows: int = STAGING_BATCH_ROWS) -> int:
+    """
+    Staging counterpart of process_excel_file + load_dataframe_to_db for one file.
+
+    Returns:
+        int: Rows loaded
+    """
+    try:
+        raw_table = stage_workbook(conn, file_config, file_path, batch_rows)
+        staged_table = process_staged_table(conn, raw_table, file_config)
+        return load_staged_table(conn, staged_table, file_config['table_name'], engine,
+                                 file_config.get('dtype_dict', {}), batch_rows)
+    except Exception as e:
+        logger.error(f"Error staging file {file_path}: {str(e)}")
+        raise
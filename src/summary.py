@@ -0,0 +1,70 @@
+import logging
+from typing import Any, Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Percentage columns produced by the summary queries but not shown on slides
+PERCENT_COLUMNS = ('Y/Y %', 'Q/Q %')
+
+# Float bounds of int64: 2.0**63 itself does not fit
+_INT64_MIN, _INT64_MAX = -2.0 ** 63, 2.0 ** 63
+
+
+def _truncate_to_int(values: pd.Series) -> pd.Series:
+    """Truncate a float series towards zero to a nullable Int64 series, or return it unchanged if it can't fit."""
+    truncated = np.trunc(values.to_numpy(dtype='float64', na_value=np.nan))
+    finite = truncated[~np.isnan(truncated)]
+    if np.isinf(finite).any() or (finite.size and (finite.min() < _INT64_MIN or finite.max() >= _INT64_MAX)):
+        return values
+    return pd.Series(pd.array(truncated, dtype='Int64'), index=values.index, name=values.name)
+
+
+def to_int_column(series: pd.Series) -> pd.Series:
+    """
+    Convert a float column to integers in one vectorised pass.
+
+    Values are truncated towards zero (the int() behaviour the old per-cell helper is
+    assumed to have had; it is not in this tree). Float columns become nullable
+    Int64, so missing values stay missing instead of forcing the column back to float.
+    Every other column, including object and string columns holding numeric text, is
+    returned unchanged.
+
+    Args:
+        series (pandas.Series): Column to convert
+
+    Returns:
+        pandas.Series: Converted column
+    """
+    if pd.api.types.is_bool_dtype(series) or not pd.api.types.is_float_dtype(series):
+        return series
+    return _truncate_to_int(series)
+
+
+def format_summary_table(df: pd.DataFrame, drop_columns: Iterable[str] = PERCENT_COLUMNS) -> pd.DataFrame:
+    """
+    Display formatting for a summary table: drop the percentage columns and truncate
+    every float column to integers.
+
+    Args:
+        df (pandas.DataFrame): Raw summary query result
+        drop_columns (iterable): Columns to remove if present
+
+    Returns:
+        pandas.DataFrame: Formatted copy
+    """
+    df = df.drop(columns=[column for column in drop_columns if column in df.columns])
+    result = df.copy(deep=False)
+    # By position, so duplicate column names are handled too
+    for position in range(result.shape[1]):
+        result.isetitem(position, to_int_column(result.iloc[:, position]))
+    return result
+
+
+def frame_to_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """df.to_dict(orient='records') with missing values as None, so nullable columns serialise to JSON."""
+    if not df.isna().any().any():
+        return df.to_dict(orient='records')
+    return df.astype(object).where(df.notna(), None).to_dict(orient='records')
@@ -0,0 +1,206 @@
+import os
+import json
+import time
+import uuid
+import logging
+import functools
+import threading
+import contextvars
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# The span currently open in this thread / asyncio task
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+_settings = {
+    'json_logs': True,
+    'otlp_file': os.getenv('TRACING_OTLP_FILE'),
+    'opentelemetry': os.getenv('TRACING_OPENTELEMETRY', '').lower() in ('1', 'true', 'yes'),
+}
+_otlp_lock = threading.Lock()
+_span_listeners: List = []
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:
+    otel_trace = None
+
+
+def configure_tracing(json_logs: bool = True,
+                      otlp_file: Optional[str] = None,
+                      opentelemetry: bool = False) -> None:
+    """
+    Configure where finished spans are exported.
+
+    Args:
+        json_logs (bool): Log each finished trace as one structured JSON line
+        otlp_file (str, optional): Append spans as OTLP-style JSON lines to this file
+        opentelemetry (bool): Mirror spans into the OpenTelemetry SDK if it is installed
+
+    Returns:
+        None
+    """
+    _settings['json_logs'] = json_logs
+    _settings['otlp_file'] = otlp_file
+    _settings['opentelemetry'] = opentelemetry
+    if opentelemetry and otel_trace is None:
+        logger.warning("opentelemetry is not installed; spans will not be mirrored")
+
+
+def add_span_listener(callback) -> None:
+    """
+    Register a callback invoked with every finished span (e.g. to feed metrics).
+
+    Args:
+        callback (callable): Function taking a Span
+
+    Returns:
+        None
+    """
+    _span_listeners.append(callback)
+
+
+class Span:
+    """A timed unit of work. Spans opened inside another span become its children."""
+
+    def __init__(self, name: str, attributes: Optional[Dict[str, Any]] = None, normal_exits: tuple = ()):
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.normal_exits = tuple(normal_exits)
+        self.parent = None
+        self.trace_id = None
+        self.span_id = uuid.uuid4().hex[:16]
+        self.children: List['Span'] = []
+        self.status = 'ok'
+        self.start_time = None
+        self.duration_ms = None
+        self._start = None
+        self._token = None
+        self._otel_cm = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def __enter__(self) -> 'Span':
+        self.parent = _current_span.get()
+        if self.parent is not None:
+            self.trace_id = self.parent.trace_id
+            self.parent.children.append(self)
+        else:
+            self.trace_id = uuid.uuid4().hex
+        self._token = _current_span.set(self)
+        if _settings['opentelemetry'] and otel_trace is not None:
+            self._otel_cm = otel_trace.get_tracer(__name__).start_as_current_span(
+                self.name, attributes={k: str(v) for k, v in self.attributes.items()}
+            )
+            self._otel_cm.__enter__()
+        self.start_time = time.time()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        self.duration_ms = round((time.perf_counter() - self._start) * 1000, 3)
+        if exc_type is not None and self._is_normal_exit(exc_type):
+            self.attributes['exit'] = exc_type.__name__
+        elif exc_type is not None:
+            self.status = 'error'
+            self.attributes['error'] = str(exc_value)
+        if self._otel_cm is not None:
+            self._otel_cm.__exit__(exc_type, exc_value, traceback)
+        try:
+            _current_span.reset(self._token)
+        except ValueError:
+            # Closed from a different context than it was opened in (e.g. a framework hook)
+            _current_span.set(self.parent)
+        _export(self)
+        return False
+
+    def _is_normal_exit(self, exc_type) -> bool:
+        # Classes, or class names for frameworks whose exceptions live in private modules
+        names = {cls.__name__ for cls in exc_type.__mro__}
+        return any(exit_type in names if isinstance(exit_type, str) else issubclass(exc_type, exit_type)
+                   for exit_type in self.normal_exits)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Nested representation of the span and its children."""
+        return {
+            'name': self.name,
+            'duration_ms': self.duration_ms,
+            'status': self.status,
+            'attributes': self.attributes,
+            'children': [child.to_dict() for child in self.children],
+        }
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """Flat OTLP/JSON-compatible representation of this span."""
+        start_ns = int(self.start_time * 1e9)
+        return {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'parentSpanId': self.parent.span_id if self.parent else '',
+            'name': self.name,
+            'startTimeUnixNano': start_ns,
+            'endTimeUnixNano': start_ns + int(self.duration_ms * 1e6),
+            'attributes': [{'key': k, 'value': {'stringValue': str(v)}} for k, v in self.attributes.items()],
+            'status': {'code': 'STATUS_CODE_ERROR' if self.status == 'error' else 'STATUS_CODE_OK'},
+        }
+
+
+def span(name: str, normal_exits: tuple = (), **attributes) -> Span:
+    """
+    Create a span to be used as a context manager.
+
+    Args:
+        name (str): Stage name, e.g. "summary_table"
+        normal_exits (tuple): Exception classes or class names that end the span
+            without an error, e.g. control flow such as Streamlit's st.rerun()
+        **attributes: Extra fields recorded with the span
+
+    Returns:
+        Span: The span (use with a `with` statement)
+    """
+    return Span(name, attributes, normal_exits)
+
+
+def traced(name: Optional[str] = None):
+    """
+    Decorator that runs the wrapped function inside a span.
+
+    Args:
+        name (str, optional): Span name, defaults to the function name
+
+    Returns:
+        callable: Decorator
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name or func.__name__):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def _export(finished: Span) -> None:
+    for callback in _span_listeners:
+        try:
+            callback(finished)
+        except Exception as e:
+            logger.warning(f"Span listener failed: {str(e)}")
+
+    if _settings['otlp_file']:
+        try:
+            with _otlp_lock, open(_settings['otlp_file'], 'a') as f:
+                f.write(json.dumps(finished.to_otlp()) + '\n')
+        except Exception as e:
+            logger.warning(f"Could not write span to {_settings['otlp_file']}: {str(e)}")
+
+    # Only the root span is logged; it carries the whole nested timing tree
+    if _settings['json_logs'] and finished.parent is None:
+        logger.info(json.dumps({'trace_id': finished.trace_id, 'start': finished.start_time, **finished.to_dict()},
+                               default=str))
@@ -4,7 +4,7 @@ import glob
 import logging
 from typing import Dict, List, Any, Optional
 
-from sqlalchemy import create_engine, Table, Column, Integer, String, Float, MetaData
+from sqlalchemy import create_engine, Table, Column, Integer, String, Float, MetaData, text
 
 # Configure logging
 logging.basicConfig(
@@ -53,37 +53,109 @@ def get_excel_files(data_dir: str, file_pattern: str = "*.xlsx") -> List[str]:
     
     return excel_files
 
-def get_file_config_by_path(config: Dict[str, Any], file_path: str) -> Optional[Dict[str, Any]]:
+# id(excel_files) -> (excel_files, index); holding the dict keeps its id from being reused
+_index_cache: Dict[int, tuple] = {}
+_INDEX_CACHE_SIZE = 8
+
+def build_file_config_index(config: Dict[str, Any]) -> Dict[str, Dict[str, str]]:
     """
-    Find the configuration for a specific Excel file based on its path.
+    Build lookup maps from file name, stem and table name to `excel_files` keys.
+    
+    Where several entries share a name the first one wins, as in a linear scan.
+    
+    Args:
+        config (dict): Full configuration dictionary
+        
+    Returns:
+        dict: {'basename': {...}, 'stem': {...}, 'table': {...}}; stems and
+        table names are lower-cased
+    """
+    index = {'basename': {}, 'stem': {}, 'table': {}}
+    for file_key, file_config in (config.get('excel_files') or {}).items():
+        file_name = os.path.basename(file_config.get('file_path', ''))
+        index['basename'].setdefault(file_name, file_key)
+        index['stem'].setdefault(os.path.splitext(file_name)[0].lower(), file_key)
+        table_name = file_config.get('table_name')
+        if table_name:
+            index['table'].setdefault(str(table_name).lower(), file_key)
+    return index
+
+def get_file_config_index(config: Dict[str, Any]) -> Dict[str, Dict[str, str]]:
+    """
+    Index for this config, built on first use and reused while its `excel_files` dict is unchanged.
+    
+    A reloaded config is a new dict and gets a new index. Configs edited in place
+    should pass a freshly built index instead.
+    """
+    excel_files = config.get('excel_files') or {}
+    cached = _index_cache.get(id(excel_files))
+    if cached is not None and cached[0] is excel_files:
+        return cached[1]
+    index = build_file_config_index(config)
+    if len(_index_cache) >= _INDEX_CACHE_SIZE:
+        _index_cache.pop(next(iter(_index_cache)))
+    _index_cache[id(excel_files)] = (excel_files, index)
+    return index
+
+def find_file_config_key(config: Dict[str, Any], file_path: str,
+                         index: Optional[Dict[str, Dict[str, str]]] = None) -> Optional[str]:
+    """
+    Find the `excel_files` key configured for an Excel file.
     
     Args:
         config (dict): Full configuration dictionary
         file_path (str): Path to the Excel file
+        index (dict, optional): Prebuilt index from build_file_config_index
         
     Returns:
-        dict: Configuration for the specific file or None if not found
+        str: Key of the matching entry or None if not found
     """
+    index = index or get_file_config_index(config)
     file_name = os.path.basename(file_path)
-    excel_files_config = config.get('excel_files', {})
-    
-    # Try to find an exact match first
-    for file_key, file_config in excel_files_config.items():
-        if os.path.basename(file_config.get('file_path', '')) == file_name:
-            return file_config
-    
-    # If no exact match, try to match by file name without extension
-    file_name_no_ext = os.path.splitext(file_name)[0]
-    for file_key, file_config in excel_files_config.items():
-        config_file_name = os.path.basename(file_config.get('file_path', ''))
-        config_file_name_no_ext = os.path.splitext(config_file_name)[0]
+    
+    # Exact file name first, then the name without extension, ignoring case
+    file_key = index['basename'].get(file_name)
+    if file_key is None:
+        file_key = index['stem'].get(os.path.splitext(file_name)[0].lower())
+    return file_key
+
+def get_file_config_by_path(config: Dict[str, Any], file_path: str,
+                            index: Optional[Dict[str, Dict[str, str]]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Find the configuration for a specific Excel file based on its path.
+    
+    Args:
+        config (dict): Full configuration dictionary
+        file_path (str): Path to the Excel file
+        index (dict, optional): Prebuilt index from build_file_config_index
         
-        if file_name_no_ext.lower() == config_file_name_no_ext.lower():
-            return file_config
+    Returns:
+        dict: Configuration for the specific file or None if not found
+    """
+    file_key = find_file_config_key(config, file_path, index)
+    if file_key is not None:
+        return config['excel_files'][file_key]
     
     logger.warning(f"No configuration found for file {file_path}")
     return None
 
+def get_file_config_by_table(config: Dict[str, Any], table_name: str,
+                             index: Optional[Dict[str, Dict[str, str]]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Find the configuration of the Excel file loaded into a table.
+    
+    Args:
+        config (dict): Full configuration dictionary
+        table_name (str): Database table name (case-insensitive)
+        index (dict, optional): Prebuilt index from build_file_config_index
+        
+    Returns:
+        dict: Configuration for the file or None if not found
+    """
+    index = index or get_file_config_index(config)
+    file_key = index['table'].get(str(table_name).lower())
+    return config['excel_files'][file_key] if file_key is not None else None
+
 def ensure_directory_exists(directory: str) -> None:
     """
     Ensure that a directory exists, creating it if necessary.
@@ -117,4 +189,74 @@ def mapping_to_sql(dtype_dict):
     for key, value in dtype_dict.items():
         output_dict[key] = parse_sql_type(value)
     
-    return output_dict
\ No newline at end of file
+    return output_dict
+
+# Only the data dictionary is read, never the table: the last DDL time moves when
+# ingestion recreates the table, and *_tab_modifications counts inserts/updates/
+# deletes since statistics were last gathered. Those counters are flushed from
+# memory periodically, or at once by flush_data_versions. Ingestion creates tables
+# with unquoted (upper-cased) names, the chatbot's table may be quoted mixed case,
+# so both spellings are looked up and an exact match wins.
+DATA_VERSION_QUERY = """
+    SELECT TO_CHAR(o.last_ddl_time, 'YYYYMMDDHH24MISS')
+           || '-' || NVL(TO_CHAR(m.timestamp, 'YYYYMMDDHH24MISS'), '0')
+           || '-' || NVL(m.inserts + m.updates + m.deletes, 0)
+           || '-' || NVL(m.truncated, 'NO')
+    FROM {objects} o
+    LEFT JOIN {modifications} m
+      ON m.table_name = o.object_name AND m.partition_name IS NULL{owner_join}
+    WHERE o.object_name IN (:object_name, UPPER(:object_name)) AND o.object_type = 'TABLE'{owner_filter}
+    ORDER BY CASE WHEN o.object_name = :object_name THEN 0 ELSE 1 END
+    FETCH FIRST 1 ROW ONLY
+"""
+
+def get_table_data_version(engine, table_name: str, owner: Optional[str] = None) -> Optional[str]:
+    """
+    Version of a table's contents: last DDL time (bumped when ingestion recreates
+    the table) plus its DML monitoring counters, read from the data dictionary so
+    the check costs the same on any table size. The single implementation shared
+    by the app, the backend, EDA and the chatbot, so they agree on when data changed.
+    
+    Args:
+        engine (Engine): SQLAlchemy engine
+        table_name (str): Table to check
+        owner (str, optional): Schema owning the table; defaults to the connected user's
+        
+    Returns:
+        str: Version string, or None when it can't be determined (non-Oracle engine
+        or unknown table)
+    """
+    if not table_name or engine.dialect.name != 'oracle':
+        return None
+    if owner:
+        query = DATA_VERSION_QUERY.format(objects='all_objects', modifications='all_tab_modifications',
+                                          owner_join=' AND m.table_owner = o.owner',
+                                          owner_filter=' AND o.owner = UPPER(:owner)')
+        params = {'object_name': table_name, 'owner': owner}
+    else:
+        query = DATA_VERSION_QUERY.format(objects='user_objects', modifications='user_tab_modifications',
+                                          owner_join='', owner_filter='')
+        params = {'object_name': table_name}
+    try:
+        with engine.connect() as conn:
+            return conn.execute(text(query), params).scalar()
+    except Exception as e:
+        logger.warning(f"Could not read data version of {table_name}: {str(e)}")
+        return None
+
+def flush_data_versions(engine) -> None:
+    """
+    Publish DML just committed to user_tab_modifications, so get_table_data_version
+    sees it immediately rather than after the next periodic flush. Called by
+    ingestion after loading; without the ANALYZE ANY privilege it only logs.
+    
+    Args:
+        engine (Engine): SQLAlchemy engine
+    """
+    if engine.dialect.name != 'oracle':
+        return
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("BEGIN DBMS_STATS.FLUSH_DATABASE_MONITORING_INFO; END;"))
+    except Exception as e:
+        logger.warning(f"Could not flush table monitoring info: {str(e)}")
@@ -1,5 +1,8 @@
 import io
-from flask import Blueprint, jsonify, request, send_file
+import os
+import sys
+import json
+from flask import Blueprint, jsonify, request, send_file, Response
 from backend.database.get_summary_table import get_summary_table
 from backend.database.database_process import create_oracle_engine
 from backend.database.get_top_contributors import get_top_attributes_by_difference
@@ -7,7 +10,11 @@ from backend.llm.reson_code import get_reason_code
 from backend.llm.commentary import get_commentary, modify_commentary
 from backend.llm.chatbot import process_chatbot_query
 from backend.utils.helper import read_config, get_file_config_by_path
-from backend.utils.ppt_export import generate_ppt
+from backend.utils.ppt_export import PPT_MIMETYPE, build_close_pack, generate_ppt, render_deck
+
+# Repository root, for the shared job queue in src/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+from src.jobs import create_job_queue, public_job, FINISHED_STATES, SUCCEEDED
 
 api_bp = Blueprint('api', __name__)
 
@@ -85,16 +92,131 @@ def create_ppt():
         ppt_buffer = generate_ppt(
             data['commentary'],
             data['selected_cells'],
-            data['file_name']
+            data['file_name'],
+            data.get('summary_table')
         )
 
-        # Convert PPT to bytes and send as file
-        ppt_io = io.BytesIO(ppt_buffer.getvalue())
+        # The buffer is already at position 0; send it as is
         return send_file(
-            ppt_io,
-            mimetype='application/vnd.openxmlformats-officedocument.presentationml.presentation',
+            ppt_buffer,
+            mimetype=PPT_MIMETYPE,
             as_attachment=True,
             download_name=f"{data['file_name']}_presentation.pptx"
         )
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/generate-deck', methods=['POST'])
+def create_deck():
+    """One deck for many slides whose commentary is already written"""
+    try:
+        data = request.json
+        title = data.get('title', 'Close Pack')
+        ppt_buffer = render_deck(data['slides'], title=title)
+        return send_file(
+            ppt_buffer,
+            mimetype=PPT_MIMETYPE,
+            as_attachment=True,
+            download_name=f"{title}.pptx"
+        )
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+# Background jobs: slow LLM calls and PPT export return a job id immediately
+job_queue = create_job_queue()
+
+def _job_accepted(job):
+    response = jsonify({**public_job(job), 'status_url': f"/api/jobs/{job['id']}"})
+    response.status_code = 202
+    response.headers['Location'] = f"/api/jobs/{job['id']}"
+    return response
+
+def _build_ppt(commentary, selected_cells, file_name, summary_table=None):
+    return generate_ppt(commentary, selected_cells, file_name, summary_table).getvalue()
+
+def _prepare_slide(file_name):
+    """Summary table, reason code, contributors and commentary for one close pack slide"""
+    file_config = get_file_config_by_path(config, file_name)
+    df = get_summary_table(engine)
+    selected_cells = get_reason_code(df, file_name)
+    top_contributors = get_top_attributes_by_difference(
+        engine,
+        selected_cells,
+        file_config.get('table_name'),
+        file_config.get('contributing_columns', []),
+        file_config.get('top_n', 3)
+    )
+    return {
+        'file_name': file_name,
+        'summary_table': df,
+        'selected_cells': selected_cells,
+        'commentary': get_commentary(top_contributors, file_name)
+    }
+
+def _build_close_pack(file_names, title):
+    return build_close_pack(file_names, _prepare_slide, title=title).getvalue()
+
+@api_bp.route('/jobs/generate-commentary', methods=['POST'])
+def submit_commentary_job():
+    data = request.json
+    job = job_queue.submit('commentary', get_commentary, data['top_contributors'], data['file_name'])
+    return _job_accepted(job)
+
+@api_bp.route('/jobs/top-contributors', methods=['POST'])
+def submit_top_contributors_job():
+    data = request.json
+    job = job_queue.submit(
+        'top_contributors', get_top_attributes_by_difference, engine,
+        data['selected_cells'], data['table_name'], data['contributing_columns'], data['top_n']
+    )
+    return _job_accepted(job)
+
+@api_bp.route('/jobs/generate-ppt', methods=['POST'])
+def submit_ppt_job():
+    data = request.json
+    job = job_queue.submit('ppt', _build_ppt, data['commentary'], data['selected_cells'], data['file_name'],
+                           data.get('summary_table'))
+    return _job_accepted(job)
+
+@api_bp.route('/jobs/generate-pack', methods=['POST'])
+def submit_close_pack_job():
+    """Whole close pack: every slide is analysed on the PPT worker pool, then rendered into one deck"""
+    data = request.json
+    file_names = data.get('file_names') or list(config.get('excel_files', {}))
+    job = job_queue.submit('ppt_pack', _build_close_pack, file_names, data.get('title', 'Close Pack'))
+    return _job_accepted(job)
+
+@api_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(public_job(job))
+
+@api_bp.route('/jobs/<job_id>/stream', methods=['GET'])
+def stream_job(job_id):
+    if job_queue.get(job_id) is None:
+        return jsonify({'error': 'Job not found'}), 404
+
+    def events():
+        for job in job_queue.stream(job_id):
+            event = 'done' if job['status'] in FINISHED_STATES else 'status'
+            yield f"event: {event}\ndata: {json.dumps(public_job(job), default=str)}\n\n"
+
+    return Response(events(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+@api_bp.route('/jobs/<job_id>/result', methods=['GET'])
+def download_job_result(job_id):
+    """Download a finished PPT job"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    if job['status'] != SUCCEEDED or not isinstance(job['result'], (bytes, bytearray)):
+        return jsonify({'error': f"No file for job in status {job['status']}"}), 409
+    return send_file(
+        io.BytesIO(job['result']),
+        mimetype=PPT_MIMETYPE,
+        as_attachment=True,
+        download_name=f"{request.args.get('file_name', job_id)}_presentation.pptx"
+    )
@@ -1,33 +1,197 @@
+import os
+import logging
+import threading
 from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
 from pptx import Presentation
+from pptx.dml.color import RGBColor
+from pptx.util import Pt
+
+logger = logging.getLogger(__name__)
+
+PPT_MIMETYPE = 'application/vnd.openxmlformats-officedocument.presentationml.presentation'
+# Corporate template (.pptx) whose layouts and theme every deck uses; python-pptx's default if unset
+PPT_TEMPLATE = os.getenv("PPT_TEMPLATE")
+# Threads preparing slide content (summary query, reason code, LLM commentary) for a close pack
+PPT_WORKERS = int(os.getenv("PPT_WORKERS", "4"))
+# Summary tables longer than this continue on another slide
+PPT_TABLE_ROWS = int(os.getenv("PPT_TABLE_ROWS", "15"))
+
+# Layout positions in the default template; corporate templates should keep this order
+TITLE_LAYOUT = 0
+CONTENT_LAYOUT = 1
+TITLE_ONLY_LAYOUT = 5
+
+SELECTED_FILL = RGBColor(0xFF, 0xE6, 0x99)
+
+# template path -> (mtime, bytes)
+_templates = {}
+_templates_lock = threading.Lock()
+
+
+def _default_template_path():
+    import pptx
+    return os.path.join(os.path.dirname(pptx.__file__), 'templates', 'default.pptx')
+
+
+def load_template(path=None):
+    """
+    Template file contents, read from disk once and again only when the file changes.
+
+    Decks are opened from these bytes in memory; a parsed Presentation can't be
+    shared because adding slides mutates it.
+    """
+    path = path or PPT_TEMPLATE or _default_template_path()
+    mtime = os.stat(path).st_mtime_ns
+    with _templates_lock:
+        cached = _templates.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+    with open(path, 'rb') as f:
+        data = f.read()
+    with _templates_lock:
+        _templates[path] = (mtime, data)
+    logger.info(f"Loaded PPT template {path}")
+    return data
+
+
+def _layout(prs, index):
+    layouts = prs.slide_layouts
+    return layouts[min(index, len(layouts) - 1)]
+
+
+def _set_title(slide, text):
+    if slide.shapes.title is not None:
+        slide.shapes.title.text = text
+
+
+def _as_frame(summary_table):
+    """Accept a DataFrame or the API's {'data': records, 'index': [...]} payload"""
+    if summary_table is None or isinstance(summary_table, pd.DataFrame):
+        return summary_table
+    df = pd.DataFrame.from_records(summary_table['data'], columns=summary_table.get('columns'))
+    if 'index' in summary_table:
+        df.index = summary_table['index']
+    return df
+
+
+def _cell_text(value):
+    return '' if pd.isna(value) else str(value)
+
+
+def _add_table_slides(prs, title, df, selected_cells):
+    """Summary table, split across slides every PPT_TABLE_ROWS rows; selected cells are highlighted"""
+    selected = {(str(cell[0]), str(cell[1])) for cell in selected_cells or []}
+    columns = [str(column) for column in df.columns]
+    header = [str(df.index.name or '')] + columns
+    left, top = int(prs.slide_width * 0.05), int(prs.slide_height * 0.18)
+    width = int(prs.slide_width * 0.9)
+
+    for start in range(0, max(len(df), 1), PPT_TABLE_ROWS):
+        chunk = df.iloc[start:start + PPT_TABLE_ROWS]
+        slide = prs.slides.add_slide(_layout(prs, TITLE_ONLY_LAYOUT))
+        _set_title(slide, title if start == 0 else f"{title} (cont.)")
+        height = int(prs.slide_height * 0.05) * (len(chunk) + 1)
+        table = slide.shapes.add_table(len(chunk) + 1, len(header), left, top, width, height).table
+
+        for position, name in enumerate(header):
+            table.cell(0, position).text = name
+        for row_position, (label, values) in enumerate(zip(chunk.index, chunk.itertuples(index=False)), start=1):
+            table.cell(row_position, 0).text = str(label)
+            for position, value in enumerate(values, start=1):
+                cell = table.cell(row_position, position)
+                cell.text = _cell_text(value)
+                if (str(label), columns[position - 1]) in selected:
+                    cell.fill.solid()
+                    cell.fill.fore_color.rgb = SELECTED_FILL
+        for row in table.rows:
+            for cell in row.cells:
+                for paragraph in cell.text_frame.paragraphs:
+                    for run in paragraph.runs:
+                        run.font.size = Pt(10)
+
+
+def _add_commentary_slide(prs, title, commentary):
+    slide = prs.slides.add_slide(_layout(prs, CONTENT_LAYOUT))
+    _set_title(slide, title)
+    body = next((placeholder for placeholder in slide.placeholders if placeholder.placeholder_format.idx == 1), None)
+    if body is not None:
+        body.text = commentary or ''
+    else:
+        box = slide.shapes.add_textbox(int(prs.slide_width * 0.05), int(prs.slide_height * 0.18),
+                                       int(prs.slide_width * 0.9), int(prs.slide_height * 0.75))
+        box.text_frame.word_wrap = True
+        box.text_frame.text = commentary or ''
+
+
+def render_deck(slides, title=None, template=None):
+    """
+    Render many slides into one deck in a single pass.
+
+    Args:
+        slides (list): dicts with file_name, commentary and optionally selected_cells,
+            summary_table (DataFrame or API payload) and title
+        title (str, optional): Text for a leading title slide
+        template (str, optional): Template path, defaults to PPT_TEMPLATE
+
+    Returns:
+        BytesIO: The saved deck, positioned at the start
+    """
+    prs = Presentation(BytesIO(load_template(template)))
+    if title:
+        _set_title(prs.slides.add_slide(_layout(prs, TITLE_LAYOUT)), title)
+
+    for slide in slides:
+        heading = slide.get('title') or slide['file_name']
+        df = _as_frame(slide.get('summary_table'))
+        if df is not None:
+            _add_table_slides(prs, slide['file_name'], df, slide.get('selected_cells'))
+        _add_commentary_slide(prs, heading, slide.get('commentary'))
+
+    buffer = BytesIO()
+    prs.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+def build_close_pack(file_names, prepare_slide, title="Close Pack", workers=None, template=None):
+    """
+    Prepare every slide of a close pack on a worker pool, then render one deck.
+
+    Args:
+        file_names (list): Slides in deck order
+        prepare_slide (callable): file_name -> slide dict for render_deck
+        title (str): Title slide text
+        workers (int, optional): Pool size, defaults to PPT_WORKERS
+
+    Returns:
+        BytesIO: The saved deck
+    """
+    def prepare(file_name):
+        try:
+            return prepare_slide(file_name)
+        except Exception as e:
+            # One failing slide shouldn't sink the whole pack
+            logger.error(f"Could not prepare slide {file_name}: {str(e)}")
+            return {'file_name': file_name, 'commentary': f"Commentary unavailable: {str(e)}"}
+
+    with ThreadPoolExecutor(max_workers=workers or PPT_WORKERS, thread_name_prefix="ppt") as executor:
+        slides = list(executor.map(prepare, file_names))
+    return render_deck(slides, title=title, template=template)
+
 
-def generate_ppt(commentary, selected_cells, file_name):
+def generate_ppt(commentary, selected_cells, file_name, summary_table=None):
     """
     Generate PowerPoint presentation
     """
     try:
-        prs = Presentation()
-        
-        # Add title slide
-        title_slide = prs.slides.add_slide(prs.slide_layouts[0])
-        title = title_slide.shapes.title
-        title.text = f"Analysis Report: {file_name}"
-        
-        # Add content slide
-        content_slide = prs.slides.add_slide(prs.slide_layouts[1])
-        title = content_slide.shapes.title
-        title.text = "Analysis Details"
-        
-        # Add commentary
-        content = content_slide.placeholders[1]
-        content.text = commentary
-        
-        # Save to BytesIO
-        ppt_buffer = BytesIO()
-        prs.save(ppt_buffer)
-        ppt_buffer.seek(0)
-        
-        return ppt_buffer
+        return render_deck(
+            [{'file_name': file_name, 'title': "Analysis Details", 'commentary': commentary,
+              'selected_cells': selected_cells, 'summary_table': summary_table}],
+            title=f"Analysis Report: {file_name}"
+        )
     except Exception as e:
         print(f"Error generating PPT: {str(e)}")
         return BytesIO()  # Return empty buffer on error
@@ -9,8 +9,12 @@ logger = logging.getLogger(__name__)
 # Page configuration
 st.set_page_config(layout="wide")
 
-# Initialize API client
-api_client = APIClient('http://localhost:5000/api')
+# Initialize API client (cached so the connection pool survives reruns)
+@st.cache_resource
+def get_api_client(base_url):
+    return APIClient(base_url)
+
+api_client = get_api_client('http://localhost:5000/api')
 
 def load_custom_css():
     with open("styles/style.css") as f:
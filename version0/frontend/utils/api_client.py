@@ -1,18 +1,40 @@
+import os
+import sys
+import asyncio
+import functools
 import requests
 import logging
 
+# The repo root, for the shared src package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from src.http_session import DEFAULT_TIMEOUT, build_session
+
 logger = logging.getLogger(__name__)
 
 class APIClient:
-    def __init__(self, base_url):
+    def __init__(self, base_url, timeout=DEFAULT_TIMEOUT, retries=3, backoff_factor=0.5, pool_maxsize=10):
         self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        # Keep-alive pool; only idempotent methods are retried, with exponential backoff
+        self.session = build_session(retries, backoff_factor, pool_maxsize)
         logger.debug(f"Initializing API client with base URL: {self.base_url}")
 
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
     def _make_request(self, method, endpoint, **kwargs):
         url = f"{self.base_url}/{endpoint.lstrip('/')}"
         logger.debug(f"Making {method} request to {url}")
+        kwargs.setdefault('timeout', self.timeout)
         try:
-            response = requests.request(method, url, **kwargs)
+            response = self.session.request(method, url, **kwargs)
             response.raise_for_status()
             return response
         except requests.exceptions.RequestException as e:
@@ -105,4 +127,51 @@ class APIClient:
             return response.content
         except Exception as e:
             logger.error(f"Failed to generate PPT: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+    def generate_deck(self, slides, title="Close Pack"):
+        """One deck for many slides: dicts with file_name, commentary, selected_cells and summary_table"""
+        try:
+            response = self._make_request('POST', "generate-deck", json={'slides': slides, 'title': title})
+            return response.content
+        except Exception as e:
+            logger.error(f"Failed to generate deck: {str(e)}")
+            raise
+
+    def submit_close_pack_job(self, file_names=None, title="Close Pack"):
+        """Queue the whole close pack export; poll jobs/<id> and download jobs/<id>/result"""
+        response = self._make_request('POST', "jobs/generate-pack", json={'file_names': file_names, 'title': title})
+        return response.json()
+
+
+class AsyncAPIClient:
+    """Async facade over APIClient: each call runs in a worker thread on the shared pool"""
+
+    def __init__(self, base_url, timeout=DEFAULT_TIMEOUT, retries=3, backoff_factor=0.5, pool_maxsize=10):
+        self._client = APIClient(base_url, timeout, retries, backoff_factor, pool_maxsize)
+        self._pool_maxsize = pool_maxsize
+        self._semaphore = None
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        method = getattr(self._client, name)
+        if not callable(method):
+            return method
+
+        @functools.wraps(method)
+        async def call(*args, **kwargs):
+            if self._semaphore is None:
+                self._semaphore = asyncio.Semaphore(self._pool_maxsize)
+            async with self._semaphore:
+                return await asyncio.to_thread(method, *args, **kwargs)
+        return call
+
+    async def aclose(self):
+        self._client.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.aclose()
@@ -1,13 +1,75 @@
+import asyncio
+import copy
+import time
+import functools
+import threading
+from collections import OrderedDict
 import requests
 import pandas as pd
 import json
 
+from api.transport import ARROW_STREAM, accept_header, columnar_available, decode_frame, encode_frame, is_columnar
+from src.http_session import DEFAULT_TIMEOUT, build_session
+
 class APIClient:
     """Client for communicating with the backend API"""
     
-    def __init__(self, base_url):
+    def __init__(self, base_url, timeout=DEFAULT_TIMEOUT, retries=3, backoff_factor=0.5, pool_maxsize=10,
+                 cache_entries=64):
         """Initialize the API client with the base URL of the API"""
         self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.session = build_session(retries, backoff_factor, pool_maxsize)
+        # (path, accept) -> (etag, parsed value), revalidated with If-None-Match
+        self.cache_entries = cache_entries
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def close(self):
+        """Close pooled connections"""
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _get(self, path, **kwargs):
+        return self.session.get(f"{self.base_url}{path}", timeout=self.timeout, **kwargs)
+
+    def _post(self, path, **kwargs):
+        return self.session.post(f"{self.base_url}{path}", timeout=self.timeout, **kwargs)
+
+    def _get_cached(self, path, parse, accept=None):
+        """
+        GET with ETag revalidation: a 304 returns the locally cached value
+        without transferring or parsing the body again.
+        """
+        key = (path, accept)
+        headers = {'Accept': accept} if accept else {}
+        with self._cache_lock:
+            entry = self._cache.get(key)
+        if entry is not None:
+            headers['If-None-Match'] = entry[0]
+        response = self._get(path, headers=headers)
+        if response.status_code == 304 and entry is not None:
+            with self._cache_lock:
+                self._cache.move_to_end(key)
+            return copy.deepcopy(entry[1])
+        value = parse(response)
+        etag = response.headers.get('ETag')
+        if etag and self.cache_entries:
+            with self._cache_lock:
+                self._cache[key] = (etag, copy.deepcopy(value))
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.cache_entries:
+                    self._cache.popitem(last=False)
+        return value
+
+    def clear_cache(self):
+        with self._cache_lock:
+            self._cache.clear()
         
     def _handle_response(self, response):
         """Handle API response and error cases"""
@@ -26,18 +88,22 @@ class APIClient:
     
     def get_available_files(self):
         """Get list of available files from the backend"""
-        response = requests.get(f"{self.base_url}/api/files")
+        response = self._get("/api/files")
         data = self._handle_response(response)
         return data.get('files', [])
     
     def get_file_config(self, file_name):
         """Get configuration for a specific file"""
-        response = requests.get(f"{self.base_url}/api/file-config/{file_name}")
-        return self._handle_response(response)
+        return self._get_cached(f"/api/file-config/{file_name}", self._handle_response)
     
     def get_summary_table(self, file_name):
         """Get summary table data for a file"""
-        response = requests.get(f"{self.base_url}/api/summary-table/{file_name}")
+        return self._get_cached(f"/api/summary-table/{file_name}", self._parse_summary_table, accept_header())
+
+    def _parse_summary_table(self, response):
+        # The backend falls back to JSON if it can't encode the frame columnar
+        if response.ok and is_columnar(response.headers.get('Content-Type')):
+            return decode_frame(response.content, response.headers['Content-Type'])
         data = self._handle_response(response)
         # Convert JSON data to pandas DataFrame
         df = pd.DataFrame.from_dict(data['data'])
@@ -45,13 +111,65 @@ class APIClient:
             df.index = data['index']
         return df
     
+    def get_summary_rows(self, file_name, start=0, length=50, sort=None, ascending=True, search=None):
+        """
+        One window of the summary table, filtered and sorted by the backend.
+
+        Returns:
+            tuple: (DataFrame with the window's rows, total rows, rows after filtering)
+        """
+        params = {'start': start, 'length': length, 'order': 'asc' if ascending else 'desc'}
+        if sort:
+            params['sort'] = sort
+        if search:
+            params['search'] = search
+        response = self._get(f"/api/summary-table/{file_name}/rows", params=params,
+                             headers={'Accept': accept_header()})
+        if response.ok and is_columnar(response.headers.get('Content-Type')):
+            df = decode_frame(response.content, response.headers['Content-Type'])
+            return df, int(response.headers['X-Total-Count']), int(response.headers['X-Filtered-Count'])
+        data = self._handle_response(response)
+        df = pd.DataFrame.from_records(data['data'], columns=data['columns'])
+        df.index = data['index']
+        return df, data['total'], data['filtered']
+    
+    def bootstrap_slide(self, file_name):
+        """
+        Get config, initial selection, contributors and commentary in one call.
+
+        'summary_table' describes the table (rows, columns, index_name, index);
+        fetch it with get_summary_table or page it with get_summary_rows. The
+        response is ETag-revalidated, so reopening an unchanged slide costs a 304.
+        """
+        return self._get_cached(f"/api/slides/{file_name}/bootstrap", self._handle_response)
+    
+    def get_summary_value(self, file_name, row_label, column):
+        """One cell of the summary table, found through the backend's row search"""
+        start = 0
+        while True:
+            df, _, filtered = self.get_summary_rows(file_name, start=start, length=500, search=str(row_label))
+            # The search is a substring match over every column; pick the exact label
+            matches = [position for position, label in enumerate(df.index) if str(label) == str(row_label)]
+            if matches:
+                return df.iloc[matches[0]][column]
+            start += len(df)
+            if not len(df) or start >= filtered:
+                raise KeyError(row_label)
+    
     def get_reason_code(self, file_name, df):
         """Get reason code for the file"""
-        df_json = df.to_json(orient='split')
-        response = requests.post(
-            f"{self.base_url}/api/reason-code/{file_name}",
-            json={'df': df_json}
-        )
+        if columnar_available():
+            response = self._post(
+                f"/api/reason-code/{file_name}",
+                data=encode_frame(df, ARROW_STREAM),
+                headers={'Content-Type': ARROW_STREAM}
+            )
+        else:
+            df_json = df.to_json(orient='split')
+            response = self._post(
+                f"/api/reason-code/{file_name}",
+                json={'df': df_json}
+            )
         data = self._handle_response(response)
         return data['selected_cells']
     
@@ -66,8 +184,8 @@ class APIClient:
             'contributing_columns': contributing_columns,
             'top_n': top_n
         }
-        response = requests.post(
-            f"{self.base_url}/api/top-contributors/{file_name}",
+        response = self._post(
+            f"/api/top-contributors/{file_name}",
             json=payload
         )
         data = self._handle_response(response)
@@ -78,8 +196,8 @@ class APIClient:
         payload = {
             'top_contributors': top_contributors_formatted
         }
-        response = requests.post(
-            f"{self.base_url}/api/commentary/{file_name}",
+        response = self._post(
+            f"/api/commentary/{file_name}",
             json=payload
         )
         data = self._handle_response(response)
@@ -105,21 +223,47 @@ class APIClient:
             'contributing_columns': contributing_columns,
             'top_n': top_n
         }
-        response = requests.post(
-            f"{self.base_url}/api/modify-commentary/{file_name}",
+        response = self._post(
+            f"/api/modify-commentary/{file_name}",
             json=payload
         )
         data = self._handle_response(response)
         return data['commentary']
     
+    def submit_commentary_job(self, file_name, top_contributors_formatted):
+        """Queue commentary generation on the backend; returns the job record"""
+        response = self._post(
+            f"/api/jobs/commentary/{file_name}",
+            json={'top_contributors': top_contributors_formatted}
+        )
+        return self._handle_response(response)
+    
+    def get_job(self, job_id):
+        """Get the status (and result, once finished) of a background job"""
+        response = self._get(f"/api/jobs/{job_id}")
+        return self._handle_response(response)
+    
+    def wait_for_job(self, job_id, poll_interval=1.0, timeout=600):
+        """Poll a background job until it finishes and return its result"""
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self.get_job(job_id)
+            if job['status'] == 'succeeded':
+                return job.get('result')
+            if job['status'] == 'failed':
+                raise RuntimeError(f"Job {job_id} failed: {job.get('error')}")
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Job {job_id} still {job['status']} after {timeout}s")
+            time.sleep(poll_interval)
+    
     def process_chatbot_query(self, query, table_name):
         """Process a chatbot query"""
         payload = {
             'query': query,
             'table_name': table_name
         }
-        response = requests.post(
-            f"{self.base_url}/api/chatbot",
+        response = self._post(
+            "/api/chatbot",
             json=payload
         )
         data = self._handle_response(response)
@@ -132,8 +276,52 @@ class APIClient:
             'contributing_columns': contributing_columns,
             'top_n': top_n
         }
-        response = requests.post(
-            f"{self.base_url}/api/update-config",
+        response = self._post(
+            "/api/update-config",
             json=payload
         )
-        return self._handle_response(response)
\ No newline at end of file
+        result = self._handle_response(response)
+        with self._cache_lock:
+            self._cache.pop((f"/api/file-config/{file_name}", None), None)
+        return result
+
+class AsyncAPIClient:
+    """
+    Async facade over APIClient for fanning out independent calls, e.g.
+
+        async with AsyncAPIClient(base_url) as client:
+            config, df = await asyncio.gather(client.get_file_config(name), client.get_summary_table(name))
+
+    Each call runs the blocking client in a worker thread over the shared
+    connection pool; concurrency is capped at the pool size.
+    """
+
+    def __init__(self, base_url, timeout=DEFAULT_TIMEOUT, retries=3, backoff_factor=0.5, pool_maxsize=10):
+        self._client = APIClient(base_url, timeout, retries, backoff_factor, pool_maxsize)
+        self._pool_maxsize = pool_maxsize
+        self._semaphore = None
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        method = getattr(self._client, name)
+        if not callable(method):
+            return method
+
+        @functools.wraps(method)
+        async def call(*args, **kwargs):
+            # Created lazily so it binds to the running event loop
+            if self._semaphore is None:
+                self._semaphore = asyncio.Semaphore(self._pool_maxsize)
+            async with self._semaphore:
+                return await asyncio.to_thread(method, *args, **kwargs)
+        return call
+
+    async def aclose(self):
+        self._client.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.aclose()
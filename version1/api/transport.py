@@ -0,0 +1,141 @@
+"""Columnar wire formats for DataFrames exchanged between backend and frontend.
+
+JSON stays the default. When pyarrow is installed, clients can ask for an
+Arrow IPC stream or Parquet through the Accept header, optionally naming a
+compression codec as a media-type parameter:
+
+    Accept: application/vnd.apache.arrow.stream; compression=zstd, application/json
+"""
+import io
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+ARROW_STREAM = 'application/vnd.apache.arrow.stream'
+PARQUET = 'application/vnd.apache.parquet'
+JSON = 'application/json'
+
+# Codecs each format can carry internally (Arrow IPC only supports zstd/lz4 buffers)
+CODECS = {
+    ARROW_STREAM: ('zstd', 'lz4', 'none'),
+    PARQUET: ('zstd', 'gzip', 'snappy', 'none'),
+}
+DEFAULT_CODEC = 'zstd'
+
+
+def columnar_available():
+    return pa is not None
+
+
+def _parse_accept(accept_header):
+    """Split an Accept header into (media_type, params, q) tuples"""
+    entries = []
+    for position, item in enumerate((accept_header or '').split(',')):
+        parts = [part.strip() for part in item.split(';') if part.strip()]
+        if not parts:
+            continue
+        params = {}
+        for part in parts[1:]:
+            key, _, value = part.partition('=')
+            params[key.strip().lower()] = value.strip().strip('"').lower()
+        try:
+            q = float(params.pop('q', 1))
+        except ValueError:
+            q = 0.0
+        entries.append((parts[0].lower(), params, q, position))
+    # Highest q first; ties keep the client's order
+    entries.sort(key=lambda entry: (-entry[2], entry[3]))
+    return [(media_type, params, q) for media_type, params, q, _ in entries]
+
+
+def _codec_supported(codec):
+    return codec == 'none' or pa.Codec.is_available(codec)
+
+
+def negotiate(accept_header):
+    """
+    Pick the response format for a DataFrame endpoint.
+
+    Args:
+        accept_header (str): The request's Accept header
+
+    Returns:
+        tuple: (media_type, codec), or (JSON, None) when no columnar format applies
+    """
+    if pa is None:
+        return JSON, None
+    for media_type, params, q in _parse_accept(accept_header):
+        if q <= 0:
+            continue
+        if media_type in CODECS:
+            codec = params.get('compression', DEFAULT_CODEC)
+            if codec not in CODECS[media_type] or not _codec_supported(codec):
+                codec = next((c for c in CODECS[media_type] if _codec_supported(c)), 'none')
+            return media_type, codec
+        if media_type in (JSON, '*/*', 'application/*'):
+            return JSON, None
+    return JSON, None
+
+
+def accept_header(media_type=ARROW_STREAM, codec=DEFAULT_CODEC):
+    """Accept header asking for a columnar format with JSON as the fallback"""
+    if pa is None:
+        return JSON
+    return f"{media_type}; compression={codec}, {JSON}; q=0.5"
+
+
+def encode_frame(df, media_type, codec=DEFAULT_CODEC):
+    """
+    Serialise a DataFrame (including its index) to Arrow IPC or Parquet bytes.
+
+    Args:
+        df (pandas.DataFrame): Frame to send
+        media_type (str): ARROW_STREAM or PARQUET
+        codec (str): Compression codec, or 'none'
+
+    Returns:
+        bytes: Encoded frame
+    """
+    table = pa.Table.from_pandas(df, preserve_index=True)
+    compression = None if codec in (None, 'none') else codec
+    if media_type == ARROW_STREAM:
+        sink = pa.BufferOutputStream()
+        options = pa_ipc.IpcWriteOptions(compression=compression)
+        with pa_ipc.new_stream(sink, table.schema, options=options) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+    if media_type == PARQUET:
+        sink = pa.BufferOutputStream()
+        pq.write_table(table, sink, compression=compression or 'none')
+        return sink.getvalue().to_pybytes()
+    raise ValueError(f"Unsupported media type: {media_type}")
+
+
+def decode_frame(payload, media_type):
+    """
+    Rebuild a DataFrame from Arrow IPC or Parquet bytes.
+
+    Args:
+        payload (bytes): Encoded frame
+        media_type (str): ARROW_STREAM or PARQUET (parameters are ignored)
+
+    Returns:
+        pandas.DataFrame: Decoded frame with its original index
+    """
+    media_type = media_type.split(';')[0].strip().lower()
+    if media_type == ARROW_STREAM:
+        table = pa_ipc.open_stream(pa.py_buffer(payload)).read_all()
+    elif media_type == PARQUET:
+        table = pq.read_table(io.BytesIO(payload))
+    else:
+        raise ValueError(f"Unsupported media type: {media_type}")
+    return table.to_pandas()
+
+
+def is_columnar(content_type):
+    media_type = (content_type or '').split(';')[0].strip().lower()
+    return media_type in CODECS
@@ -0,0 +1,47 @@
+"""Gunicorn settings for the backend API.
+
+Handlers block on Oracle and LLM calls, so each worker runs a thread pool
+(gthread) instead of serving one request at a time. Everything can be
+tuned through environment variables.
+"""
+import multiprocessing
+import os
+import tempfile
+
+bind = os.getenv("BIND", "0.0.0.0:5000")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+
+# Load config and build the engine once in the master before forking
+preload_app = True
+
+# LLM calls can take a while; give in-flight requests time to finish on shutdown
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+
+# Job records must be visible to every worker (a poll can reach any of them), so
+# default to the shared SQLite store; read when the app is preloaded below
+os.environ.setdefault("JOB_DB_PATH", os.path.join(tempfile.gettempdir(), "backend-jobs.db"))
+
+# Recycle workers periodically to bound memory growth; a recycled worker marks its
+# unfinished jobs failed (JobQueue.shutdown / recover_orphans)
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "1000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "100"))
+
+# /metrics is served from each worker's own registry: a scrape sees one worker's
+# values, labelled with its pid (src.metrics.MetricsRegistry)
+
+accesslog = "-"
+errorlog = "-"
+
+
+def post_fork(server, worker):
+    from backend.server import on_worker_start
+    on_worker_start()
+
+
+def worker_exit(server, worker):
+    from backend.server import shutdown
+    shutdown()
@@ -1,12 +1,19 @@
 import os
+import gzip
 import json
-import yaml
-from flask import Flask, request, jsonify
+import hashlib
+from flask import Flask, request, jsonify, g
 from flask_cors import CORS
 import pandas as pd
 import sys
+import time
 import logging
-from functools import lru_cache
+import threading
+import contextvars
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from flask import Response
+from sqlalchemy import text
 
 # Configure logging
 logging.basicConfig(
@@ -19,8 +26,11 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Add parent directory to path to import modules
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Add parent directory to path to import modules (backend, api), and the repo
+# root for the shared src package (copied next to them in the Docker image)
+VERSION_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(VERSION_DIR)
+sys.path.append(os.path.dirname(VERSION_DIR))
 
 from backend.database.database_process import create_oracle_engine
 from backend.database.get_summary_table import *
@@ -28,7 +38,15 @@ from backend.database.get_top_contributors import get_top_attributes_by_differen
 from backend.llm.reson_code import get_reason_code
 from backend.llm.commentary import get_commentary, modify_commentary
 from backend.llm.chatbot import process_chatbot_query
-from backend.utils.helper import read_config, get_file_config_by_path, convert_to_int, format_top_contributors
+from backend.utils.helper import format_top_contributors
+from src.tracing import span, add_span_listener
+from src.metrics import REGISTRY, CONTENT_TYPE_LATEST, estimate_tokens
+from src.jobs import create_job_queue, public_job, FINISHED_STATES
+from src.config_store import get_config_store
+from src.utils import get_table_data_version as fetch_table_data_version
+from src.paging import INDEX_KEY, parse_window_args, window
+from src.summary import format_summary_table, frame_to_records
+from api.transport import JSON, negotiate, encode_frame, decode_frame, is_columnar
 
 app = Flask(__name__)
 CORS(app, supports_credentials=True)  # Enable CORS with credentials support
@@ -36,49 +54,205 @@ CORS(app, supports_credentials=True)  # Enable CORS with credentials support
 # Configuration
 CONFIG_FILE = "config/config.yaml"
 EXCEL_DATA_PATH = "data"
+# Load-balancer probes reuse the last database check for this many seconds
+HEALTH_CHECK_TTL = float(os.getenv("HEALTH_CHECK_TTL", "30"))
+# JSON/text responses smaller than this are sent uncompressed
+GZIP_MIN_SIZE = int(os.getenv("GZIP_MIN_SIZE", "1024"))
+# Conditional requests reuse a table's data version for this many seconds
+DATA_VERSION_TTL = float(os.getenv("DATA_VERSION_TTL", "30"))
+# Threads for the parallel DB work inside /api/slides/<file_name>/bootstrap
+BOOTSTRAP_WORKERS = int(os.getenv("BOOTSTRAP_WORKERS", "4"))
+# Summary frames kept for paging through /api/summary-table/<file_name>/rows
+SUMMARY_CACHE_ENTRIES = int(os.getenv("SUMMARY_CACHE_ENTRIES", "16"))
 
-# Load configuration once
-config = read_config(CONFIG_FILE)
+# In-memory config snapshot, reloaded when the YAML changes on disk
+config_store = get_config_store(CONFIG_FILE)
+config = config_store.config
 
 # Initialize database engine once at startup
 db_config = config.get('database', {})
 engine = None
+engine_lock = threading.Lock()
 
 def get_engine():
     """Get or create the database engine"""
     global engine
     if engine is None:
-        logger.info("Creating new database engine connection")
-        try:
-            engine = create_oracle_engine(db_config)
-            logger.info("Database engine created successfully")
-        except Exception as e:
-            logger.error(f"Failed to create database engine: {str(e)}")
-            raise
+        # Threaded workers may race here on the first requests
+        with engine_lock:
+            if engine is None:
+                logger.info("Creating new database engine connection")
+                try:
+                    engine = create_oracle_engine(db_config)
+                    logger.info("Database engine created successfully")
+                except Exception as e:
+                    logger.error(f"Failed to create database engine: {str(e)}")
+                    raise
     return engine
 
-# Cache file configs to reduce disk reads
-@lru_cache(maxsize=32)
+def warm_up():
+    """Build the engine before serving (called once in the gunicorn master with preload_app)"""
+    try:
+        get_engine()
+    except Exception:
+        # Workers retry lazily on first request rather than refusing to boot
+        logger.warning("Database unavailable at startup; engine will be created on first request")
+
+def on_worker_start():
+    """Drop pooled connections inherited from the master; each worker opens its own"""
+    # The master's config watcher thread doesn't survive the fork
+    config_store.start_watching()
+    if engine is not None:
+        engine.dispose(close=False)
+    # Jobs a killed or recycled worker left "running" would otherwise block deduplication until stale
+    job_queue.recover_orphans()
+
+def shutdown():
+    """Close pooled connections when a worker exits"""
+    bootstrap_executor.shutdown(wait=False)
+    job_queue.shutdown(wait=False)
+    if engine is not None:
+        logger.info("Disposing database engine")
+        engine.dispose()
+
 def get_cached_file_config(file_name):
-    """Get configuration for a specific file with caching"""
+    """Get configuration for a specific file from the in-memory config snapshot"""
     try:
-        return get_file_config_by_path(config, file_name)
+        return config_store.get_file_config(file_name)
     except Exception as e:
         logger.error(f"Error getting file config for {file_name}: {str(e)}")
         raise
 
+# Metrics exposed on /metrics
+REQUEST_LATENCY = REGISTRY.histogram('http_request_duration_seconds', 'Request latency per route',
+                                     ['route', 'method', 'status'])
+REQUESTS_IN_FLIGHT = REGISTRY.gauge('http_requests_in_flight', 'Requests currently being served')
+STAGE_LATENCY = REGISTRY.histogram('stage_duration_seconds', 'Duration of traced backend stages', ['stage'])
+LLM_LATENCY = REGISTRY.histogram('llm_call_duration_seconds', 'LLM call latency', ['stage'])
+LLM_TOKENS = REGISTRY.counter('llm_completion_tokens_estimated', 'Estimated LLM completion tokens', ['stage'])
+DB_POOL = REGISTRY.gauge('db_pool_connections', 'Database pool connections by state', ['state'])
+CACHE_HIT_RATIO = REGISTRY.gauge('cache_hit_ratio', 'Hit ratio of in-process caches', ['cache'])
+
+# name -> callable returning (hits, misses); read when /metrics is scraped
+cache_stats = {}
+LLM_STAGES = ('commentary_llm', 'modify_commentary_llm', 'chatbot_query')
+
+def record_stage_metrics(finished_span):
+    """Feed stage spans (everything below the request span) into the histograms"""
+    if finished_span.parent is None:
+        return
+    STAGE_LATENCY.observe(finished_span.duration_ms / 1000, stage=finished_span.name)
+    if finished_span.name in LLM_STAGES:
+        LLM_LATENCY.observe(finished_span.duration_ms / 1000, stage=finished_span.name)
+
+add_span_listener(record_stage_metrics)
+
+def db_pool_stats():
+    """Current pool usage, or nothing before the engine exists"""
+    if engine is None:
+        return {}
+    stats = {}
+    for state, attr in (('size', 'size'), ('checked_out', 'checkedout'),
+                        ('checked_in', 'checkedin'), ('overflow', 'overflow')):
+        func = getattr(engine.pool, attr, None)
+        if callable(func):
+            stats[(state,)] = func()
+    return stats
+
+def cache_hit_ratios():
+    ratios = {}
+    for name, stats in cache_stats.items():
+        hits, misses = stats()
+        ratios[(name,)] = hits / (hits + misses) if hits + misses else 0.0
+    return ratios
+
+DB_POOL.set_function(db_pool_stats)
+CACHE_HIT_RATIO.set_function(cache_hit_ratios)
+cache_stats['file_config'] = lambda: (config_store.hits, config_store.misses)
+
+@app.before_request
+def start_request_span():
+    """Open a span covering the whole request; stage spans nest under it"""
+    g.request_start = time.perf_counter()
+    REQUESTS_IN_FLIGHT.inc()
+    g.request_span = span("http_request", method=request.method, path=request.path)
+    g.request_span.__enter__()
+
+@app.after_request
+def record_response_status(response):
+    g.response_status = response.status_code
+    if 'request_span' in g:
+        g.request_span.set_attribute('status', response.status_code)
+    return response
+
+@app.after_request
+def compress_response(response):
+    """Gzip JSON/text bodies for clients that accept it (columnar frames carry their own codec)"""
+    if (response.direct_passthrough or response.is_streamed
+            or response.status_code < 200 or response.status_code >= 300
+            or 'Content-Encoding' in response.headers
+            or 'gzip' not in request.headers.get('Accept-Encoding', '').lower()
+            or not (response.mimetype == 'application/json' or response.mimetype.startswith('text/'))):
+        return response
+    body = response.get_data()
+    if len(body) < GZIP_MIN_SIZE:
+        return response
+    response.set_data(gzip.compress(body, compresslevel=5))
+    response.headers['Content-Encoding'] = 'gzip'
+    response.headers.add('Vary', 'Accept-Encoding')
+    return response
+
+@app.teardown_request
+def end_request_span(exc):
+    request_span = g.pop('request_span', None)
+    if request_span is not None:
+        request_span.__exit__(type(exc) if exc else None, exc, None)
+    if 'request_start' in g:
+        REQUESTS_IN_FLIGHT.dec()
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        status = g.get('response_status', 500)
+        REQUEST_LATENCY.observe(time.perf_counter() - g.request_start,
+                                route=route, method=request.method, status=status)
+
+# Last database probe, shared by all health checks within HEALTH_CHECK_TTL
+health_lock = threading.Lock()
+health_state = {'checked_at': None, 'status': None, 'error': None, 'hits': 0, 'misses': 0}
+cache_stats['health_check'] = lambda: (health_state['hits'], health_state['misses'])
+
+def check_database_health():
+    """Return (status, error, cached), probing the database at most once per TTL"""
+    with health_lock:
+        now = time.monotonic()
+        if health_state['checked_at'] is not None and now - health_state['checked_at'] < HEALTH_CHECK_TTL:
+            health_state['hits'] += 1
+            return health_state['status'], health_state['error'], True
+        
+        health_state['misses'] += 1
+        try:
+            with get_engine().connect() as conn:
+                conn.execute(text("SELECT 1 FROM DUAL"))
+            status, error = 'healthy', None
+        except Exception as e:
+            logger.error(f"Health check failed: {str(e)}")
+            status, error = 'unhealthy', str(e)
+        health_state.update(checked_at=now, status=status, error=error)
+        return status, error, False
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint to verify server is running"""
-    try:
-        # Test database connection
-        engine = get_engine()
-        with engine.connect() as conn:
-            conn.execute("SELECT 1 FROM DUAL")
-        return jsonify({'status': 'healthy'})
-    except Exception as e:
-        logger.error(f"Health check failed: {str(e)}")
-        return jsonify({'status': 'unhealthy', 'error': str(e)}), 500
+    status, error, cached = check_database_health()
+    if status == 'healthy':
+        return jsonify({'status': status, 'cached': cached})
+    return jsonify({'status': status, 'error': error, 'cached': cached}), 500
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    Prometheus metrics endpoint. Metrics are per worker process and not aggregated:
+    each series carries a worker (pid) label, so sum over it when querying.
+    """
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE_LATEST)
 
 @app.route('/api/files', methods=['GET'])
 def get_files():
@@ -90,63 +264,381 @@ def get_files():
         logger.error(f"Error getting files: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+# table name -> (checked_at, version)
+data_versions = {}
+data_version_lock = threading.Lock()
+data_version_stats = {'hits': 0, 'misses': 0}
+cache_stats['data_version'] = lambda: (data_version_stats['hits'], data_version_stats['misses'])
+
+def get_table_data_version(table_name):
+    """
+    Table data version (see src.utils.get_table_data_version), cached for DATA_VERSION_TTL.
+
+    Returns None when it can't be determined, in which case callers fall back
+    to hashing the response body.
+    """
+    if not table_name:
+        return None
+    now = time.monotonic()
+    with data_version_lock:
+        cached = data_versions.get(table_name)
+        if cached is not None and now - cached[0] < DATA_VERSION_TTL:
+            data_version_stats['hits'] += 1
+            return cached[1]
+        data_version_stats['misses'] += 1
+    
+    version = fetch_table_data_version(get_engine(), table_name)
+    with data_version_lock:
+        data_versions[table_name] = (now, version)
+    return version
+
+def config_hash(file_config):
+    return hashlib.sha1(json.dumps(file_config, sort_keys=True, default=str).encode()).hexdigest()
+
+def make_etag(*parts):
+    return hashlib.sha1('|'.join(str(part) for part in parts).encode()).hexdigest()[:32]
+
+def not_modified(etag):
+    """304 response if the client already holds this ETag, else None"""
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+        response.set_etag(etag, weak=True)
+        return response
+    return None
+
 @app.route('/api/file-config/<file_name>', methods=['GET'])
 def get_file_config(file_name):
     """Get configuration for a specific file"""
     try:
         file_config = get_cached_file_config(file_name)
-        return jsonify(file_config)
+        etag = config_hash(file_config)
+        cached = not_modified(etag)
+        if cached is not None:
+            return cached
+        response = jsonify(file_config)
+        response.set_etag(etag, weak=True)
+        return response
     except Exception as e:
         logger.error(f"Error getting file config: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+bootstrap_executor = ThreadPoolExecutor(max_workers=BOOTSTRAP_WORKERS, thread_name_prefix="bootstrap")
+
+def submit_in_context(func, *args):
+    """Run func on the bootstrap pool inside a copy of the current context, so its spans nest"""
+    ctx = contextvars.copy_context()
+    return bootstrap_executor.submit(ctx.run, func, *args)
+
+def build_summary_table(file_name, file_config):
+    """Run the file's summary query and format it for display"""
+    summary_func_name = file_config.get('summary_table_function')
+    if not summary_func_name or summary_func_name not in globals():
+        raise LookupError(f'Summary function {summary_func_name} not found')
+    summary_func = globals()[summary_func_name]
+    
+    # Get the engine
+    engine = get_engine()
+    
+    with span("summary_table", file_name=file_name):
+        df = summary_func(engine)
+    with span("format_summary", rows=len(df)):
+        return format_summary_table(df)
+
+summary_frames = OrderedDict()
+summary_frame_lock = threading.Lock()
+summary_frame_stats = {'hits': 0, 'misses': 0}
+cache_stats['summary_frame'] = lambda: (summary_frame_stats['hits'], summary_frame_stats['misses'])
+
+def get_summary_frame(file_name, file_config):
+    """
+    build_summary_table, cached per (file, data version, config) so paging through a
+    large table doesn't re-run the summary query for every window.
+
+    Without a known data version an entry is only reused for DATA_VERSION_TTL seconds.
+    """
+    data_version = get_table_data_version(file_config.get('table_name'))
+    key = (file_name, data_version, config_hash(file_config))
+    now = time.monotonic()
+    with summary_frame_lock:
+        cached = summary_frames.get(key)
+        if cached is not None and (data_version is not None or now - cached[0] < DATA_VERSION_TTL):
+            summary_frames.move_to_end(key)
+            summary_frame_stats['hits'] += 1
+            return cached[1]
+        summary_frame_stats['misses'] += 1
+    
+    df = build_summary_table(file_name, file_config)
+    with summary_frame_lock:
+        summary_frames[key] = (now, df)
+        summary_frames.move_to_end(key)
+        while len(summary_frames) > SUMMARY_CACHE_ENTRIES:
+            summary_frames.popitem(last=False)
+    return df
+
+def merge_contributors(parts):
+    """Combine per-cell results of get_top_attributes_by_difference"""
+    if len(parts) == 1:
+        return parts[0]
+    if all(isinstance(part, pd.DataFrame) for part in parts):
+        return pd.concat(parts)
+    if all(isinstance(part, dict) for part in parts):
+        merged = {}
+        for part in parts:
+            merged.update(part)
+        return merged
+    merged = []
+    for part in parts:
+        merged.extend(part)
+    return merged
+
+def compute_top_contributors(file_name, table_name, selected_cells, contributing_columns, top_n):
+    """Top contributors for the selected cells, one DB query per cell run in parallel"""
+    engine = get_engine()
+    with span("top_contributors", file_name=file_name, cells=len(selected_cells)):
+        futures = [
+            submit_in_context(get_top_attributes_by_difference, engine, [cell], table_name,
+                              contributing_columns, top_n)
+            for cell in selected_cells
+        ]
+        top_contributors = merge_contributors([future.result() for future in futures])
+    return format_top_contributors(top_contributors)
+
+def generate_commentary(file_name, top_contributors):
+    with span("commentary_llm", file_name=file_name):
+        commentary = get_commentary(top_contributors, file_name)
+    LLM_TOKENS.inc(estimate_tokens(commentary), stage='commentary_llm')
+    return commentary
+
+def regenerate_commentary(file_name, user_comment, current_commentary, selected_cells, contributing_columns, top_n):
+    with span("modify_commentary_llm", file_name=file_name):
+        updated_commentary = modify_commentary(
+            user_comment,
+            current_commentary,
+            selected_cells,
+            file_name,
+            contributing_columns,
+            top_n
+        )
+    LLM_TOKENS.inc(estimate_tokens(updated_commentary), stage='modify_commentary_llm')
+    return updated_commentary
+
+# (file, data version, config hash) -> bootstrap payload; only versioned tables are cached
+bootstrap_payloads = OrderedDict()
+bootstrap_payload_lock = threading.Lock()
+bootstrap_payload_stats = {'hits': 0, 'misses': 0}
+cache_stats['bootstrap'] = lambda: (bootstrap_payload_stats['hits'], bootstrap_payload_stats['misses'])
+
+def build_bootstrap_payload(file_name, file_config):
+    """Summary shape, reason-code selection, top contributors and commentary for a slide"""
+    contributing_columns = file_config['contributing_columns']
+    top_n = file_config['top_n']
+    df = get_summary_frame(file_name, file_config)
+    
+    # The frame stays server-side instead of being uploaded back for the reason code
+    with span("reason_code", file_name=file_name):
+        selected_cells = get_reason_code(df, file_name)
+    
+    top_contributors_formatted = []
+    commentary = 'No contributors to analyze.'
+    if selected_cells:
+        top_contributors_formatted = compute_top_contributors(
+            file_name, file_config.get('table_name'), selected_cells, contributing_columns, top_n
+        )
+        if top_contributors_formatted:
+            commentary = generate_commentary(file_name, top_contributors_formatted)
+    
+    return {
+        'file_config': file_config,
+        'summary_table': {
+            'rows': len(df),
+            'columns': df.columns.tolist(),
+            'index_name': df.index.name,
+            # Row labels, for choosing cells without loading the whole table
+            'index': df.index.tolist()
+        },
+        'selected_cells': selected_cells,
+        'top_contributors': top_contributors_formatted,
+        'commentary': commentary
+    }
+
+@app.route('/api/slides/<file_name>/bootstrap', methods=['GET'])
+def bootstrap_slide(file_name):
+    """
+    Everything the frontend needs to open a slide in one round trip: file config,
+    summary table shape, initial reason-code selection, top contributors and commentary.
+
+    The table itself isn't embedded: clients fetch it through /api/summary-table
+    (Arrow/Parquet when negotiated) or page it through /rows, both served from
+    the frame cached here.
+
+    With a known data version the payload is cached and ETagged per (file, data
+    version, config), so reopening a slide neither re-runs the summary query nor
+    the commentary LLM, and a client holding the ETag gets a 304.
+    """
+    try:
+        file_config = get_cached_file_config(file_name)
+        data_version = get_table_data_version(file_config.get('table_name'))
+        etag = None
+        if data_version is not None:
+            etag = make_etag('bootstrap', file_name, data_version, config_hash(file_config))
+            cached = not_modified(etag)
+            if cached is not None:
+                return cached
+        
+        payload = None
+        if etag is not None:
+            with bootstrap_payload_lock:
+                payload = bootstrap_payloads.get(etag)
+                if payload is not None:
+                    bootstrap_payloads.move_to_end(etag)
+                    bootstrap_payload_stats['hits'] += 1
+                else:
+                    bootstrap_payload_stats['misses'] += 1
+        
+        if payload is None:
+            try:
+                payload = build_bootstrap_payload(file_name, file_config)
+            except LookupError as e:
+                logger.error(str(e))
+                return jsonify({'error': str(e)}), 404
+            if etag is not None:
+                with bootstrap_payload_lock:
+                    bootstrap_payloads[etag] = payload
+                    while len(bootstrap_payloads) > SUMMARY_CACHE_ENTRIES:
+                        bootstrap_payloads.popitem(last=False)
+        
+        response = jsonify(payload)
+        if etag is not None:
+            response.set_etag(etag, weak=True)
+        return response
+    except Exception as e:
+        logger.error(f"Error bootstrapping slide: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/summary-table/<file_name>', methods=['GET'])
 def get_summary_table(file_name):
     """Get summary table data for a file"""
     try:
         file_config = get_cached_file_config(file_name)
-        summary_func_name = file_config.get('summary_table_function')
+        media_type, codec = negotiate(request.headers.get('Accept'))
         
-        if not summary_func_name or summary_func_name not in globals():
-            logger.error(f"Summary function {summary_func_name} not found")
-            return jsonify({'error': f'Summary function {summary_func_name} not found'}), 404
+        # With a known data version the ETag is checked before running the summary query
+        data_version = get_table_data_version(file_config.get('table_name'))
+        if data_version is not None:
+            etag = make_etag(file_name, data_version, config_hash(file_config), media_type, codec)
+            cached = not_modified(etag)
+            if cached is not None:
+                cached.headers['Vary'] = 'Accept'
+                return cached
         
-        summary_func = globals()[summary_func_name]
+        try:
+            df = get_summary_frame(file_name, file_config)
+        except LookupError as e:
+            logger.error(str(e))
+            return jsonify({'error': str(e)}), 404
         
-        # Get the engine
-        engine = get_engine()
+        # Send Arrow IPC / Parquet when the client asks for it, JSON otherwise
+        response = None
+        if media_type != JSON:
+            try:
+                with span("encode_frame", format=media_type, codec=codec):
+                    payload = encode_frame(df, media_type, codec)
+                response = Response(payload, content_type=media_type)
+                response.headers['X-Frame-Compression'] = codec
+            except Exception as e:
+                # e.g. mixed-type object columns Arrow can't represent
+                logger.warning(f"Columnar encoding failed, falling back to JSON: {str(e)}")
+                media_type, codec = JSON, None
+
+        if response is None:
+            # Convert DataFrame to JSON
+            result = {
+                'data': frame_to_records(df),
+                'index': df.index.tolist()
+            }
+            response = jsonify(result)
         
-        df = summary_func(engine)
-        df = df.map(convert_to_int)
+        if data_version is not None:
+            # Recomputed in case the columnar encoding fell back to JSON
+            etag = make_etag(file_name, data_version, config_hash(file_config), media_type, codec)
+        else:
+            # Unknown data version: hash the body so unchanged tables still get a 304
+            etag = make_etag(file_name, hashlib.sha1(response.get_data()).hexdigest(), media_type, codec)
+        cached = not_modified(etag)
+        if cached is not None:
+            response = cached
+        response.set_etag(etag, weak=True)
+        response.headers['Vary'] = 'Accept'
+        return response
+    except Exception as e:
+        logger.error(f"Error getting summary table: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/summary-table/<file_name>/rows', methods=['GET'])
+def get_summary_rows(file_name):
+    """
+    One window of a file's summary table, filtered and sorted server-side.
+
+    Query parameters: start, length, sort (column name or __index__), order
+    (asc/desc) and search; DataTables server-side parameters are accepted too.
+    Counts are returned in the JSON body, or in X-Total-Count / X-Filtered-Count
+    headers for Arrow/Parquet responses.
+    """
+    try:
+        file_config = get_cached_file_config(file_name)
+        media_type, codec = negotiate(request.headers.get('Accept'))
+        try:
+            df = get_summary_frame(file_name, file_config)
+        except LookupError as e:
+            logger.error(str(e))
+            return jsonify({'error': str(e)}), 404
         
-        # Check if these columns exist before dropping
-        columns_to_drop = []
-        for col in ['Y/Y %', 'Q/Q %']:
-            if col in df.columns:
-                columns_to_drop.append(col)
+        with span("summary_rows", file_name=file_name):
+            rows = window(df, **parse_window_args(request.args, [df.index.name or INDEX_KEY] + df.columns.tolist()))
         
-        if columns_to_drop:
-            df = df.drop(columns=columns_to_drop)
+        response = None
+        if media_type != JSON:
+            try:
+                payload = encode_frame(rows.frame, media_type, codec)
+                response = Response(payload, content_type=media_type)
+                response.headers['X-Frame-Compression'] = codec
+                response.headers['X-Total-Count'] = str(rows.total)
+                response.headers['X-Filtered-Count'] = str(rows.filtered)
+            except Exception as e:
+                logger.warning(f"Columnar encoding failed, falling back to JSON: {str(e)}")
         
-        # Convert DataFrame to JSON
-        result = {
-            'data': df.to_dict(orient='records'),
-            'index': df.index.tolist()
-        }
-        return jsonify(result)
+        if response is None:
+            response = jsonify({
+                'data': frame_to_records(rows.frame),
+                'index': rows.frame.index.tolist(),
+                'columns': rows.frame.columns.tolist(),
+                'start': rows.start,
+                'total': rows.total,
+                'filtered': rows.filtered,
+                # Echoed for DataTables server-side processing
+                'draw': request.args.get('draw', type=int),
+                'recordsTotal': rows.total,
+                'recordsFiltered': rows.filtered
+            })
+        response.headers['Vary'] = 'Accept'
+        return response
     except Exception as e:
-        logger.error(f"Error getting summary table: {str(e)}")
+        logger.error(f"Error getting summary rows: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/reason-code/<file_name>', methods=['POST'])
 def get_reason_code_api(file_name):
     """Get reason code for a file"""
     try:
-        data = request.json
-        df_json = data.get('df')
-        df = pd.read_json(df_json, orient='split')
+        if is_columnar(request.content_type):
+            df = decode_frame(request.get_data(), request.content_type)
+        else:
+            data = request.json
+            df_json = data.get('df')
+            df = pd.read_json(df_json, orient='split')
         
-        selected_cells = get_reason_code(df, file_name)
+        with span("reason_code", file_name=file_name):
+            selected_cells = get_reason_code(df, file_name)
         return jsonify({'selected_cells': selected_cells})
     except Exception as e:
         logger.error(f"Error getting reason code: {str(e)}")
@@ -168,17 +660,9 @@ def get_top_contributors_api(file_name):
         file_config = get_cached_file_config(file_name)
         table_name = file_config.get('table_name')
         
-        engine = get_engine()
-        
-        top_contributors = get_top_attributes_by_difference(
-            engine,
-            selected_cells,
-            table_name,
-            contributing_columns,
-            top_n
+        top_contributors_formatted = compute_top_contributors(
+            file_name, table_name, selected_cells, contributing_columns, top_n
         )
-        
-        top_contributors_formatted = format_top_contributors(top_contributors)
         return jsonify({'contributors': top_contributors_formatted})
     except Exception as e:
         logger.error(f"Error getting top contributors: {str(e)}")
@@ -194,7 +678,7 @@ def get_commentary_api(file_name):
         if not top_contributors:
             return jsonify({'commentary': 'No contributors to analyze.'}), 200
             
-        commentary = get_commentary(top_contributors, file_name)
+        commentary = generate_commentary(file_name, top_contributors)
         return jsonify({'commentary': commentary})
     except Exception as e:
         logger.error(f"Error getting commentary: {str(e)}")
@@ -215,13 +699,8 @@ def modify_commentary_api(file_name):
         if not user_comment:
             return jsonify({'error': 'User comment is required'}), 400
             
-        updated_commentary = modify_commentary(
-            user_comment,
-            current_commentary,
-            selected_cells,
-            file_name,
-            contributing_columns,
-            top_n
+        updated_commentary = regenerate_commentary(
+            file_name, user_comment, current_commentary, selected_cells, contributing_columns, top_n
         )
         
         return jsonify({'commentary': updated_commentary})
@@ -244,12 +723,90 @@ def chatbot_api():
             
         engine = get_engine()
         
-        response = process_chatbot_query(engine, query, table_name)
+        with span("chatbot_query", table_name=table_name):
+            response = process_chatbot_query(engine, query, table_name)
+        LLM_TOKENS.inc(estimate_tokens(response), stage='chatbot_query')
         return jsonify({'response': response})
     except Exception as e:
         logger.error(f"Error processing chatbot query: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+# Background jobs: slow LLM / bulk DB work runs on the job pool and is polled by id
+job_queue = create_job_queue()
+# SSE connections are closed after this long (clients reconnect after the retry delay)
+JOB_STREAM_TIMEOUT = float(os.getenv("JOB_STREAM_TIMEOUT", "20"))
+JOB_STREAM_RETRY_MS = int(os.getenv("JOB_STREAM_RETRY_MS", "1000"))
+
+def job_accepted(job):
+    response = jsonify({**public_job(job), 'status_url': f"/api/jobs/{job['id']}"})
+    response.status_code = 202
+    response.headers['Location'] = f"/api/jobs/{job['id']}"
+    return response
+
+@app.route('/api/jobs/commentary/<file_name>', methods=['POST'])
+def submit_commentary_job(file_name):
+    """Queue commentary generation for top contributors"""
+    data = request.json or {}
+    top_contributors = data.get('top_contributors', [])
+    if not top_contributors:
+        return jsonify({'error': 'No contributors to analyze'}), 400
+    job = job_queue.submit('commentary', generate_commentary, file_name, top_contributors)
+    return job_accepted(job)
+
+@app.route('/api/jobs/modify-commentary/<file_name>', methods=['POST'])
+def submit_modify_commentary_job(file_name):
+    """Queue a commentary rewrite based on user input"""
+    data = request.json or {}
+    if not data.get('user_comment'):
+        return jsonify({'error': 'User comment is required'}), 400
+    job = job_queue.submit(
+        'modify_commentary', regenerate_commentary, file_name,
+        data['user_comment'], data.get('current_commentary', ''), data.get('selected_cells', []),
+        data.get('contributing_columns', []), data.get('top_n', 5)
+    )
+    return job_accepted(job)
+
+@app.route('/api/jobs/top-contributors/<file_name>', methods=['POST'])
+def submit_top_contributors_job(file_name):
+    """Queue top contributor computation for the selected cells"""
+    data = request.json or {}
+    selected_cells = data.get('selected_cells', [])
+    if not selected_cells:
+        return jsonify({'error': 'No cells selected'}), 400
+    table_name = get_cached_file_config(file_name).get('table_name')
+    job = job_queue.submit(
+        'top_contributors', compute_top_contributors, file_name, table_name, selected_cells,
+        data.get('contributing_columns', []), data.get('top_n', 5)
+    )
+    return job_accepted(job)
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Job status, with the result once it has succeeded"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(public_job(job))
+
+@app.route('/api/jobs/<job_id>/stream', methods=['GET'])
+def stream_job(job_id):
+    """
+    Server-sent events with the job record on every status change.
+
+    Each connection holds a request thread, so it is closed after JOB_STREAM_TIMEOUT
+    seconds; EventSource clients reconnect after the advertised retry delay.
+    """
+    if job_queue.get(job_id) is None:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    def events():
+        yield f"retry: {JOB_STREAM_RETRY_MS}\n\n"
+        for job in job_queue.stream(job_id, timeout=JOB_STREAM_TIMEOUT):
+            event = 'done' if job['status'] in FINISHED_STATES else 'status'
+            yield f"event: {event}\ndata: {json.dumps(public_job(job), default=str)}\n\n"
+    
+    return Response(events(), content_type='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
 @app.route('/api/update-config', methods=['POST'])
 def update_config_api():
     """Update configuration for a file"""
@@ -262,23 +819,12 @@ def update_config_api():
         if not file_name:
             return jsonify({'error': 'File name is required'}), 400
             
-        # Read current config
-        with open(CONFIG_FILE, 'r') as file:
-            current_config = yaml.safe_load(file)
-        
-        # Update config
-        if file_name not in current_config.get('excel_files', {}):
-            current_config.setdefault('excel_files', {})[file_name] = {}
-            
-        current_config['excel_files'][file_name]['contributing_columns'] = contributing_columns
-        current_config['excel_files'][file_name]['top_n'] = top_n
-        
-        # Write updated config
-        with open(CONFIG_FILE, 'w') as file:
-            yaml.dump(current_config, file)
-        
-        # Clear the cache to reload the updated config
-        get_cached_file_config.cache_clear()
+        # Locked, atomic write; only this file's cached lookups are invalidated
+        config_store.update_file_config(
+            file_name,
+            contributing_columns=contributing_columns,
+            top_n=top_n
+        )
         
         return jsonify({'status': 'success'})
     except Exception as e:
@@ -292,5 +838,5 @@ def handle_exception(e):
     return jsonify({'error': 'An unexpected error occurred. Please try again later.'}), 500
 
 if __name__ == '__main__':
-    # Use gunicorn for production
+    # Development server only; production runs gunicorn with backend/gunicorn.conf.py
     app.run(debug=False, host='0.0.0.0', port=5000)
\ No newline at end of file
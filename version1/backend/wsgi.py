@@ -0,0 +1,6 @@
+"""WSGI entry point: gunicorn -c backend/gunicorn.conf.py backend.wsgi:app"""
+from backend.server import app, warm_up
+
+# With preload_app this runs once in the gunicorn master, so config and the
+# engine are built before the workers fork
+warm_up()
@@ -6,8 +6,11 @@ import yaml
 import sys
 import requests
 
-# Add parent directory to path to import api client
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Add parent directory to path to import api client, and the repo root for the
+# shared src package (copied next to it in the Docker image)
+VERSION_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(VERSION_DIR)
+sys.path.append(os.path.dirname(VERSION_DIR))
 from api.client import APIClient
 
 # page Configuration
@@ -15,7 +18,13 @@ st.set_page_config(layout="wide")
 
 # Initialize API client
 API_ENDPOINT = os.getenv("API_ENDPOINT", "http://localhost:5000")
-api_client = APIClient(API_ENDPOINT)
+
+@st.cache_resource
+def get_api_client(base_url):
+    """One pooled client per process, reused across reruns and sessions"""
+    return APIClient(base_url)
+
+api_client = get_api_client(API_ENDPOINT)
 
 # loading the style
 def load_custom_css():
@@ -23,6 +32,46 @@ def load_custom_css():
     with open("frontend/styles/style_new.css") as f:
         st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
 
+# Tables longer than PAGED_TABLE_ROWS are paged; the backend filters and sorts each window
+PAGED_TABLE_ROWS = int(os.getenv("PAGED_TABLE_ROWS", "200"))
+TABLE_PAGE_SIZE = int(os.getenv("TABLE_PAGE_SIZE", "50"))
+# Sort key the backend uses for the row labels
+INDEX_KEY = "__index__"
+
+def render_summary_table(file_data, file_name):
+    """Summary table editor; returns the edited rows that are on screen"""
+    df = file_data['df']
+    if df is not None:
+        return st.data_editor(df, key=f"data_editor_{file_name}", hide_index=False)
+    
+    summary = file_data['summary']
+    search_col, sort_col, order_col, page_col = st.columns([3, 2, 1, 1])
+    with search_col:
+        search = st.text_input("Search rows", key=f"table_search_{file_name}")
+    with sort_col:
+        sort_by = st.selectbox("Sort by", [None, INDEX_KEY] + summary['columns'], key=f"table_sort_{file_name}",
+                               format_func=lambda c: "—" if c is None else (summary['index_name'] or "Row") if c == INDEX_KEY else c)
+    with order_col:
+        descending = st.toggle("Desc", key=f"table_desc_{file_name}")
+    
+    # Page count from the last response for this view; a new view starts on page 1
+    view_key = (file_name, search, sort_by, descending)
+    filtered = st.session_state.get('table_view_counts', {}).get(view_key, summary['rows'])
+    pages = max(1, -(-filtered // TABLE_PAGE_SIZE))
+    with page_col:
+        page = st.number_input("Page", min_value=1, max_value=pages, value=1, step=1)
+    start = (page - 1) * TABLE_PAGE_SIZE
+    page_df, total, filtered = api_client.get_summary_rows(file_name, start, TABLE_PAGE_SIZE, sort=sort_by,
+                                                           ascending=not descending, search=search)
+    if st.session_state.setdefault('table_view_counts', {}).get(view_key) != filtered:
+        st.session_state.table_view_counts[view_key] = filtered
+        st.rerun()
+    
+    st.caption(f"Rows {start + 1 if len(page_df) else 0}–{start + len(page_df)} of {filtered}"
+               + (f" (filtered from {total})" if filtered != total else ""))
+    return st.data_editor(page_df, key=f"data_editor_{file_name}_{search}_{sort_by}_{descending}_{page}",
+                          hide_index=False)
+
 # Load data files
 EXCEL_DATA_PATH = "frontend/data"
 config_file = "config/config.yaml"
@@ -44,34 +93,27 @@ def initialize_file_data(file_name):
     """Initialize data for a file if it doesn't exist"""
     if file_name not in st.session_state.file_data:
         with st.spinner("Loading file data..."):
-            # Get file config via API
-            file_config = api_client.get_file_config(file_name)
+            # Config, summary table, reason code, contributors and commentary in one round trip
+            slide = api_client.bootstrap_slide(file_name)
+            file_config = slide['file_config']
             st.session_state.file_config = file_config
             st.session_state.file_name = file_name
             
-            # Get summary table via API
-            df = api_client.get_summary_table(file_name)
+            # Small tables are fetched whole (Arrow when available, ETag-revalidated);
+            # larger ones stay on the backend and are paged
+            summary = slide['summary_table']
+            df = api_client.get_summary_table(file_name) if summary['rows'] <= PAGED_TABLE_ROWS else None
             
             st.session_state.contributing_columns = file_config['contributing_columns']
             st.session_state.top_n = file_config['top_n']
             
-            # Get reason code via API
-            initial_selected_cells = api_client.get_reason_code(file_name, df)
-            
-            # Get top contributors via API
-            top_contributors_formatted = api_client.get_top_contributors(
-                file_name, 
-                initial_selected_cells,
-                file_config['contributing_columns'],
-                file_config['top_n']
-            )
-            
-            # Get commentary via API
-            commentary = api_client.get_commentary(file_name, top_contributors_formatted)
+            initial_selected_cells = slide['selected_cells']
+            commentary = slide['commentary']
             
             st.session_state.file_data[file_name] = {
                 'name': file_name,
                 'df': df,
+                'summary': summary,
                 'selected_cells': initial_selected_cells.copy(),
                 'initial_selected_cells': initial_selected_cells, # Store initial selection
                 'commentary': commentary
@@ -91,12 +133,16 @@ def render_selection_controls(edited_df, file_data):
     """Render the selection controls section"""
     st.text("")
     st.markdown("<h5 style='text-align: center;'>Selection Controls</h5>", unsafe_allow_html=True)
-    row_index = st.selectbox("Select Row", edited_df.index.tolist())
+    # Every row of the table, not just the page on screen
+    row_index = st.selectbox("Select Row", file_data['summary']['index'])
     column = st.selectbox("Select Column", ["Y/Y %", "Q/Q %"])
     
     if st.button("+ Add Selection"):
         if row_index is not None and column is not None:
-            value = edited_df.loc[row_index, column]
+            if row_index in edited_df.index:
+                value = edited_df.loc[row_index, column]
+            else:
+                value = api_client.get_summary_value(st.session_state.file_name, row_index, column)
             new_selection = (row_index, column, value)
             if new_selection in file_data['selected_cells']:
                 st.warning(f"Cell ({row_index}, {column}, {value}) is already selected!")
@@ -272,7 +318,7 @@ def main():
         with col_a:
             # Data Overview
             st.markdown("<center><div style='background-color:skyblue;border-radius:5px; padding:1px'><p class='section-header'>Summary Table 📊</p></div></center>", unsafe_allow_html=True)
-            edited_df = st.data_editor(file_data['df'], key=f"data_editor_{st.session_state.selected_file}", hide_index=False)
+            edited_df = render_summary_table(file_data, st.session_state.selected_file)
             
             # Cell Selection
             st.markdown("<center><div style='background-color:skyblue;border-radius:5px; padding:1px'><p class='section-header'>Manual Selection 👇</p></div></center>", unsafe_allow_html=True)
@@ -0,0 +1,75 @@
+"""Simple load test for the backend API.
+
+Simulates analysts hitting the read endpoints concurrently and reports
+requests/sec and latency percentiles, e.g.:
+
+    python loadtest.py --base-url http://localhost:5000 --concurrency 50 --duration 60 --file sales
+"""
+import argparse
+import math
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(1, math.ceil(pct / 100.0 * len(ordered))) - 1]
+
+
+def analyst(base_url, paths, deadline, latencies, statuses, lock):
+    """One simulated analyst: cycles through the paths on its own keep-alive session"""
+    session = requests.Session()
+    i = 0
+    while time.monotonic() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            response = session.get(f"{base_url}{path}", timeout=120)
+            status = response.status_code
+        except requests.exceptions.RequestException as e:
+            status = type(e).__name__
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            statuses[status] += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the backend API")
+    parser.add_argument("--base-url", default="http://localhost:5000")
+    parser.add_argument("--concurrency", type=int, default=50, help="Concurrent analysts")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to run")
+    parser.add_argument("--file", default=None, help="File name for the file-config/summary endpoints")
+    args = parser.parse_args()
+
+    base_url = args.base_url.rstrip('/')
+    paths = ["/api/health", "/api/files"]
+    if args.file:
+        paths += [f"/api/file-config/{args.file}", f"/api/summary-table/{args.file}"]
+
+    latencies, statuses, lock = [], Counter(), threading.Lock()
+    deadline = time.monotonic() + args.duration
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        for _ in range(args.concurrency):
+            executor.submit(analyst, base_url, paths, deadline, latencies, statuses, lock)
+    elapsed = time.perf_counter() - started
+
+    print(f"Concurrency:  {args.concurrency}")
+    print(f"Requests:     {len(latencies)} in {elapsed:.1f}s")
+    print(f"Requests/sec: {len(latencies) / elapsed:.1f}")
+    for pct in (50, 95, 99):
+        value = percentile(latencies, pct)
+        print(f"p{pct} latency:  {value * 1000:.1f} ms" if value is not None else f"p{pct} latency:  n/a")
+    print(f"Statuses:     {dict(statuses)}")
+
+
+if __name__ == "__main__":
+    main()
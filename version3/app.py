@@ -1,9 +1,15 @@
 import os
+import sys
 import json
 import logging
+from functools import lru_cache
 import pandas as pd
 from flask import Flask, render_template, request, jsonify, session
 
+# Add the repository root to path to import the shared src package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.paging import parse_window_args, window
+
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
@@ -31,6 +37,9 @@ def save_config(updated_config):
 
 config = load_config()
 
+# Tables longer than this are sent to the browser a page at a time (DataTables server-side mode)
+PAGED_TABLE_ROWS = int(os.environ.get("PAGED_TABLE_ROWS", "200"))
+
 # Mock functions that would be implemented elsewhere
 def get_details(filename):
     """Extract details from file like rows, average amount, etc."""
@@ -59,6 +68,11 @@ def get_summary_table(filename):
     }
     return pd.DataFrame(data)
 
+@lru_cache(maxsize=16)
+def get_summary_frame(filename):
+    """Summary table kept server-side so pages can be served without rebuilding it"""
+    return get_summary_table(filename)
+
 def get_reason_code(df, filename):
     """Select cells based on summary table"""
     # This would be implemented elsewhere
@@ -141,11 +155,13 @@ def file_details():
         details = get_details(filename)
         
         # Get summary table
-        df = get_summary_table(filename)
+        df = get_summary_frame(filename)
         
-        # Convert DataFrame to dict for JSON serialization
-        table_data = df.to_dict(orient='records')
+        # Convert DataFrame to dict for JSON serialization; large tables are fetched
+        # page by page from /api/summary_rows instead
         columns = df.columns.tolist()
+        paged = len(df) > PAGED_TABLE_ROWS
+        table_data = [] if paged else df.to_dict(orient='records')
         
         # Get selected cells
         selected_cells = get_reason_code(df, filename)
@@ -173,7 +189,9 @@ def file_details():
             "details": details,
             "table": {
                 "data": table_data,
-                "columns": columns
+                "columns": columns,
+                "paged": paged,
+                "total": len(df)
             },
             "selected_cells": selected_cells,
             "contributing_columns": contributing_columns,
@@ -185,6 +203,29 @@ def file_details():
         logger.error(f"Error processing file {filename}: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/summary_rows')
+def summary_rows():
+    """One page of the current file's summary table, filtered and sorted server-side for DataTables"""
+    filename = request.args.get('filename') or session.get('current_file')
+    
+    if not filename:
+        return jsonify({"error": "No file selected"}), 400
+    
+    try:
+        df = get_summary_frame(filename)
+        rows = window(df, **parse_window_args(request.args, df.columns.tolist()))
+        
+        return jsonify({
+            "draw": request.args.get('draw', type=int),
+            "recordsTotal": rows.total,
+            "recordsFiltered": rows.filtered,
+            "data": rows.frame.to_dict(orient='records')
+        })
+    
+    except Exception as e:
+        logger.error(f"Error getting summary rows for {filename}: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/modify_commentary', methods=['POST'])
 def api_modify_commentary():
     """Modify commentary based on user input"""
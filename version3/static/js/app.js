@@ -273,10 +273,57 @@ $(document).ready(function() {
         $('#fileDetails').html(detailsHtml);
     }
     
+    function displayPagedSummaryTable(tableData) {
+        // Large tables: DataTables fetches, sorts and filters one page at a time from the backend
+        const rowColumn = tableData.columns[0];
+        
+        let headerHtml = '<tr><th></th>';
+        tableData.columns.slice(1).forEach(column => {
+            headerHtml += `<th>${column}</th>`;
+        });
+        headerHtml += '</tr>';
+        $('#summaryTable thead').html(headerHtml);
+        $('#summaryTable tbody').empty();
+        
+        $('#summaryTable').DataTable({
+            serverSide: true,
+            processing: true,
+            deferRender: true,
+            paging: true,
+            pageLength: 50,
+            searching: true,
+            ordering: true,
+            order: [],
+            destroy: true,
+            ajax: {
+                url: '/api/summary_rows',
+                data: { filename: $('#fileSelect').val() }
+            },
+            columns: tableData.columns.map(column => ({
+                data: column,
+                defaultContent: '',
+                className: column === rowColumn ? 'fw-bold' : ''
+            })),
+            createdRow: function(row, data) {
+                $(row).find('td').each(function(position) {
+                    if (position === 0) return;
+                    const column = tableData.columns[position];
+                    const value = data[column] !== undefined && data[column] !== null ? data[column] : '';
+                    $(this).attr({'data-row': data[rowColumn], 'data-col': column, 'data-value': value});
+                });
+            },
+            // Rows are replaced on every page change, so re-apply selection and hover state after each draw
+            drawCallback: function() {
+                highlightSelectedCells();
+                setupHoverHighlighting();
+            }
+        });
+    }
+    
     function displaySummaryTable(tableData) {
         console.log("Displaying summary table:", tableData);
         
-        if (!tableData || !tableData.data || !tableData.columns || tableData.data.length === 0) {
+        if (!tableData || !tableData.columns || (!tableData.paged && (!tableData.data || tableData.data.length === 0))) {
             $('#summaryTable').html('<div class="alert alert-warning">No table data available</div>');
             return;
         }
@@ -290,6 +337,11 @@ $(document).ready(function() {
         $('#summaryTable thead').empty();
         $('#summaryTable tbody').empty();
         
+        if (tableData.paged) {
+            displayPagedSummaryTable(tableData);
+            return;
+        }
+        
         // Create table headers
         let headerHtml = '<tr><th></th>';
         tableData.columns.slice(1).forEach(column => {
@@ -322,12 +374,12 @@ $(document).ready(function() {
                 ordering: false,
                 destroy: true // Ensure it can be reinitialized
             });
-            
-            // Add click event listeners to cells
-            $('#summaryTable tbody td:not(:first-child)').on('click', toggleCellSelection);
         }, 100);
     }
     
+    // Delegated, so cells of server-side pages drawn later are clickable too
+    $('#summaryTable tbody').on('click', 'td:not(:first-child)', toggleCellSelection);
+    
     function toggleCellSelection(event) {
         const $cell = $(event.target);
         const row = $cell.data('row');